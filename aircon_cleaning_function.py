@@ -1,8 +1,7 @@
 from service_utils import (
-    get_google_creds_and_service,
-    get_service_price_list,
+    append_booking_row,
+    get_price_index,
 )
-import os
 
 
 def save_aircon_cleaning_booking_details(number_of_ac_units, ac_details, preferred_service_date,
@@ -22,12 +21,6 @@ def save_aircon_cleaning_booking_details(number_of_ac_units, ac_details, preferr
     Returns:
         str: A confirmation message for the customer.
     """
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
     data = [""] * 29
     data[0] = preferred_service_date
@@ -42,11 +35,7 @@ def save_aircon_cleaning_booking_details(number_of_ac_units, ac_details, preferr
         data[6 + (3 * i)] = details.get('ac_type', '')
         data[7 + (3 * i)] = details.get('horsepower', '')
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="ac_cleaning!A1:AC1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": [data]}).execute()
+    append_booking_row("ac_cleaning!A1:AC1", data)
 
     return ("Thank you for confirming the details. We will check vendor availability and "
             "get back to you as soon as possible with a final confirmation.")
@@ -62,19 +51,18 @@ def estimate_rough_aircon_cleaning_price(ac_type):
     Returns:
         str: Price range for normal and chemical cleaning.
     """
-    price_df = get_service_price_list("Aircon Cleaning")
+    price_index = get_price_index("Aircon Cleaning")
     reply = ""
 
     for cleaning_type in ['Normal Cleaning', 'Chemical Cleaning']:
-        price = price_df.loc[
-            (price_df["Aircon Type"] == ac_type) & (price_df["Cleaning Type"] == cleaning_type), "Price per Unit (RM)"
-        ]
+        price = price_index.rows(ac_type, cleaning_type)
 
         reply += f"{cleaning_type} Price Per Unit: "
         if len(price) == 1:
-            reply += f"{price.iloc[0]}\n"
+            reply += f"{price[0]['Price per Unit (RM)']}\n"
         elif len(price) > 1:
-            reply += f"{price.iloc[0].split('-')[0]} to {price.iloc[len(price) - 1].split('-')[1]}\n"
+            low, high = price_index.span("Price per Unit (RM)", ac_type, cleaning_type)
+            reply += f"{low} to {high}\n"
 
     reply += ("Gas refills will incur an additional charge of RM50 per unit.\n"
               "The cleaning fee is determined by the aircon's horsepower and the selected vendor. "
@@ -95,24 +83,18 @@ def estimate_aircon_cleaning_price(ac_type, horsepower, cleaning_type="Normal Cl
     Returns:
         str: Detailed price for the requested service.
     """
-    price_df = get_service_price_list("Aircon Cleaning")
+    # Get the rows with the minimum "Horsepower" that fulfills the requirement
+    matching_rows = get_price_index("Aircon Cleaning").ceiling(horsepower, ac_type, cleaning_type)
 
-    filtered_df = price_df.loc[(price_df["Aircon Type"] == ac_type) & (price_df["Cleaning Type"] == cleaning_type) &
-                               (price_df["Horsepower"] >= horsepower)]
-
-    if filtered_df.empty:
+    if not matching_rows:
         return (f"The price list does not include the rate for {horsepower}HP aircon. "
                 "I’ll check with the vendor and update you shortly. Thanks for your patience.")
 
-    # Get the minimum "Horsepower" that fulfills the requirement
-    min_horsepower = filtered_df["Horsepower"].min()
-    filtered_df = filtered_df.loc[filtered_df["Horsepower"] == min_horsepower]
-
     # Get the cleaning price per unit with the minimum horsepower
-    min_cost = filtered_df.loc[filtered_df["Horsepower"] == min_horsepower, "Price per Unit (RM)"]
+    min_cost = matching_rows[0]["Price per Unit (RM)"]
 
     reply = ("Here's the breakdown of the cleaning service provided by our vendors:\n"
-             f"Cleaning Price per Unit for {horsepower}HP Aircon: {min_cost.iloc[0]}\n"
+             f"Cleaning Price per Unit for {horsepower}HP Aircon: {min_cost}\n"
              "Gas refills will incur an additional charge of RM50 per unit.\n")
 
     reply += ("Important Note:\n"
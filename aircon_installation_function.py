@@ -1,16 +1,9 @@
-from service_utils import get_google_creds_and_service
-import os
+from service_utils import append_booking_row
 
 
 def save_aircon_installation_booking_details(number_of_ac_units, ac_details, property_type, preferred_site_visit_date,
                                              preferred_site_visit_time, customer_budget="not mentioned",
                                              additional_request="no request"):
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
     data = [""] * 29
     data[0] = preferred_site_visit_date
@@ -25,11 +18,7 @@ def save_aircon_installation_booking_details(number_of_ac_units, ac_details, pro
         data[6 + (3 * i)] = details.get('ac_type', '')
         data[7 + (3 * i)] = details.get('horsepower', '')
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="ac_installation!A1:V1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": [data]}).execute()
+    append_booking_row("ac_installation!A1:V1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "confirm pricing with vendors and check their availability for the requested service date. "
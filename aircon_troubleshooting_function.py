@@ -1,5 +1,4 @@
-from service_utils import get_google_creds_and_service
-import os
+from service_utils import append_booking_row
 
 
 def save_ac_troubleshooting_booking_details(preferred_service_date, preferred_service_time,
@@ -21,21 +20,11 @@ def save_ac_troubleshooting_booking_details(preferred_service_date, preferred_se
         Returns:
             str: A confirmation message for the customer.
     """
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[preferred_service_date, preferred_service_time, issue_description,
-             ac_type, ac_brand, ac_model, customer_budget, additional_request]]
+    data = [preferred_service_date, preferred_service_time, issue_description,
+            ac_type, ac_brand, ac_model, customer_budget, additional_request]
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="ac_troubleshooting!A1:H1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    append_booking_row("ac_troubleshooting!A1:H1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "confirm pricing with vendors and check their availability for the requested service date. "
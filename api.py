@@ -0,0 +1,211 @@
+import os
+import json
+import asyncio
+import logging
+import threading
+import metrics
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from assistant import OpenAIClient, HOME_SERVICES
+from assistant_instructions import start_daily_refresh
+from openai_transport import get_async_openai_client
+from rate_limiter import BUSY_REPLY
+from service_utils import booking_journal
+from tracing import in_current_context
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Keep the assistants' instruction dates current and deliver bookings left pending by a previous run
+    start_daily_refresh(HOME_SERVICES)
+    booking_journal.start()
+    yield
+
+
+app = FastAPI(title="Home Services Chat API", lifespan=lifespan)
+
+# Session to service lookups kept per worker; other workers resolve sessions from the thread metadata
+SESSION_CACHE_SIZE = int(os.getenv("API_SESSION_CACHE_SIZE", "10000"))
+_session_services = OrderedDict()
+
+# Replies are produced by the synchronous OpenAIClient on this pool; it caps the turns streaming at once
+STREAM_MAX_WORKERS = int(os.getenv("API_STREAM_MAX_WORKERS", "64"))
+# Turns allowed to wait for a free stream worker; turns beyond this are turned away with BUSY_REPLY
+STREAM_MAX_PENDING = int(os.getenv("API_STREAM_MAX_PENDING", "64"))
+stream_executor = ThreadPoolExecutor(max_workers=STREAM_MAX_WORKERS, thread_name_prefix="api-stream")
+_turn_slots = threading.BoundedSemaphore(STREAM_MAX_WORKERS + STREAM_MAX_PENDING)
+
+
+class SessionRequest(BaseModel):
+    service_name: str
+
+
+class SessionResponse(BaseModel):
+    session_id: str
+    service_name: str
+
+
+class MessageRequest(BaseModel):
+    content: str
+
+
+class MessageResponse(BaseModel):
+    reply: str
+
+
+def _check_service(service_name):
+    """
+    Make sure a home service has an assistant configured, or fail the request with 400.
+    """
+    env_key = HOME_SERVICES.get(service_name)
+    if not env_key or not os.getenv(env_key):
+        raise HTTPException(status_code=400, detail=f"Unknown service: {service_name}")
+    return service_name
+
+
+def _remember_session(session_id, service_name):
+    """
+    Cache the service of a session, evicting the least recently used sessions.
+    """
+    _session_services[session_id] = service_name
+    _session_services.move_to_end(session_id)
+    while len(_session_services) > SESSION_CACHE_SIZE:
+        _session_services.popitem(last=False)
+
+
+async def _session_service(session_id):
+    """
+    Return the service of a session, looking up the thread metadata if this worker has not seen it yet.
+    """
+    service_name = _session_services.get(session_id)
+    if service_name:
+        _session_services.move_to_end(session_id)
+        return service_name
+
+    try:
+        thread = await get_async_openai_client().beta.threads.retrieve(thread_id=session_id)
+    except Exception as e:
+        if getattr(e, "status_code", None) == 404:
+            raise HTTPException(status_code=404, detail="Session not found")
+        raise
+
+    service_name = _check_service((thread.metadata or {}).get("service_name"))
+    _remember_session(session_id, service_name)
+    return service_name
+
+
+async def stream_reply(thread_id, service_name, prompt):
+    """
+    Post a message to a thread and yield the assistant's reply as text deltas.
+
+    The turn runs through OpenAIClient.get_response_streaming on the stream worker pool, so API replies get the
+    same moderation, tool calls, tracing and upstream policies as the Streamlit app. When the pool and its
+    pending turns are full the turn is not started and BUSY_REPLY is returned instead. If the caller stops
+    reading, e.g. the client disconnected, the reply is closed at its next delta, which cancels the run.
+    """
+    if not _turn_slots.acquire(blocking=False):
+        metrics.increment("api.turns_rejected")
+        logging.warning("Stream worker pool is full, turning away a turn on thread %s.", thread_id)
+        yield BUSY_REPLY
+        return
+
+    loop = asyncio.get_running_loop()
+    deltas = asyncio.Queue()
+    stopped = threading.Event()
+
+    def hand_over(text):
+        try:
+            loop.call_soon_threadsafe(deltas.put_nowait, text)
+        except RuntimeError:
+            # The event loop has shut down
+            stopped.set()
+
+    def produce():
+        reply = None
+        try:
+            if stopped.is_set():
+                # The client went away while the turn was waiting for a worker
+                return
+            reply = OpenAIClient.for_thread(service_name, thread_id).get_response_streaming(prompt)
+            for text in reply:
+                if stopped.is_set():
+                    break
+                hand_over(text)
+        except Exception as e:
+            logging.error("Failed to stream response: %s", e)
+            hand_over("Error getting response.")
+        finally:
+            try:
+                if reply is not None:
+                    reply.close()
+            finally:
+                _turn_slots.release()
+                hand_over(None)
+
+    loop.run_in_executor(stream_executor, in_current_context(produce))
+    try:
+        while True:
+            text = await deltas.get()
+            if text is None:
+                break
+            yield text
+    finally:
+        stopped.set()
+
+
+@app.get("/healthz")
+async def healthz():
+    return {"status": "ok"}
+
+
+@app.post("/sessions", response_model=SessionResponse)
+async def create_session(request: SessionRequest):
+    """
+    Start a conversation with the assistant of a home service.
+    """
+    service_name = _check_service(request.service_name)
+    thread = await get_async_openai_client().beta.threads.create(metadata={"service_name": service_name})
+    _remember_session(thread.id, service_name)
+    return SessionResponse(session_id=thread.id, service_name=request.service_name)
+
+
+@app.post("/sessions/{session_id}/messages", response_model=MessageResponse)
+async def send_message(session_id: str, request: MessageRequest):
+    """
+    Send a customer message and return the complete reply.
+    """
+    service_name = await _session_service(session_id)
+    parts = [text async for text in stream_reply(session_id, service_name, request.content)]
+    return MessageResponse(reply="".join(parts))
+
+
+@app.post("/sessions/{session_id}/messages/stream")
+async def stream_message(session_id: str, request: MessageRequest):
+    """
+    Send a customer message and stream the reply as server-sent events.
+
+    Each event carries JSON: {"type": "delta", "text": ...} for reply text, then {"type": "done"}.
+    """
+    service_name = await _session_service(session_id)
+
+    async def events():
+        async for text in stream_reply(session_id, service_name, request.content):
+            yield f"data: {json.dumps({'type': 'delta', 'text': text})}\n\n"
+        yield f"data: {json.dumps({'type': 'done'})}\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(
+        "api:app",
+        host=os.getenv("API_HOST", "0.0.0.0"),
+        port=int(os.getenv("API_PORT", "8000")),
+        workers=int(os.getenv("API_WORKERS", "4"))
+    )
@@ -1,8 +1,7 @@
 from service_utils import (
-    get_google_creds_and_service,
-    get_service_price_list
+    append_booking_row,
+    get_price_index
 )
-import os
 
 
 def save_appliance_repair_booking_details(appliance_type, issue_description, appliance_functionality,
@@ -11,22 +10,12 @@ def save_appliance_repair_booking_details(appliance_type, issue_description, app
                                           recent_power_issues="Unknown", customer_budget="Not mentioned",
                                           additional_request="No request"):
 
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[preferred_site_inspection_date, preferred_site_inspection_time, appliance_type,
-             appliance_brand, issue_description, appliance_functionality, warranty_status, recent_power_issues,
-             customer_budget, additional_request]]
+    data = [preferred_site_inspection_date, preferred_site_inspection_time, appliance_type,
+            appliance_brand, issue_description, appliance_functionality, warranty_status, recent_power_issues,
+            customer_budget, additional_request]
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="appliance_repair!A1:J1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    append_booking_row("appliance_repair!A1:J1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "check the vendor’s availability. Let them know you’ll get back to them as soon as possible with a "
@@ -43,10 +32,7 @@ def determine_site_inspection_fees(appliance_type):
     Returns:
         str: A message informing the customer of the inspection charges and outlining the next steps.
     """
-    price_df = get_service_price_list("Appliance Repair")
-    charge = price_df.loc[
-        price_df["Appliance Type"] == appliance_type, "Site Inspection/Troubleshooting Charges"
-    ].iloc[0]
+    charge = get_price_index("Appliance Repair").rows(appliance_type)[0]["Site Inspection/Troubleshooting Charges"]
 
     if appliance_type.lower() in ["washing machine", "clothes dryer", "refrigerator"]:
         message = (f"Recommend a site inspection to the customer to assess the issue, with a charge of RM {charge}. "
@@ -1,13 +1,25 @@
 import os
-import re
 import time
 import json
 import logging
-from datetime import datetime
-import pandas as pd
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from dotenv import load_dotenv
+import metrics
+from assistant_instructions import refresh_assistant_instructions, get_cached_assistant
 from function_mapping import function_mapping
-from openai import OpenAI
+from run_poller import run_poller, RunPollTimeout, TERMINAL_RUN_STATUSES
+from openai_transport import get_openai_client
+from warm_threads import warm_thread_pool
+from thread_lifecycle import thread_registry
+from tool_cache import tool_result_cache
+from booking_journal import idempotency_scope
+from tracing import span, in_current_context
+from rate_limiter import UpstreamBusyError, BUSY_REPLY
+from resilience import call_upstream, guard_upstream, classify_error
+
+# Load the environment once per process
+load_dotenv()
 
 # Configure logging
 logging.basicConfig(
@@ -33,6 +45,99 @@ HOME_SERVICES = {
     "Upholstery Cleaning": "UPHOLSTERY_CLEANING_ASSISTANT_ID"
 }
 
+# Bounded worker pools shared by all sessions for running the tool calls of a required action. Tools that wait
+# on another assistant's run can hold a worker for most of the tool timeout, so they get a pool of their own and
+# cannot starve the quick tools of other conversations.
+TOOL_CALL_TIMEOUT_SECONDS = float(os.getenv("TOOL_CALL_TIMEOUT_SECONDS", "60"))
+# How long a tool call may wait for a free worker before it is reported as busy; its timeout starts once it runs
+TOOL_QUEUE_TIMEOUT_SECONDS = float(os.getenv("TOOL_QUEUE_TIMEOUT_SECONDS", "30"))
+BLOCKING_TOOLS = {"is_service_policy_question"}
+tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("TOOL_MAX_WORKERS", "32")),
+                                   thread_name_prefix="tool-call")
+blocking_tool_executor = ThreadPoolExecutor(max_workers=int(os.getenv("BLOCKING_TOOL_MAX_WORKERS", "32")),
+                                            thread_name_prefix="blocking-tool-call")
+
+# Speculative moderation runs the moderation check concurrently with posting the message and starting the run
+SPECULATIVE_MODERATION = os.getenv("SPECULATIVE_MODERATION", "true").lower() in ("1", "true", "yes")
+moderation_executor = ThreadPoolExecutor(max_workers=int(os.getenv("MODERATION_MAX_WORKERS", "8")),
+                                         thread_name_prefix="moderation")
+
+
+def run_tool_calls(tool_calls, thread_id=None):
+    """
+    Execute the tool calls of one required action and return their outputs.
+
+    The tool calls run concurrently on the shared tool worker pools. Outputs are returned in the order of the
+    tool calls, and failures or timeouts are reported as tool outputs so the run is never left waiting for a
+    missing output. Each call's timeout starts when a worker picks it up; a call still queued after
+    TOOL_QUEUE_TIMEOUT_SECONDS is withdrawn. Bookings saved by a tool call are keyed by the thread and tool call
+    IDs, so running the same tool call again does not save them twice.
+    """
+    queue_deadline = time.monotonic() + TOOL_QUEUE_TIMEOUT_SECONDS
+    calls = []
+    for tool in tool_calls:
+        started = {"event": threading.Event(), "at": None}
+        executor = blocking_tool_executor if tool.function.name in BLOCKING_TOOLS else tool_executor
+        calls.append((tool, started, executor.submit(in_current_context(_start_tool), started, tool, thread_id)))
+
+    tool_outputs = []
+    for tool, started, future in calls:
+        if not started["event"].wait(max(0, queue_deadline - time.monotonic())) and future.cancel():
+            metrics.increment("tools.queue_timeouts", tool_name=tool.function.name)
+            logging.error("Function %s waited %s seconds for a worker.", tool.function.name,
+                          TOOL_QUEUE_TIMEOUT_SECONDS)
+            output = f"Error: {tool.function.name} could not be run right now, the service is busy."
+        else:
+            started["event"].wait()
+            try:
+                output = future.result(timeout=max(0, started["at"] + TOOL_CALL_TIMEOUT_SECONDS - time.monotonic()))
+            except FuturesTimeoutError:
+                logging.error("Function %s timed out after %s seconds.", tool.function.name,
+                              TOOL_CALL_TIMEOUT_SECONDS)
+                output = f"Error: {tool.function.name} did not finish in time."
+        tool_outputs.append({"tool_call_id": tool.id, "output": output})
+    return tool_outputs
+
+
+def _start_tool(started, tool, thread_id=None):
+    """
+    Note when a worker picked up a tool call, then execute it.
+    """
+    started["at"] = time.monotonic()
+    started["event"].set()
+    return _call_tool(tool, thread_id)
+
+
+def _call_tool(tool, thread_id=None):
+    """
+    Execute a single tool call and return its output as a string.
+    """
+    scope_key = f"{thread_id}:{tool.id}" if thread_id else tool.id
+    with span("tool.call", tool_name=tool.function.name) as tool_span, idempotency_scope(scope_key):
+        try:
+            func = function_mapping.get(tool.function.name)
+            if not func:
+                logging.error("Unknown function requested: %s", tool.function.name)
+                return f"Error: {tool.function.name} is not an available function."
+
+            logging.info("Calling function %s with arguments: %s", tool.function.name, tool.function.arguments)
+            arguments = json.loads(tool.function.arguments or "{}")
+            if tool_result_cache.is_cacheable(tool.function.name):
+                return tool_result_cache.get_or_call(tool.function.name, arguments, lambda: str(func(**arguments)))
+            return str(func(**arguments))
+        except Exception as e:
+            logging.error("Failed to execute function %s with arguments %s: %s", tool.function.name,
+                          tool.function.arguments, e)
+            tool_span.error = f"{type(e).__name__}: {e}"
+            return f"Error: {tool.function.name} failed ({e})."
+
+
+def _message_text(message):
+    """
+    Return the text of a thread message, joining its text parts.
+    """
+    return "".join(part.text.value for part in message.content if part.type == "text")
+
 
 class OpenAIClient:
     """
@@ -40,121 +145,131 @@ class OpenAIClient:
     """
 
     def __init__(self, service_name=""):
-        # Initialize the environment and client
-        load_dotenv()
+        self.service_name = service_name
+        # The thread is created here and deleted once the client is garbage collected
+        self.owns_thread = True
 
         # Fetch assistant_id based on service name
-        self.assistant_id = os.getenv(HOME_SERVICES.get(service_name))
+        self.assistant_id = self._get_assistant_id(service_name)
+
+        # Create a thread
+        self.thread_number = self.create_thread()
+        print(self.thread_number)
+
+        # Newest thread message seen so far, the cursor for fetching only new messages
+        self.last_message_id = None
+        # Message holding the latest prompt
+        self.last_prompt_message_id = None
+
+    @classmethod
+    def for_thread(cls, service_name, thread_id):
+        """
+        Return a client for an existing thread whose lifetime is managed elsewhere, e.g. an API session.
+
+        The thread is not registered for cleanup, so it outlives the returned client.
+        """
+        client = cls.__new__(cls)
+        client.service_name = service_name
+        client.owns_thread = False
+        client.assistant_id = cls._get_assistant_id(service_name)
+        client.thread_number = thread_id
+        client.last_message_id = None
+        client.last_prompt_message_id = None
+        return client
+
+    @staticmethod
+    def _get_assistant_id(service_name):
+        """
+        Return the assistant ID configured for a home service.
+        """
+        assistant_id = os.getenv(HOME_SERVICES.get(service_name, ""))
 
         # Handle the case where no valid assistant ID is found
-        if not self.assistant_id:
+        if not assistant_id:
             logging.error("Invalid assistant key for service: %s", service_name)
             raise ValueError("Invalid assistant key.")
+        return assistant_id
 
-        # Initialize the OpenAI client
-        self.client = OpenAI()
-
-        # Create a thread
-        self.thread_number = self.create_thread()
-        print(self.thread_number)
+    @property
+    def client(self):
+        """
+        The OpenAI client shared by all sessions; per-session state is only the thread and assistant IDs.
+        """
+        return get_openai_client()
 
     def create_thread(self):
         """
-        Create a new conversation thread for interacting with OpenAI API.
+        Get a new conversation thread for interacting with OpenAI API.
+
+        Threads come from the warm pool, so they are normally created ahead of time off the user's path.
         """
         try:
-            thread = self.client.beta.threads.create()
+            thread_id = warm_thread_pool.acquire()
+            thread_registry.register(thread_id, owner=self, service_name=self.service_name)
             logging.info("Conversation thread created successfully.")
-            return thread.id
+            return thread_id
         except Exception as e:
             logging.error("Failed to create a conversation thread: %s", e)
             raise
 
+    def switch_service(self, service_name):
+        """
+        Hand the conversation to the assistant of another home service.
+
+        The thread is kept, so the new assistant sees the conversation so far and no thread has to be created;
+        the next run simply uses the new assistant.
+        """
+        if service_name == self.service_name:
+            return
+        self.assistant_id = self._get_assistant_id(service_name)
+        logging.info("Switched thread %s from %s to %s.", self.thread_number, self.service_name, service_name)
+        self.service_name = service_name
+        thread_registry.touch(self.thread_number, service_name)
+
+    def _ensure_thread(self):
+        """
+        Mark the thread as active, starting a new one if it was deleted after being idle for too long.
+        """
+        if self.owns_thread and not thread_registry.touch(self.thread_number, self.service_name):
+            logging.info("Thread %s was deleted while idle, starting a new conversation thread.", self.thread_number)
+            self.thread_number = self.create_thread()
+            self.last_message_id = None
+            self.last_prompt_message_id = None
+
     def create_message(self, message, role="user"):
         """
         Create a message in the OpenAI conversation thread.
         """
         try:
-            self.client.beta.threads.messages.create(
-                thread_id=self.thread_number,
-                role=role,
-                content=message,
-            )
+            with span("openai.messages.create"):
+                thread_message = call_upstream("openai.messages", self._post_message, message, role, admission=True)
             logging.info("Message created successfully in the thread.")
+            self.last_prompt_message_id = thread_message.id
+            return thread_message
         except Exception as e:
             logging.error("Failed to create a message: %s", e)
             raise
 
     def update_assistant_instructions(self, service_name):
         """
-        Update assistant instructions with the current date and earliest available date.
-        """
-        try:
-            assistant = self.get_assistant()
-            today = datetime.now()
-            today_date_str = today.strftime("%d-%b-%Y")
-            today_day_of_week = today.strftime("%A")
+        Make sure the assistant instructions carry today's dates.
 
-            # Extract dates from instructions
-            pattern = r'\b\d{2}-[A-Za-z]{3}-\d{4}\b'
-            matches = re.findall(pattern, assistant.instructions)
-            if len(matches) == 2 and matches[0] != today_date_str:
-                self._update_instructions_dates(assistant, service_name, matches, today_date_str, today_day_of_week)
-        except Exception as e:
-            logging.error("Failed to update assistant instructions: %s", e)
-
-    def _update_instructions_dates(self, assistant, service_name, matches, today_date_str, today_day_of_week):
+        The dates are normally rewritten by the daily refresh job, so this only reaches the API if the
+        assistant has not been refreshed yet today.
         """
-        Helper function to update the assistant's instructions with new dates.
-        """
-        old_date = pd.to_datetime(matches[0], format="%d-%b-%Y")
-        old_date_str = old_date.strftime("%d-%b-%Y")
-        old_day_of_week = old_date.day_name()
-
-        old_earliest_available_date = pd.to_datetime(matches[1], format="%d-%b-%Y")
-        old_earliest_available_date_str = old_earliest_available_date.strftime("%d-%b-%Y")
-        old_earliest_available_day_of_week = old_earliest_available_date.day_name()
-
-        # Calculate the new earliest available date
-        if service_name in ['Home Cleaning', 'Others']:
-            # Exclude weekends
-            working_date_range = pd.date_range(start=pd.Timestamp.now().date(), periods=4, freq='B')
-            if working_date_range[0].date() == pd.Timestamp.now().date():
-                new_earliest_available_date = working_date_range[3]
-            else:
-                new_earliest_available_date = working_date_range[2]
-        else:
-            date_range = pd.date_range(start=pd.Timestamp.now().date(), periods=4, freq='D')
-            # Exclude Sunday
-            working_date_range = [d for d in date_range if d.weekday() != 6]
-            if working_date_range[0].date() == pd.Timestamp.now().date():
-                new_earliest_available_date = working_date_range[2]
-            else:
-                new_earliest_available_date = working_date_range[1]
-
-        new_earliest_available_date_str = new_earliest_available_date.strftime("%d-%b-%Y")
-        new_earliest_available_day_of_week = new_earliest_available_date.day_name()
-
         try:
-            self.client.beta.assistants.update(
-                assistant_id=self.assistant_id,
-                instructions=assistant.instructions.replace(
-                    f"{old_day_of_week}, {old_date_str}",
-                    f"{today_day_of_week}, {today_date_str}"
-                ).replace(
-                    f"{old_earliest_available_date_str} ({old_earliest_available_day_of_week})",
-                    f"{new_earliest_available_date_str} ({new_earliest_available_day_of_week})"
-                )
-            )
-            logging.info("Assistant instructions updated successfully.")
+            refresh_assistant_instructions(self.client, service_name, self.assistant_id)
         except Exception as e:
             logging.error("Failed to update assistant instructions: %s", e)
-            raise
 
     def get_assistant(self):
         """
         Retrieve the assistant object for further interactions.
         """
+        assistant = get_cached_assistant(self.assistant_id)
+        if assistant is not None:
+            return assistant
+
         try:
             return self.client.beta.assistants.retrieve(assistant_id=self.assistant_id)
         except Exception as e:
@@ -165,85 +280,359 @@ class OpenAIClient:
         """
         Get a response from OpenAI API without streaming.
         """
+        with span("chat.turn", service_name=self.service_name, thread_id=self.thread_number, streaming=False):
+            return self._get_response_without_streaming(prompt)
+
+    def _get_response_without_streaming(self, prompt):
+        message = None
         try:
-            max_iterations = 10  # Set your desired maximum iterations
+            self._ensure_thread()
+            max_iterations = 10  # Maximum rounds of tool calls per turn
             iteration = 0
-            chk_response = self.client.moderations.create(input=prompt)
-            output = chk_response.results[0]
+            deadline = time.monotonic() + run_poller.timeout
 
-            if output.flagged:
-                logging.warning("Prompt flagged as harmful content.")
-                return "Harmful content."
+            if SPECULATIVE_MODERATION:
+                # Moderate the prompt while the message is posted and the run starts
+                moderation = moderation_executor.submit(in_current_context(self._is_flagged), prompt)
+                message = self.create_message(prompt)
+                run = self._create_run()
+                if self._resolve_speculative_moderation(moderation, message, run):
+                    return "Harmful content."
+            else:
+                if self._is_flagged(prompt):
+                    logging.warning("Prompt flagged as harmful content.")
+                    return "Harmful content."
 
-            self.create_message(prompt)
-            run = self.client.beta.threads.runs.create_and_poll(
-                thread_id=self.thread_number,
-                assistant_id=self.assistant_id
-            )
+                message = self.create_message(prompt)
+                run = self._create_run()
+
+            run = run_poller.wait(self.client, self.thread_number, run, deadline=deadline)
 
-            while run.status != "completed" and iteration < max_iterations:
-                run = self._handle_run_status(run)
+            while run.status == "requires_action" and iteration < max_iterations:
+                run = self._handle_run_status(run, deadline)
                 iteration += 1
 
-            return self._get_final_message_content(run)
+            if run.status == "requires_action":
+                logging.error("Run %s still requires action after %d rounds of tool calls.", run.id, max_iterations)
+                # Free the thread for the next turn instead of leaving the run waiting until it expires
+                self._cancel_run(run)
+                return "Error getting response."
+
+            if run.status not in ("completed", "incomplete"):
+                logging.error("Run %s did not complete, final status: %s", run.id, run.status)
+                return "Error getting response."
 
+            return self._get_final_message_content(run, message)
+
+        except UpstreamBusyError as e:
+            logging.warning("Turn not admitted: %s", e)
+            if message is not None:
+                # The prompt will not be answered, so it must not stay in the thread for a retry to post again
+                self._delete_message(message)
+            return BUSY_REPLY
+        except RunPollTimeout as e:
+            logging.error("Failed to get response: %s", e)
+            self._cancel_run(e.run)
+            return "Error getting response."
         except Exception as e:
             logging.error("Failed to get response: %s", e)
             return "Error getting response."
 
-    def _handle_run_status(self, run):
+    def get_response_streaming(self, prompt):
         """
-        Handle the run status during interaction with the OpenAI API.
+        Get a response from OpenAI API as a stream of text deltas.
+
+        Tool calls requested mid-run are executed and their outputs submitted on a follow-up stream, so the
+        generator keeps yielding text until the run finishes.
         """
-        if run.status == "requires_action":
-            tool_outputs = self._process_required_actions(run)
-            if tool_outputs:
-                try:
-                    run = self.client.beta.threads.runs.submit_tool_outputs_and_poll(
+        with span("chat.turn", service_name=self.service_name, thread_id=self.thread_number, streaming=True):
+            yield from self._stream_response(prompt)
+
+    def _stream_response(self, prompt):
+        # The run being streamed, cancelled if the reply is abandoned part way, e.g. by a disconnected client
+        active_run = None
+        message = None
+        try:
+            self._ensure_thread()
+            moderation = None
+            if SPECULATIVE_MODERATION:
+                # Moderate the prompt while the message is posted and the run starts
+                moderation = moderation_executor.submit(in_current_context(self._is_flagged), prompt)
+            elif self._is_flagged(prompt):
+                logging.warning("Prompt flagged as harmful content.")
+                yield "Harmful content."
+                return
+
+            message = self.create_message(prompt)
+            has_text = False
+            # The run starts when the stream is entered; new turns are only admitted while there is capacity
+            stream_manager = self.client.beta.threads.runs.stream(
+                thread_id=self.thread_number,
+                assistant_id=self.assistant_id
+            )
+            admission = True
+
+            while stream_manager is not None:
+                required_run = None
+                # Streams are not retried, since part of the reply may already have been shown, but their outcome
+                # is reported to the circuit breaker
+                with guard_upstream("openai.runs", admission=admission):
+                    with span("openai.runs.stream"), stream_manager as stream:
+                        for event in stream:
+                            if event.event in ("thread.run.created", "thread.run.queued"):
+                                active_run = event.data
+                            if event.event == "thread.run.created" and moderation is not None:
+                                # Nothing has been shown yet, so the speculative run can still be discarded
+                                if self._resolve_speculative_moderation(moderation, message, event.data):
+                                    active_run = None
+                                    yield "Harmful content."
+                                    return
+                                moderation = None
+                            elif event.event == "thread.message.created" and has_text:
+                                # Separate the messages of a multi-message reply
+                                yield "\n\n"
+                            elif event.event == "thread.message.delta":
+                                for content in event.data.delta.content or []:
+                                    if content.type == "text" and content.text and content.text.value:
+                                        has_text = True
+                                        yield content.text.value
+                            elif event.event == "thread.message.completed":
+                                self.last_message_id = event.data.id
+                            elif event.event == "thread.run.requires_action":
+                                required_run = event.data
+                            elif event.event in ("thread.run.failed", "thread.run.expired",
+                                                 "thread.run.cancelled", "thread.run.incomplete"):
+                                logging.error("Run ended with status %s: %s", event.data.status,
+                                              event.data.last_error)
+
+                stream_manager = None
+                admission = False
+                if required_run is not None:
+                    tool_outputs = self._process_required_actions(required_run)
+                    # The submission is sent when the returned stream is entered, inside the next stream span
+                    stream_manager = self.client.beta.threads.runs.submit_tool_outputs_stream(
                         thread_id=self.thread_number,
-                        run_id=run.id,
+                        run_id=required_run.id,
                         tool_outputs=tool_outputs
                     )
                     logging.info("Tool outputs submitted successfully.")
-                except Exception as e:
-                    logging.error("Failed to submit tool outputs: %s", e)
-                    raise
-        else:
-            time.sleep(3)
-            run = self.client.beta.threads.runs.retrieve(
+
+            active_run = None
+
+        except GeneratorExit:
+            if active_run is not None:
+                logging.info("Streamed reply abandoned, cancelling run %s.", active_run.id)
+                self._cancel_run(active_run)
+            raise
+        except UpstreamBusyError as e:
+            logging.warning("Turn not admitted: %s", e)
+            if message is not None:
+                # The prompt will not be answered, so it must not stay in the thread for a retry to post again
+                self._delete_message(message)
+            yield BUSY_REPLY
+        except Exception as e:
+            logging.error("Failed to stream response: %s", e)
+            yield "Error getting response."
+
+    def _is_flagged(self, prompt):
+        """
+        Check the prompt with the moderation endpoint.
+        """
+        with span("openai.moderation") as moderation_span:
+            chk_response = call_upstream("openai.moderation", self.client.moderations.create, admission=True,
+                                         input=prompt)
+            moderation_span.set_attribute("flagged", chk_response.results[0].flagged)
+        return chk_response.results[0].flagged
+
+    def _resolve_speculative_moderation(self, moderation, message, run):
+        """
+        Wait for a speculative moderation check and discard the started run if the prompt was flagged.
+
+        Returns:
+            bool: True if the prompt was flagged and the run cancelled.
+        """
+        try:
+            flagged = moderation.result()
+        except Exception:
+            self._cancel_run(run)
+            raise
+
+        if flagged:
+            logging.warning("Prompt flagged as harmful content, cancelling the speculative run.")
+            self._cancel_run(run)
+            self._delete_message(message)
+        return flagged
+
+    def _delete_message(self, message):
+        """
+        Delete a customer message that will not be answered.
+        """
+        try:
+            call_upstream("openai.messages", self.client.beta.threads.messages.delete, message_id=message.id,
+                          thread_id=self.thread_number)
+        except Exception as e:
+            logging.error("Failed to delete message %s: %s", message.id, e)
+
+    def _handle_run_status(self, run, deadline=None):
+        """
+        Submit the outputs of a run that requires action and poll it until it needs attention again.
+        """
+        tool_outputs = self._process_required_actions(run)
+        try:
+            with span("openai.runs.submit_tool_outputs", run_id=run.id):
+                run = call_upstream("openai.runs", self._submit_tool_outputs, run, tool_outputs)
+            logging.info("Tool outputs submitted successfully.")
+        except Exception as e:
+            logging.error("Failed to submit tool outputs: %s", e)
+            raise
+        return run_poller.wait(self.client, self.thread_number, run, deadline=deadline)
+
+    def _submit_tool_outputs(self, run, tool_outputs):
+        """
+        Submit tool outputs, safe to repeat: after a server error or timeout the run is checked, and the outputs
+        are only submitted again if the run is still waiting for them.
+        """
+        try:
+            return self.client.beta.threads.runs.submit_tool_outputs(
+                thread_id=self.thread_number,
+                run_id=run.id,
+                tool_outputs=tool_outputs
+            )
+        except Exception as e:
+            if classify_error(e) in (None, "throttled"):
+                raise
+            current = self.client.beta.threads.runs.retrieve(thread_id=self.thread_number, run_id=run.id)
+            if current.status == "requires_action":
+                raise
+            logging.info("Tool outputs of run %s were accepted before the failure: %s", run.id, e)
+            return current
+
+    def _post_message(self, content, role):
+        """
+        Post a message, safe to repeat: after a server error or timeout the newest message of the thread is
+        checked, and the message is only posted again if it did not arrive.
+        """
+        try:
+            return self.client.beta.threads.messages.create(
                 thread_id=self.thread_number,
-                run_id=run.id
+                role=role,
+                content=content
             )
+        except Exception as e:
+            if classify_error(e) in (None, "throttled"):
+                raise
+            newest = self.client.beta.threads.messages.list(thread_id=self.thread_number, order="desc", limit=1).data
+            if (not newest or newest[0].role != role or newest[0].id == self.last_prompt_message_id
+                    or _message_text(newest[0]) != content):
+                raise
+            logging.info("Message %s was posted before the failure: %s", newest[0].id, e)
+            return newest[0]
+
+    def _create_run(self):
+        """
+        Start a run of the session's assistant on its thread.
+        """
+        with span("openai.runs.create") as run_span:
+            run = call_upstream("openai.runs", self._start_run, admission=True)
+            run_span.set_attribute("run_id", run.id)
         return run
 
+    def _start_run(self):
+        """
+        Start a run, safe to repeat: after a server error or timeout the thread is checked for an active run, and
+        a run is only started again if there is none. A thread has at most one active run, and the turn's message
+        could not have been posted while an earlier run was still active.
+        """
+        try:
+            return self.client.beta.threads.runs.create(
+                thread_id=self.thread_number,
+                assistant_id=self.assistant_id
+            )
+        except Exception as e:
+            if classify_error(e) in (None, "throttled"):
+                raise
+            newest = self.client.beta.threads.runs.list(thread_id=self.thread_number, order="desc", limit=1).data
+            if not newest or newest[0].status in TERMINAL_RUN_STATUSES:
+                raise
+            logging.info("Run %s was started before the failure: %s", newest[0].id, e)
+            return newest[0]
+
+    def _cancel_run(self, run):
+        """
+        Cancel a run that is still active, so the thread can accept new messages.
+        """
+        try:
+            with span("openai.runs.cancel", run_id=run.id):
+                call_upstream("openai.runs", self.client.beta.threads.runs.cancel, thread_id=self.thread_number,
+                              run_id=run.id)
+            logging.info("Run %s cancelled.", run.id)
+        except Exception as e:
+            logging.error("Failed to cancel run %s: %s", run.id, e)
+
     def _process_required_actions(self, run):
         """
         Process required actions based on tools needed during the conversation.
         """
-        tool_outputs = []
-        for tool in run.required_action.submit_tool_outputs.tool_calls:
-            if tool.function.name in function_mapping:
-                func = function_mapping.get(tool.function.name)
-                if func:
-                    try:
-                        tool_response = func(**json.loads(tool.function.arguments))
-                        tool_outputs.append({"tool_call_id": tool.id, "output": tool_response})
-                        logging.info("Calling function %s with arguments: %s", tool.function.name,
-                                     tool.function.arguments)
-                    except Exception as e:
-                        logging.error("Failed to execute function %s: %s", tool.function.name, e, tool.function.arguments)
-        return tool_outputs
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        with span("tools.required_action", run_id=run.id, tool_calls=len(tool_calls)):
+            return run_tool_calls(tool_calls, self.thread_number)
 
-    def _get_final_message_content(self, run):
+    def fetch_new_messages(self, after=None, limit=100):
         """
-        Retrieve the final message content after completing the API interaction.
+        Fetch the thread messages newer than a message, oldest first, and advance the message cursor.
+
+        Args:
+            after (str, optional): The message to start after; defaults to the newest message seen so far.
+            limit (int): Page size; further pages are fetched from the cursor as the result is read.
         """
-        try:
-            messages = list(self.client.beta.threads.messages.list(
+        cursor = after or self.last_message_id
+        with span("openai.messages.list", after=cursor or ""):
+            # Reading the page inside the call retries failures of the follow-up page requests too
+            messages = call_upstream("openai.messages", lambda: list(self.client.beta.threads.messages.list(
                 thread_id=self.thread_number,
-                run_id=run.id
-            ))
-            return messages[0].content[0].text.value
+                order="asc",
+                limit=limit,
+                **({"after": cursor} if cursor else {})
+            )))
+        if messages:
+            self.last_message_id = messages[-1].id
+        return messages
+
+    def fetch_older_messages(self, before_id, limit=20):
+        """
+        Fetch up to ``limit`` messages older than a message, for loading earlier history on demand.
+
+        Returns:
+            tuple: The messages oldest first as dicts with id, role and content, and whether older ones remain.
+        """
+        try:
+            # In newest-first order, the messages after the cursor are the older ones
+            with span("openai.messages.list", before=before_id):
+                page = call_upstream(
+                    "openai.messages",
+                    self.client.beta.threads.messages.list,
+                    thread_id=self.thread_number,
+                    order="desc",
+                    after=before_id,
+                    limit=limit
+                )
+            messages = [{"id": message.id, "role": message.role, "content": _message_text(message)}
+                        for message in reversed(page.data)]
+            return messages, page.has_more
+        except Exception as e:
+            logging.error("Failed to fetch older messages: %s", e)
+            raise
+
+    def _get_final_message_content(self, run, prompt_message):
+        """
+        Retrieve every assistant message of the run, posted after the prompt, as one reply.
+        """
+        try:
+            messages = self.fetch_new_messages(after=prompt_message.id)
+            replies = [_message_text(m) for m in messages if m.role == "assistant" and m.run_id == run.id]
+            if not replies:
+                raise LookupError(f"Run {run.id} has no assistant messages.")
+            return "\n\n".join(replies)
         except Exception as e:
             logging.error("Failed to retrieve final message content: %s", e)
             raise
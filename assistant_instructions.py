@@ -0,0 +1,153 @@
+import os
+import re
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, date, timedelta
+from dotenv import load_dotenv
+from openai_transport import get_openai_client
+from business_calendar import business_calendar
+
+# Services whose earliest available date skips the whole weekend instead of only Sunday
+WEEKDAY_ONLY_SERVICES = ("Home Cleaning", "Others")
+
+# Dates in the instructions are written as DD-MMM-YYYY, e.g. 05-Oct-2024
+DATE_PATTERN = r'\b\d{2}-[A-Za-z]{3}-\d{4}\b'
+
+# Assistants whose instructions are known to carry today's dates: assistant_id -> (date, assistant)
+_assistant_cache = {}
+_cache_lock = threading.Lock()
+_scheduler_lock = threading.Lock()
+_scheduler_thread = None
+
+# Backoff between retries of the assistants whose daily refresh failed, doubling up to the maximum
+REFRESH_RETRY_SECONDS = float(os.getenv("ASSISTANT_REFRESH_RETRY_SECONDS", "30"))
+REFRESH_RETRY_MAX_SECONDS = float(os.getenv("ASSISTANT_REFRESH_RETRY_MAX_SECONDS", "1800"))
+
+
+def earliest_available_date(service_name, today):
+    """
+    Calculate the earliest date a service can be booked from the given day.
+
+    Home Cleaning and Others need 3 working days (Monday to Friday); every other service needs 2 days
+    excluding Sundays. Public holidays are skipped as well.
+    """
+    rule_set = "weekdays" if service_name in WEEKDAY_ONLY_SERVICES else "except_sundays"
+    return business_calendar.earliest_available(rule_set, today)
+
+
+def get_cached_assistant(assistant_id):
+    """
+    Return the assistant if its instructions were refreshed today, otherwise None.
+    """
+    with _cache_lock:
+        cached = _assistant_cache.get(assistant_id)
+    if cached and cached[0] == date.today():
+        return cached[1]
+    return None
+
+
+def refresh_assistant_instructions(client, service_name, assistant_id):
+    """
+    Rewrite the dates in an assistant's instructions for today, at most once per day per assistant.
+
+    Returns:
+        The up-to-date assistant object.
+    """
+    assistant = get_cached_assistant(assistant_id)
+    if assistant is not None:
+        return assistant
+
+    today = date.today()
+    today_date_str = today.strftime("%d-%b-%Y")
+    assistant = client.beta.assistants.retrieve(assistant_id=assistant_id)
+
+    # Extract the current date and the earliest available date from the instructions
+    matches = re.findall(DATE_PATTERN, assistant.instructions or "")
+    if len(matches) == 2 and matches[0] != today_date_str:
+        old_date = datetime.strptime(matches[0], "%d-%b-%Y")
+        old_earliest_available_date = datetime.strptime(matches[1], "%d-%b-%Y")
+        new_earliest_available_date = earliest_available_date(service_name, today)
+
+        assistant = client.beta.assistants.update(
+            assistant_id=assistant_id,
+            instructions=assistant.instructions.replace(
+                f"{old_date.strftime('%A')}, {old_date.strftime('%d-%b-%Y')}",
+                f"{today.strftime('%A')}, {today_date_str}"
+            ).replace(
+                f"{old_earliest_available_date.strftime('%d-%b-%Y')} ({old_earliest_available_date.strftime('%A')})",
+                f"{new_earliest_available_date.strftime('%d-%b-%Y')} ({new_earliest_available_date.strftime('%A')})"
+            )
+        )
+        logging.info("Assistant instructions updated for service: %s", service_name)
+
+    with _cache_lock:
+        _assistant_cache[assistant_id] = (today, assistant)
+    return assistant
+
+
+def refresh_all_assistants(services, client=None):
+    """
+    Refresh the instruction dates of every service assistant in parallel.
+
+    Args:
+        services (dict): Mapping of service name to the environment variable holding its assistant ID.
+        client (OpenAI, optional): The OpenAI client to use; defaults to the shared client.
+
+    Returns:
+        dict: Service name to True if the refresh succeeded, False otherwise.
+    """
+    client = client or get_openai_client()
+    jobs = {name: os.getenv(env_key) for name, env_key in services.items() if os.getenv(env_key)}
+
+    def refresh(service_name):
+        try:
+            refresh_assistant_instructions(client, service_name, jobs[service_name])
+            return True
+        except Exception as e:
+            logging.error("Failed to refresh assistant instructions for %s: %s", service_name, e)
+            return False
+
+    with ThreadPoolExecutor(max_workers=max(1, len(jobs)), thread_name_prefix="assistant-refresh") as executor:
+        results = dict(zip(jobs, executor.map(refresh, jobs)))
+
+    logging.info("Assistant instructions refreshed: %d of %d succeeded.", sum(results.values()), len(results))
+    return results
+
+
+def start_daily_refresh(services):
+    """
+    Refresh all assistants now and again shortly after every midnight, on a background thread.
+
+    Services whose refresh fails are retried with exponential backoff until they succeed or the day ends.
+    Calling this more than once in a process has no further effect.
+    """
+    global _scheduler_thread
+
+    with _scheduler_lock:
+        if _scheduler_thread is not None:
+            return _scheduler_thread
+
+        load_dotenv()
+
+        def run():
+            sleeper = threading.Event()
+            while True:
+                tomorrow = datetime.combine(date.today() + timedelta(days=1), datetime.min.time())
+                pending, delay = services, REFRESH_RETRY_SECONDS
+                while True:
+                    results = refresh_all_assistants(pending)
+                    pending = {name: services[name] for name, succeeded in results.items() if not succeeded}
+                    until_midnight = (tomorrow - datetime.now()).total_seconds()
+                    if not pending or delay >= until_midnight:
+                        break
+                    logging.warning("Retrying the instruction refresh of %s in %.0fs.", ", ".join(pending), delay)
+                    sleeper.wait(delay)
+                    delay = min(delay * 2, REFRESH_RETRY_MAX_SECONDS)
+
+                # Wake a few seconds after midnight so date.today() has rolled over
+                sleeper.wait((tomorrow - datetime.now()).total_seconds() + 5)
+
+        _scheduler_thread = threading.Thread(target=run, name="assistant-instruction-refresh", daemon=True)
+        _scheduler_thread.start()
+        return _scheduler_thread
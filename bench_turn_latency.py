@@ -0,0 +1,172 @@
+"""
+Offline benchmark of chat-turn latency against the local fakes in local_fakes.py.
+
+Each scenario is a scripted dialogue with one home-service assistant. Every turn goes through
+OpenAIClient.get_response_without_streaming, and the fake assistant requires the scripted estimate, validation
+and save_* tool calls, so the real tool functions, price-list cache and booking writer run against the fake
+Sheets. Reports p50/p95/p99 turn latency, OpenAI round trips per turn and Sheets calls per turn. With
+--fault-rate, that share of fake calls fails with HTTP 503 to measure the cost and success of retries.
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+from datetime import date, timedelta
+
+
+# A preferred date safely inside the booking window of every service
+PREFERRED_DATE = (date.today() + timedelta(days=14)).strftime("%d-%b-%Y")
+
+# Scripted dialogues: each turn is (customer prompt, rounds of tool calls the assistant makes for it)
+SCENARIOS = {
+    "Home Cleaning": [
+        ("Hi. I'd like to book a service.", []),
+        ("How much does home cleaning cost?", [[("estimate_rough_price", {})]]),
+        ("It's a 1000 sqft condo, basic cleaning please.",
+         [[("estimate_price_by_size_and_type", {"property_size": 1000, "cleaning_type": "Basic Cleaning"})]]),
+        (f"Can you come on {PREFERRED_DATE} at 10am?",
+         [[("validate_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Yes, please book it.", [[("save_home_cleaning_booking_information", {
+            "property_type": "Condo", "property_size": 1000, "cleaning_type": "Basic Cleaning",
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "10:00 AM"})]]),
+    ],
+    "Aircon Cleaning": [
+        ("Hi, I need my aircon cleaned.", []),
+        ("Two wall mounted units, how much roughly?",
+         [[("estimate_rough_aircon_cleaning_price", {"ac_type": "Wall Mounted"})]]),
+        (f"They are 1.5HP, chemical cleaning on {PREFERRED_DATE} at 2pm.",
+         [[("estimate_aircon_cleaning_price", {"ac_type": "Wall Mounted", "horsepower": 1.5,
+                                               "cleaning_type": "Chemical Cleaning"}),
+           ("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Please go ahead and book.", [[("save_aircon_cleaning_booking_details", {
+            "number_of_ac_units": 2,
+            "ac_details": [{"cleaning_type": "Chemical Cleaning", "ac_type": "Wall Mounted", "horsepower": 1.5}] * 2,
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "2:00 PM"})]]),
+    ],
+    "Pest Control": [
+        ("Hello, I have a pest problem.", []),
+        ("There are termites in the kitchen cabinets.", [[("estimate_price_by_pest_type", {"pest_type": "Termites"})]]),
+        (f"Book me for {PREFERRED_DATE} at 9am.", [
+            [("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})],
+            [("save_pest_control_booking_information", {
+                "pest_type": "Termites", "affected_areas": "Kitchen cabinets", "first_notice": "Last week",
+                "entry_point": "Unknown", "previous_treatments": "None",
+                "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "9:00 AM"})]
+        ]),
+    ],
+}
+
+# Fake calls that set up a session rather than serve a turn
+SESSION_CALLS = ("threads.create", "threads.delete", "assistants.retrieve", "assistants.update")
+
+
+def build_script(scenarios):
+    """Map every scripted prompt to the rounds of tool calls the fake assistant requires for it."""
+    return {prompt: rounds for dialogue in scenarios.values() for prompt, rounds in dialogue}
+
+
+def _count_delta(before, after):
+    """Split the calls made between two counter snapshots into OpenAI round trips and Sheets calls."""
+    delta = {name: after.get(name, 0) - before.get(name, 0) for name in after}
+    sheets = sum(count for name, count in delta.items() if name.startswith("sheets."))
+    openai = sum(count for name, count in delta.items()
+                 if not name.startswith("sheets.") and name not in SESSION_CALLS)
+    return openai, sheets
+
+
+def run_benchmark(sessions, scenarios=SCENARIOS, latency_scale=1.0, faults=None):
+    """
+    Run every scenario ``sessions`` times, one session after another, and collect per-turn samples.
+
+    Returns:
+        dict: Scenario name to a list of (latency_seconds, openai_round_trips, sheets_calls, failed) per turn.
+    """
+    from local_fakes import install_fakes
+    from assistant import OpenAIClient, HOME_SERVICES
+    from service_utils import booking_journal
+
+    fakes = install_fakes(latency_scale=latency_scale, script=build_script(scenarios), faults=faults)
+    for service_name, env_key in HOME_SERVICES.items():
+        os.environ.setdefault(env_key, f"asst_fake_{env_key.lower()}")
+
+    samples = {name: [] for name in scenarios}
+    for _ in range(sessions):
+        for service_name, dialogue in scenarios.items():
+            client = OpenAIClient(service_name)
+            for prompt, _rounds in dialogue:
+                before = fakes.calls.snapshot()
+                start = time.monotonic()
+                reply = client.get_response_without_streaming(prompt)
+                latency = time.monotonic() - start
+                openai_calls, sheets_calls = _count_delta(before, fakes.calls.snapshot())
+                # The fake assistant echoes tool outputs, so failed tools show up in the reply
+                failed = reply in ("Error getting response.", "Harmful content.") or "Error:" in reply
+                samples[service_name].append((latency, openai_calls, sheets_calls, failed))
+
+    booking_journal.flush()
+    return samples
+
+
+def summarize(turns):
+    """Summarize per-turn samples into latency percentiles and per-turn call counts."""
+    from metrics import percentile
+
+    latencies = [latency for latency, _, _, _ in turns]
+    count = len(turns) or 1
+    return {
+        "turns": len(turns),
+        "failures": sum(1 for *_, failed in turns if failed),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "openai_round_trips_per_turn": round(sum(t[1] for t in turns) / count, 2),
+        "sheets_calls_per_turn": round(sum(t[2] for t in turns) / count, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark chat-turn latency against local OpenAI and Sheets fakes.")
+    parser.add_argument("--sessions", type=int, default=5, help="Sessions per scenario.")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Factor applied to every fake latency, e.g. 0.1 for a quick run.")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Only run these scenarios (default: all).")
+    parser.add_argument("--fault-rate", type=float, default=0.0,
+                        help="Share of fake calls failing with HTTP 503, e.g. 0.05.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    # Keep benchmark snapshots, bookings and logs out of the app's own state
+    state_dir = tempfile.mkdtemp(prefix="bench_turn_latency_")
+    os.environ.setdefault("PRICE_SNAPSHOT_DIR", os.path.join(state_dir, "price_snapshots"))
+    os.environ.setdefault("BOOKING_JOURNAL_PATH", os.path.join(state_dir, "booking_journal.db"))
+    logging.disable(logging.WARNING)
+
+    scenarios = {name: SCENARIOS[name] for name in (args.scenario or SCENARIOS)}
+    faults = None
+    if args.fault_rate:
+        from local_fakes import FaultInjector
+
+        faults = FaultInjector({"*": args.fault_rate})
+    samples = run_benchmark(args.sessions, scenarios, latency_scale=args.latency_scale, faults=faults)
+
+    report = {name: summarize(turns) for name, turns in samples.items()}
+    report["all"] = summarize([turn for turns in samples.values() for turn in turns])
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'scenario':<18}{'turns':>7}{'fail':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'openai/turn':>13}{'sheets/turn':>13}")
+        for name, r in report.items():
+            print(f"{name:<18}{r['turns']:>7}{r['failures']:>6}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+                  f"{r['openai_round_trips_per_turn']:>13}{r['sheets_calls_per_turn']:>13}")
+
+    raise SystemExit(1 if report["all"]["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+from concurrent.futures import wait
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import argparse
+import logging
+import sqlite3
+import random
+import json
+import time
+import uuid
+import os
+
+import metrics
+from tracing import span
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS bookings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    dedupe_key TEXT NOT NULL UNIQUE,
+    range_name TEXT NOT NULL,
+    row_json TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    created_at REAL NOT NULL,
+    delivered_at REAL,
+    lease_until REAL
+);
+CREATE INDEX IF NOT EXISTS bookings_due ON bookings (status, next_attempt_at);
+CREATE VIEW IF NOT EXISTS dead_letter_bookings AS
+    SELECT id, range_name, row_json, attempts, last_error, created_at FROM bookings WHERE status = 'dead';
+"""
+
+
+# Idempotency scope of the tool call being run on this thread, see idempotency_scope()
+_idempotency_scope = ContextVar("booking_idempotency_scope", default=None)
+
+
+@contextmanager
+def idempotency_scope(key):
+    """
+    Derive the idempotency keys of the bookings recorded inside the block from ``key``, e.g. the thread and tool
+    call IDs, so running the same tool call again does not record its bookings twice.
+    """
+    token = _idempotency_scope.set({"key": key, "saves": 0})
+    try:
+        yield
+    finally:
+        _idempotency_scope.reset(token)
+
+
+def _next_idempotency_key():
+    """
+    Return the key of the next booking saved in the current idempotency scope, or a unique key outside one.
+    """
+    scope = _idempotency_scope.get()
+    if scope is None:
+        return uuid.uuid4().hex
+    scope["saves"] += 1
+    return f"{scope['key']}#{scope['saves']}"
+
+
+class BookingJournal:
+    """
+    Durable write-behind journal for booking rows.
+
+    record() commits the row to a local SQLite database (WAL mode, synchronous=FULL) and returns, so a booking
+    is safe once a tool confirms it. A background flusher delivers pending rows to Google Sheets through
+    ``deliver``, retrying failures with jittered exponential backoff. Rows that still fail after
+    ``max_attempts`` are moved to the ``dead_letter_bookings`` view. Rows left pending by a previous process are
+    delivered when the flusher starts.
+
+    Several processes can share the journal: each leases the rows it delivers for ``lease_seconds``, and rows
+    whose lease ran out, e.g. after a crash, are picked up again. Delivery is therefore at least once: a crash
+    between a successful append and marking the row delivered sends it again.
+    """
+
+    def __init__(self, path, deliver, flush_interval=0.5, batch_size=50, max_attempts=8, base_backoff=1.0,
+                 max_backoff=300.0, delivery_timeout=60.0, lease_seconds=300.0):
+        self.path = path
+        self._deliver = deliver
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.delivery_timeout = delivery_timeout
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._conn = None
+        self._thread = None
+
+    def _connection(self):
+        """
+        Open the journal database on first use. The caller must hold the lock.
+        """
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.executescript(_SCHEMA)
+            columns = {column[1] for column in conn.execute("PRAGMA table_info(bookings)")}
+            if "lease_until" not in columns:
+                # Journals created before rows were leased
+                try:
+                    conn.execute("ALTER TABLE bookings ADD COLUMN lease_until REAL")
+                except sqlite3.OperationalError:
+                    pass  # Added by another process in the meantime
+            self._conn = conn
+        return self._conn
+
+    def start(self):
+        """
+        Start the background flusher if it is not running, e.g. at startup to deliver rows left pending.
+        """
+        with self._lock:
+            self._connection()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="booking-journal", daemon=True)
+                self._thread.start()
+
+    def record(self, range_name, row, idempotency_key=None):
+        """
+        Durably record a booking row for delivery to its tab.
+
+        Args:
+            idempotency_key (str, optional): Identifies the save, so repeating it records the row once. Defaults
+                to the next key of the current idempotency_scope(); outside one, every call records a row.
+
+        Returns:
+            bool: True if the row was recorded, False if this save was already recorded.
+        """
+        idempotency_key = idempotency_key or _next_idempotency_key()
+        self.start()
+        start = time.monotonic()
+        now = time.time()
+        with span("booking_journal.record", range=range_name), self._lock:
+            cursor = self._connection().execute(
+                "INSERT OR IGNORE INTO bookings (dedupe_key, range_name, row_json, next_attempt_at, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (idempotency_key, range_name, json.dumps(row, default=str), now, now)
+            )
+        metrics.observe("booking_journal.record_seconds", time.monotonic() - start)
+
+        if cursor.rowcount == 0:
+            metrics.increment("booking_journal.duplicates")
+            logging.info("Booking for %s already recorded by save %s.", range_name, idempotency_key)
+            return False
+
+        metrics.increment("booking_journal.recorded")
+        self._wakeup.set()
+        return True
+
+    def flush(self):
+        """
+        Deliver every pending row that is due now, on the calling thread.
+
+        Rows are leased before they are delivered, so concurrent flushes, in this or another process, never
+        deliver the same row. A delivery still running after ``delivery_timeout`` keeps its lease and the row
+        is settled once the delivery finishes.
+
+        Returns:
+            int: The number of rows delivered within the delivery timeout.
+        """
+        due = self._lease_due()
+        if not due:
+            return 0
+
+        futures = [(booking, self._deliver(booking[1], json.loads(booking[2]))) for booking in due]
+        wait([future for _, future in futures], timeout=self.delivery_timeout)
+
+        delivered = 0
+        for booking, future in futures:
+            if future.done():
+                delivered += self._settle(booking, future)
+            else:
+                logging.warning("Booking %d for %s still being delivered after %.0fs.", booking[0], booking[1],
+                                self.delivery_timeout)
+                future.add_done_callback(lambda future, booking=booking: self._settle(booking, future))
+
+        self._update_pending_gauge()
+        return delivered
+
+    def _lease_due(self):
+        """
+        Lease the rows due for delivery, including rows whose lease ran out, counting an attempt for each.
+        """
+        now = time.time()
+        with self._lock:
+            # A single UPDATE ... RETURNING claims the rows atomically across processes (SQLite 3.35+)
+            due = self._connection().execute(
+                "UPDATE bookings SET status = 'inflight', lease_until = ?, attempts = attempts + 1 "
+                "WHERE id IN (SELECT id FROM bookings "
+                "WHERE (status = 'pending' AND next_attempt_at <= ?) OR (status = 'inflight' AND lease_until <= ?) "
+                "ORDER BY id LIMIT ?) "
+                "RETURNING id, range_name, row_json, attempts, created_at",
+                (now + self.lease_seconds, now, now, self.batch_size)
+            ).fetchall()
+        return sorted(due)
+
+    def _settle(self, booking, future):
+        """
+        Record the outcome of a finished delivery.
+
+        Returns:
+            bool: True if the row was delivered.
+        """
+        booking_id, range_name, _, attempts, created_at = booking
+        error = future.exception()
+        if error is not None:
+            self._record_failure(booking_id, range_name, attempts, error)
+            return False
+
+        with self._lock:
+            self._connection().execute(
+                "UPDATE bookings SET status = 'delivered', delivered_at = ?, last_error = NULL, lease_until = NULL "
+                "WHERE id = ?", (time.time(), booking_id)
+            )
+        metrics.increment("booking_journal.delivered")
+        metrics.observe("booking_journal.delivery_lag_seconds", time.time() - created_at)
+        return True
+
+    def _record_failure(self, booking_id, range_name, attempts, error):
+        """
+        Schedule a retry of a failed row, or move it to the dead letters once it ran out of attempts.
+        """
+        error_text = f"{type(error).__name__}: {error}"
+        with self._lock:
+            if attempts >= self.max_attempts:
+                self._connection().execute(
+                    "UPDATE bookings SET status = 'dead', last_error = ?, lease_until = NULL WHERE id = ?",
+                    (error_text, booking_id)
+                )
+                metrics.increment("booking_journal.dead_letters")
+                logging.error("Booking %d for %s moved to dead letters after %d attempt(s): %s", booking_id,
+                              range_name, attempts, error_text)
+                return
+
+            backoff = min(self.max_backoff, self.base_backoff * 2 ** (attempts - 1)) * random.uniform(0.5, 1.0)
+            self._connection().execute(
+                "UPDATE bookings SET status = 'pending', next_attempt_at = ?, last_error = ?, lease_until = NULL "
+                "WHERE id = ?",
+                (time.time() + backoff, error_text, booking_id)
+            )
+        metrics.increment("booking_journal.retries")
+        logging.warning("Booking %d for %s failed (attempt %d), retrying in %.1fs: %s", booking_id, range_name,
+                        attempts, backoff, error_text)
+
+    def _update_pending_gauge(self):
+        with self._lock:
+            pending, = self._connection().execute(
+                "SELECT COUNT(*) FROM bookings WHERE status IN ('pending', 'inflight')"
+            ).fetchone()
+        metrics.set_gauge("booking_journal.pending", pending)
+
+    def _run(self):
+        """
+        Background loop delivering due rows, woken early when a new row is recorded.
+        """
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                while self.flush() == self.batch_size:
+                    pass
+            except Exception as e:
+                logging.error("Booking journal flush crashed: %s", e)
+
+    def dead_letters(self):
+        """
+        Return the rows that could not be delivered, oldest first.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, range_name, row_json, attempts, last_error, created_at FROM dead_letter_bookings "
+                "ORDER BY id"
+            ).fetchall()
+        return [
+            {"id": booking_id, "range_name": range_name, "row": json.loads(row_json), "attempts": attempts,
+             "last_error": last_error, "created_at": created_at}
+            for booking_id, range_name, row_json, attempts, last_error, created_at in rows
+        ]
+
+    def retry_dead_letters(self, ids=None):
+        """
+        Queue dead-letter rows for delivery again, all of them or only the given IDs.
+
+        Returns:
+            int: The number of rows queued.
+        """
+        query = "UPDATE bookings SET status = 'pending', attempts = 0, next_attempt_at = ? WHERE status = 'dead'"
+        params = [time.time()]
+        if ids:
+            query += f" AND id IN ({','.join('?' * len(ids))})"
+            params += list(ids)
+        with self._lock:
+            count = self._connection().execute(query, params).rowcount
+        self._wakeup.set()
+        return count
+
+
+def create_booking_journal(deliver):
+    """
+    Create the booking journal configured from the environment.
+    """
+    return BookingJournal(
+        os.getenv("BOOKING_JOURNAL_PATH", "booking_journal.db"),
+        deliver,
+        flush_interval=float(os.getenv("BOOKING_JOURNAL_FLUSH_INTERVAL_SECONDS", "0.5")),
+        max_attempts=int(os.getenv("BOOKING_JOURNAL_MAX_ATTEMPTS", "8")),
+        max_backoff=float(os.getenv("BOOKING_JOURNAL_MAX_BACKOFF_SECONDS", "300")),
+        lease_seconds=float(os.getenv("BOOKING_JOURNAL_LEASE_SECONDS", "300"))
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and retry bookings that could not be written to Sheets.")
+    parser.add_argument("--retry", nargs="*", type=int, metavar="ID",
+                        help="Queue dead-letter bookings for delivery again (all if no IDs are given) and deliver "
+                             "them now.")
+    args = parser.parse_args()
+
+    # Imported here so listing dead letters does not need Google credentials
+    from service_utils import booking_journal
+
+    if args.retry is None:
+        print(json.dumps(booking_journal.dead_letters(), indent=2, ensure_ascii=False))
+        return
+
+    queued = booking_journal.retry_dead_letters(args.retry)
+    delivered = booking_journal.flush()
+    print(f"{queued} booking(s) queued, {delivered} delivered.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+from concurrent.futures import Future
+import logging
+import threading
+import atexit
+import time
+import os
+
+import metrics
+from tracing import span
+from resilience import call_upstream, error_status
+
+
+def _cell(value):
+    """
+    Convert a Python value into a Sheets CellData for an AppendCellsRequest.
+    """
+    if value is None or value == "":
+        return {}
+    if isinstance(value, bool):
+        return {"userEnteredValue": {"boolValue": value}}
+    if isinstance(value, (int, float)):
+        return {"userEnteredValue": {"numberValue": value}}
+    # Text goes in as a formula value so Sheets parses it like typed input (USER_ENTERED), e.g. dates
+    return {"userEnteredValue": {"formulaValue": str(value)}}
+
+
+class BookingWriter:
+    """
+    Write pipeline that coalesces booking rows for all service tabs into one Sheets request.
+
+    Rows are buffered per tab and flushed together in a single spreadsheets.batchUpdate once the oldest pending
+    row has waited ``flush_interval`` seconds or ``max_batch_rows`` rows are pending. Every submitted row gets a
+    Future that resolves when its row is written. If the batch request is rejected (a 4xx error, so nothing was
+    written), each tab is retried on its own with values.append, so one bad tab does not fail the rows of the
+    others. After a timeout or server error the batch may have been applied, so its rows are failed instead of
+    written again, leaving the retry decision to the caller.
+    """
+
+    def __init__(self, get_service, flush_interval=0.2, max_batch_rows=50):
+        self._get_service = get_service
+        self.flush_interval = flush_interval
+        self.max_batch_rows = max_batch_rows
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._pending_rows = 0
+        self._pending_since = None
+        self._sheet_ids = {}
+        self._sheet_ids_lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, range_name, row):
+        """
+        Queue one row for the tab named in ``range_name`` (e.g. "home_cleaning!A1:G1").
+
+        Returns:
+            Future: Resolves to True once the row is written, or raises the write error.
+        """
+        future = Future()
+        tab = range_name.split("!", 1)[0]
+
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="booking-writer", daemon=True)
+                self._thread.start()
+            if not self._pending:
+                self._pending_since = time.monotonic()
+            self._pending.setdefault(tab, []).append((range_name, row, future))
+            self._pending_rows += 1
+            metrics.set_gauge("booking_writer.pending_rows", self._pending_rows)
+            self._cond.notify()
+
+        return future
+
+    def flush(self):
+        """
+        Write all pending rows now on the calling thread.
+        """
+        with self._cond:
+            batch = self._take_pending()
+        if batch:
+            self._write_batch(batch)
+
+    def _take_pending(self):
+        """
+        Detach the pending rows from the buffer. The caller must hold the condition lock.
+        """
+        batch = self._pending
+        self._pending = {}
+        self._pending_rows = 0
+        self._pending_since = None
+        metrics.set_gauge("booking_writer.pending_rows", 0)
+        return batch
+
+    def _run(self):
+        """
+        Background loop that flushes the buffer per time window or size threshold.
+        """
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+
+                deadline = self._pending_since + self.flush_interval
+                while self._pending and self._pending_rows < self.max_batch_rows:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+                batch = self._take_pending()
+
+            if batch:
+                try:
+                    self._write_batch(batch)
+                except Exception as e:
+                    logging.error("Booking writer flush crashed: %s", e)
+
+    def _write_batch(self, batch):
+        """
+        Write a batch of rows grouped by tab, resolving every row's Future.
+        """
+        start = time.monotonic()
+        row_count = sum(len(items) for items in batch.values())
+        spreadsheet_id = os.getenv("SAMPLE_SPREADSHEET_ID")
+
+        with span("sheets.batch_write", rows=row_count, tabs=len(batch)):
+            try:
+                sheet_ids = self._get_sheet_ids(spreadsheet_id, batch.keys())
+                requests = [
+                    {
+                        "appendCells": {
+                            "sheetId": sheet_ids[tab],
+                            "rows": [{"values": [_cell(value) for value in row]} for _, row, _ in items],
+                            "fields": "userEnteredValue"
+                        }
+                    }
+                    for tab, items in batch.items()
+                ]
+            except Exception as e:
+                # Nothing has been written yet, so every tab can safely be appended on its own
+                metrics.increment("booking_writer.batch_failures")
+                logging.warning("Could not prepare the batched booking write, writing per tab: %s", e)
+                for tab, items in batch.items():
+                    self._append_tab(spreadsheet_id, tab, items)
+                requests = None
+
+            if requests is not None:
+                self._send_batch(spreadsheet_id, batch, requests, row_count)
+
+        metrics.observe("booking_writer.flush_seconds", time.monotonic() - start)
+        metrics.observe("booking_writer.batch_rows", row_count)
+        metrics.observe("booking_writer.batch_tabs", len(batch))
+
+    def _send_batch(self, spreadsheet_id, batch, requests, row_count):
+        """
+        Send the batched appends, falling back to per-tab appends only if the request was rejected outright.
+        """
+        try:
+            # Appends are not idempotent, so only throttled writes are retried here; the journal retries the rest
+            call_upstream("sheets.write", self._get_service().spreadsheets().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={"requests": requests}
+            ).execute, idempotent=False)
+        except Exception as e:
+            metrics.increment("booking_writer.batch_failures")
+            status = error_status(e)
+            if status is not None and 400 <= status < 500:
+                logging.warning("Batched booking write rejected, retrying per tab: %s", e)
+                for tab, items in batch.items():
+                    self._append_tab(spreadsheet_id, tab, items)
+                return
+
+            # The batch may have been applied, so writing the rows again could duplicate them
+            logging.error("Batched booking write of %d row(s) failed with an unknown outcome: %s", row_count, e)
+            for items in batch.values():
+                for _, _, future in items:
+                    future.set_exception(e)
+            return
+
+        for items in batch.values():
+            for _, _, future in items:
+                future.set_result(True)
+        logging.info("Booking rows written: %d row(s) across %d tab(s).", row_count, len(batch))
+
+    def _append_tab(self, spreadsheet_id, tab, items):
+        """
+        Append the rows of a single tab with values.append.
+        """
+        try:
+            call_upstream("sheets.write", self._get_service().spreadsheets().values().append(
+                spreadsheetId=spreadsheet_id,
+                range=items[0][0],
+                valueInputOption="USER_ENTERED",
+                insertDataOption="INSERT_ROWS",
+                body={"values": [row for _, row, _ in items]}
+            ).execute, idempotent=False)
+            for _, _, future in items:
+                future.set_result(True)
+        except Exception as e:
+            metrics.increment("booking_writer.row_failures", len(items), tab=tab)
+            logging.error("Failed to write %d booking row(s) to tab %s: %s", len(items), tab, e)
+            for _, _, future in items:
+                future.set_exception(e)
+
+    def _get_sheet_ids(self, spreadsheet_id, tabs):
+        """
+        Return the numeric sheet IDs of the given tabs, fetching the spreadsheet metadata when one is unknown.
+        """
+        with self._sheet_ids_lock:
+            if any(tab not in self._sheet_ids for tab in tabs):
+                spreadsheet = call_upstream("sheets.read", self._get_service().spreadsheets().get(
+                    spreadsheetId=spreadsheet_id,
+                    fields="sheets.properties(sheetId,title)"
+                ).execute)
+                self._sheet_ids = {
+                    sheet["properties"]["title"]: sheet["properties"]["sheetId"] for sheet in spreadsheet["sheets"]
+                }
+            return self._sheet_ids
+
+
+def create_booking_writer(get_service):
+    """
+    Create a booking writer configured from the environment, flushing pending rows at interpreter exit.
+    """
+    writer = BookingWriter(
+        get_service,
+        flush_interval=float(os.getenv("BOOKING_WRITE_FLUSH_INTERVAL_SECONDS", "0.2")),
+        max_batch_rows=int(os.getenv("BOOKING_WRITE_MAX_BATCH_ROWS", "50"))
+    )
+    atexit.register(writer.flush)
+    return writer
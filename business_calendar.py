@@ -0,0 +1,149 @@
+from collections import namedtuple
+from datetime import datetime, date, timedelta
+import threading
+import logging
+import os
+
+# Dates are exchanged with the assistants as DD-MMM-YYYY, e.g. 05-Oct-2024
+DATE_FORMAT = "%d-%b-%Y"
+
+# Outcomes of checking a preferred date against a rule set, in the order they are checked
+SAME_DAY = "same_day"
+TOO_SOON = "too_soon"
+CLOSED_DAY = "closed_day"
+PUBLIC_HOLIDAY = "public_holiday"
+AVAILABLE = "available"
+
+# lead_days of notice before the earliest bookable date, and weekdays (Monday is 0) the vendors do not normally
+# work. With working_days, the lead days skip closed weekdays and public holidays; otherwise they are calendar days.
+RuleSet = namedtuple("RuleSet", ["lead_days", "closed_weekdays", "working_days"], defaults=(False,))
+
+RULE_SETS = {
+    # Booking windows checked by the date validators
+    "general": RuleSet(2, (6,)),
+    "home_cleaning": RuleSet(3, (5, 6)),
+    "other": RuleSet(3, (6,)),
+    "renovation": RuleSet(7, (6,)),
+    # Earliest available dates written into the assistant instructions
+    "weekdays": RuleSet(3, (5, 6), working_days=True),
+    "except_sundays": RuleSet(2, (6,), working_days=True),
+}
+
+
+def parse_date(value):
+    """Parse a DD-MMM-YYYY date, raising ValueError for anything else."""
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def parse_holidays(spec):
+    """Parse a comma-separated list of DD-MMM-YYYY public holidays."""
+    return frozenset(parse_date(part.strip()) for part in spec.split(",") if part.strip())
+
+
+class CalendarDay:
+    """
+    Everything the validators and the instruction updater need for one day, computed once.
+
+    ``earliest`` holds each rule set's earliest bookable date and ``statuses`` each rule set's check outcome for
+    every date from today to ``horizon_days`` ahead, keyed by its DD-MMM-YYYY string.
+    """
+
+    def __init__(self, today, rule_sets, holidays, horizon_days):
+        self.today = today
+        self.rule_sets = rule_sets
+        self.holidays = holidays
+        self.horizon = today + timedelta(days=horizon_days)
+        self.earliest = {name: self._earliest(rule) for name, rule in rule_sets.items()}
+
+        days = [today + timedelta(days=offset) for offset in range(horizon_days + 1)]
+        self.statuses = {
+            name: {day.strftime(DATE_FORMAT): self._status(name, day) for day in days} for name in rule_sets
+        }
+
+    def _earliest(self, rule):
+        if not rule.working_days:
+            return self.today + timedelta(days=rule.lead_days)
+
+        day, lead_days = self.today, rule.lead_days
+        while lead_days:
+            day += timedelta(days=1)
+            if day.weekday() not in rule.closed_weekdays and day not in self.holidays:
+                lead_days -= 1
+        return day
+
+    def _status(self, rule_set, day):
+        if day == self.today:
+            return SAME_DAY
+        if day < self.earliest[rule_set]:
+            return TOO_SOON
+        if day.weekday() in self.rule_sets[rule_set].closed_weekdays:
+            return CLOSED_DAY
+        if day in self.holidays:
+            return PUBLIC_HOLIDAY
+        return AVAILABLE
+
+    def check(self, rule_set, preferred_date):
+        """
+        Check a DD-MMM-YYYY date against a rule set: a dictionary lookup for dates in the horizon.
+        """
+        status = self.statuses[rule_set].get(preferred_date)
+        if status is not None:
+            return status
+
+        # Past dates, dates beyond the horizon and unusual spellings such as 5-oct-2024
+        day = parse_date(preferred_date)
+        if self.today <= day <= self.horizon:
+            return self.statuses[rule_set][day.strftime(DATE_FORMAT)]
+        return self._status(rule_set, day)
+
+
+class BusinessCalendar:
+    """
+    Business-day calendar shared by the date validators and the assistant instruction updater.
+
+    The tables for a day are built on first use and rebuilt on the first use after midnight.
+    """
+
+    def __init__(self, rule_sets=RULE_SETS, holidays=frozenset(), horizon_days=400):
+        self.rule_sets = rule_sets
+        self.holidays = holidays
+        self.horizon_days = horizon_days
+        self._lock = threading.Lock()
+        self._day = None
+
+    def day(self, today=None):
+        """
+        Return the calendar of a day, by default today's.
+        """
+        today = today or date.today()
+        current = self._day
+        if current is not None and current.today == today:
+            return current
+
+        calendar_day = CalendarDay(today, self.rule_sets, self.holidays, self.horizon_days)
+        if today == date.today():
+            with self._lock:
+                if self._day is None or self._day.today != today:
+                    self._day = calendar_day
+                    logging.info("Business calendar built for %s.", today.strftime(DATE_FORMAT))
+        return calendar_day
+
+    def check(self, rule_set, preferred_date):
+        """
+        Check a customer's preferred DD-MMM-YYYY date against a rule set as of today.
+
+        Returns:
+            str: SAME_DAY, TOO_SOON, CLOSED_DAY, PUBLIC_HOLIDAY or AVAILABLE.
+
+        Raises:
+            ValueError: If the date is not in DD-MMM-YYYY format.
+        """
+        return self.day().check(rule_set, preferred_date)
+
+    def earliest_available(self, rule_set, today=None):
+        """Return the earliest date a rule set allows booking from a day, by default today."""
+        return self.day(today).earliest[rule_set]
+
+
+# Calendar shared by every validator and the instruction updater; PUBLIC_HOLIDAYS lists DD-MMM-YYYY dates
+business_calendar = BusinessCalendar(holidays=parse_holidays(os.getenv("PUBLIC_HOLIDAYS", "")))
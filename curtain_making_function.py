@@ -1,8 +1,7 @@
 from service_utils import (
-    get_google_creds_and_service,
+    append_booking_row,
     get_service_price_list
 )
-import os
 from datetime import datetime, timedelta
 
 
@@ -10,21 +9,11 @@ def save_curtain_making_booking_information(curtain_type, window_dimensions, pre
                                             preferred_site_visit_time, material_type="not mentioned",
                                             additional_features="not mentioned", customer_budget="not mentioned"):
 
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[preferred_site_visit_date, preferred_site_visit_time, curtain_type, material_type,
-             additional_features, window_dimensions, customer_budget]]
+    data = [preferred_site_visit_date, preferred_site_visit_time, curtain_type, material_type,
+            additional_features, window_dimensions, customer_budget]
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="curtain_making!A1:G1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    append_booking_row("curtain_making!A1:G1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "check the vendor’s availability. Let them know you’ll get back to them as soon as possible with a "
@@ -1,8 +1,7 @@
 from service_utils import (
-    get_google_creds_and_service,
+    append_booking_row,
     get_service_price_list
 )
-import os
 
 
 def save_electrical_booking_information(service_address, preferred_service_date, preferred_service_time, service_type,
@@ -25,21 +24,11 @@ def save_electrical_booking_information(service_address, preferred_service_date,
         Returns:
             str: A confirmation message indicating that the details have been saved and the vendor availability will be checked.
     """
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[preferred_service_date, preferred_service_time, service_type, issue_description,
-             appliance_or_fixture, property_type, customer_budget, additional_request]]
+    data = [preferred_service_date, preferred_service_time, service_type, issue_description,
+            appliance_or_fixture, property_type, customer_budget, additional_request]
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="electrician!A1:H1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    append_booking_row("electrician!A1:H1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "confirm the vendor's availability and service price. Assure them you’ll follow up as soon as possible "
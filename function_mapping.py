@@ -1,110 +1,95 @@
 # function_mapping.py
 
-from aircon_cleaning_function import (
-    save_aircon_cleaning_booking_details,
-    estimate_aircon_cleaning_price,
-    estimate_rough_aircon_cleaning_price,
-    is_horsepower_unidentified
-)
-from aircon_installation_function import (
-    save_aircon_installation_booking_details,
-    estimate_aircon_installation_price
-)
-from aircon_troubleshooting_function import (
-    save_ac_troubleshooting_booking_details
-)
-from appliance_repair_function import (
-    save_appliance_repair_booking_details,
-    determine_site_inspection_fees
-)
-from curtain_making_function import (
-    save_curtain_making_booking_information,
-    is_curtain_type_selected
-)
-from electrical_function import (
-    save_electrical_booking_information,
-    check_electrical_issue_description_complete,
-    estimate_price_by_electrical_service_type
-)
-from home_cleaning_function import (
-    save_home_cleaning_booking_information,
-    estimate_rough_price,
-    estimate_price_by_size_and_type,
-    validate_service_date
-)
-from laundry_function import (
-    save_laundry_booking_information,
-    estimate_price_by_clothing_type
-)
-from locksmith_function import (
-    save_locksmith_booking_details,
-    check_service_description_complete,
-    check_urgent_locksmith_service_request
-)
-from other_function import (
-    save_other_service_booking_information,
-    validate_other_service_date
-)
-from pest_control_function import (
-    save_pest_control_booking_information,
-    estimate_price_by_pest_type
-)
-from plumbing_function import (
-    save_plumbing_booking_information
-)
-from renovation_function import (
-    save_renovation_booking_information,
-    validate_renovation_service_date
-)
-from upholstery_cleaning_function import (
-    save_upholstery_cleaning_booking_information,
-    check_upholstery_description_complete
-)
-from service_utils import (
-    check_customer_disagreement_with_price,
-    check_urgent_service_request,
-    check_issue_description_complete,
-    is_service_policy_question,
-    validate_general_service_date
-)
+from collections.abc import Mapping
+import importlib
+
+# Module that defines each tool function. Modules are imported on first use, so importing this mapping does not
+# pull in every service module and their Google and OpenAI dependencies.
+function_modules = {
+    "save_home_cleaning_booking_information": "home_cleaning_function",
+    "estimate_rough_price": "home_cleaning_function",
+    "estimate_price_by_size_and_type": "home_cleaning_function",
+    "validate_general_service_date": "service_utils",
+    "check_urgent_service_request": "service_utils",
+    "check_customer_disagreement_with_price": "service_utils",
+    "save_plumbing_booking_information": "plumbing_function",
+    "check_issue_description_complete": "service_utils",
+    "save_electrical_booking_information": "electrical_function",
+    "check_electrical_issue_description_complete": "electrical_function",
+    "estimate_price_by_electrical_service_type": "electrical_function",
+    "save_aircon_cleaning_booking_details": "aircon_cleaning_function",
+    "estimate_aircon_cleaning_price": "aircon_cleaning_function",
+    "estimate_rough_aircon_cleaning_price": "aircon_cleaning_function",
+    "is_horsepower_unidentified": "aircon_cleaning_function",
+    "save_ac_troubleshooting_booking_details": "aircon_troubleshooting_function",
+    "save_aircon_installation_booking_details": "aircon_installation_function",
+    "estimate_aircon_installation_price": "aircon_installation_function",
+    "save_appliance_repair_booking_details": "appliance_repair_function",
+    "determine_site_inspection_fees": "appliance_repair_function",
+    "save_locksmith_booking_details": "locksmith_function",
+    "check_service_description_complete": "locksmith_function",
+    "check_urgent_locksmith_service_request": "locksmith_function",
+    "save_pest_control_booking_information": "pest_control_function",
+    "estimate_price_by_pest_type": "pest_control_function",
+    "save_laundry_booking_information": "laundry_function",
+    "estimate_price_by_clothing_type": "laundry_function",
+    "save_other_service_booking_information": "other_function",
+    "validate_other_service_date": "other_function",
+    "save_curtain_making_booking_information": "curtain_making_function",
+    "is_curtain_type_selected": "curtain_making_function",
+    "save_renovation_booking_information": "renovation_function",
+    "validate_renovation_service_date": "renovation_function",
+    "save_upholstery_cleaning_booking_information": "upholstery_cleaning_function",
+    "check_upholstery_description_complete": "upholstery_cleaning_function",
+    "validate_service_date": "home_cleaning_function",
+    "is_service_policy_question": "service_utils"
+}
+
+# Tools whose output depends only on their arguments, the date and (if set) the named price-list sheet. Their
+# outputs are reused across turns and sessions by tool_cache.ToolResultCache; tools that write bookings or
+# call other services must not be listed here.
+cacheable_tools = {
+    "validate_general_service_date": None,
+    "validate_service_date": None,
+    "validate_other_service_date": None,
+    "validate_renovation_service_date": None,
+    "estimate_aircon_installation_price": None,
+    "estimate_price_by_electrical_service_type": None,
+    "estimate_rough_price": "Home Cleaning",
+    "estimate_price_by_size_and_type": "Home Cleaning",
+    "estimate_aircon_cleaning_price": "Aircon Cleaning",
+    "estimate_rough_aircon_cleaning_price": "Aircon Cleaning",
+    "determine_site_inspection_fees": "Appliance Repair",
+    "estimate_price_by_pest_type": "Pest Control",
+    "estimate_price_by_clothing_type": "Laundry"
+}
+
+
+class LazyFunctionMapping(Mapping):
+    """
+    Read-only mapping of tool names to functions that imports each service module on first lookup.
+    """
+
+    def __init__(self, modules):
+        self._modules = modules
+        self._functions = {}
+
+    def __getitem__(self, name):
+        func = self._functions.get(name)
+        if func is None:
+            module = importlib.import_module(self._modules[name])
+            func = self._functions[name] = getattr(module, name)
+        return func
+
+    def __iter__(self):
+        return iter(self._modules)
+
+    def __len__(self):
+        return len(self._modules)
+
+    def __contains__(self, name):
+        return name in self._modules
+
 
 # Define the function mappings
-function_mapping = {
-    "save_home_cleaning_booking_information": save_home_cleaning_booking_information,
-    "estimate_rough_price": estimate_rough_price,
-    "estimate_price_by_size_and_type": estimate_price_by_size_and_type,
-    "validate_general_service_date": validate_general_service_date,
-    "check_urgent_service_request": check_urgent_service_request,
-    "check_customer_disagreement_with_price": check_customer_disagreement_with_price,
-    "save_plumbing_booking_information": save_plumbing_booking_information,
-    "check_issue_description_complete": check_issue_description_complete,
-    "save_electrical_booking_information": save_electrical_booking_information,
-    "check_electrical_issue_description_complete": check_electrical_issue_description_complete,
-    "estimate_price_by_electrical_service_type": estimate_price_by_electrical_service_type,
-    "save_aircon_cleaning_booking_details": save_aircon_cleaning_booking_details,
-    "estimate_aircon_cleaning_price": estimate_aircon_cleaning_price,
-    "estimate_rough_aircon_cleaning_price": estimate_rough_aircon_cleaning_price,
-    "is_horsepower_unidentified": is_horsepower_unidentified,
-    "save_ac_troubleshooting_booking_details": save_ac_troubleshooting_booking_details,
-    "save_aircon_installation_booking_details": save_aircon_installation_booking_details,
-    "estimate_aircon_installation_price": estimate_aircon_installation_price,
-    "save_appliance_repair_booking_details": save_appliance_repair_booking_details,
-    "determine_site_inspection_fees": determine_site_inspection_fees,
-    "save_locksmith_booking_details": save_locksmith_booking_details,
-    "check_service_description_complete": check_service_description_complete,
-    "check_urgent_locksmith_service_request": check_urgent_locksmith_service_request,
-    "save_pest_control_booking_information": save_pest_control_booking_information,
-    "estimate_price_by_pest_type": estimate_price_by_pest_type,
-    "save_laundry_booking_information": save_laundry_booking_information,
-    "estimate_price_by_clothing_type": estimate_price_by_clothing_type,
-    "save_other_service_booking_information": save_other_service_booking_information,
-    "validate_other_service_date": validate_other_service_date,
-    "save_curtain_making_booking_information": save_curtain_making_booking_information,
-    "is_curtain_type_selected": is_curtain_type_selected,
-    "save_renovation_booking_information": save_renovation_booking_information,
-    "validate_renovation_service_date": validate_renovation_service_date,
-    "save_upholstery_cleaning_booking_information": save_upholstery_cleaning_booking_information,
-    "check_upholstery_description_complete": check_upholstery_description_complete,
-    "validate_service_date": validate_service_date,
-    "is_service_policy_question": is_service_policy_question
-}
\ No newline at end of file
+function_mapping = LazyFunctionMapping(function_modules)
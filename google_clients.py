@@ -0,0 +1,148 @@
+from datetime import datetime, timedelta, timezone
+import logging
+import threading
+import json
+import os
+
+GOOGLE_SHEET_SCOPES = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive",
+    "https://www.googleapis.com/auth/spreadsheets"
+]
+
+
+class GoogleClientProvider:
+    """
+    Long-lived provider of Google credentials and API clients.
+
+    Credentials are built once and their access token is refreshed shortly before it expires, so callers never
+    pay for authentication on the request path. The gspread client and the discovery-based clients (e.g. Sheets
+    v4) are built once and shared; each thread sends its requests over its own authorized HTTP object, because
+    httplib2 is not thread-safe.
+    """
+
+    def __init__(self, refresh_margin=300):
+        self.refresh_margin = timedelta(seconds=refresh_margin)
+        self._lock = threading.RLock()
+        self._creds = None
+        self._gspread_client = None
+        self._services = {}
+        self._local = threading.local()
+        self._overridden = False
+
+    def get_credentials(self):
+        """
+        Return the service-account credentials, refreshing the token if it is about to expire.
+        """
+        # Google libraries are imported on first use to keep module import cheap
+        from google.auth.transport.requests import Request
+        from google.oauth2.service_account import Credentials
+        import streamlit as st
+
+        with self._lock:
+            if self._creds is None:
+                google_sheet_key_dict = json.loads(st.secrets["TEXTKEY"])
+                self._creds = Credentials.from_service_account_info(google_sheet_key_dict,
+                                                                    scopes=GOOGLE_SHEET_SCOPES)
+                logging.info("Google service-account credentials created.")
+
+            if self._needs_refresh():
+                self._creds.refresh(Request())
+                logging.info("Google access token refreshed, valid until %s.", self._creds.expiry)
+
+            return self._creds
+
+    def get_gspread_client(self):
+        """
+        Return the shared gspread client.
+        """
+        if self._overridden:
+            return self._gspread_client
+
+        import gspread
+
+        creds = self.get_credentials()
+        with self._lock:
+            if self._gspread_client is None:
+                self._gspread_client = gspread.authorize(creds)
+            return self._gspread_client
+
+    def get_service(self, service_name, version):
+        """
+        Return the shared discovery-based API client (e.g. 'sheets', 'v4').
+        """
+        if self._overridden:
+            return self._services[(service_name, version)]
+
+        from googleapiclient.discovery import build
+
+        self.get_credentials()
+        with self._lock:
+            service = self._services.get((service_name, version))
+            if service is None:
+                service = build(service_name, version, http=self._thread_http(),
+                                requestBuilder=self._build_request, cache_discovery=False)
+                self._services[(service_name, version)] = service
+                logging.info("Google %s %s client built.", service_name, version)
+            return service
+
+    def reset(self):
+        """
+        Discard the credentials and clients, e.g. after the service-account key is rotated.
+        """
+        with self._lock:
+            self._creds = None
+            self._gspread_client = None
+            self._services = {}
+            self._local = threading.local()
+            self._overridden = False
+
+    def use_clients(self, gspread_client=None, services=None):
+        """
+        Serve the given clients instead of building Google ones, e.g. local fakes for benchmarks.
+
+        Args:
+            gspread_client: Returned by get_gspread_client.
+            services (dict): Maps (service_name, version) to the client returned by get_service.
+        """
+        with self._lock:
+            self._gspread_client = gspread_client
+            self._services = dict(services or {})
+            self._overridden = True
+
+    def _build_request(self, http, *args, **kwargs):
+        """
+        Build API requests on the calling thread's HTTP object instead of the one shared by the client.
+        """
+        from googleapiclient.http import HttpRequest
+
+        self.get_credentials()
+        return HttpRequest(self._thread_http(), *args, **kwargs)
+
+    def _thread_http(self):
+        """
+        Return the authorized HTTP object of the calling thread.
+        """
+        import google_auth_httplib2
+        import httplib2
+
+        http = getattr(self._local, "http", None)
+        if http is None or http.credentials is not self._creds:
+            http = self._local.http = google_auth_httplib2.AuthorizedHttp(self._creds, http=httplib2.Http())
+        return http
+
+    def _needs_refresh(self):
+        """
+        Check whether the access token is missing or expires within the refresh margin.
+        """
+        if not self._creds.token or self._creds.expiry is None:
+            return True
+        # google-auth stores the expiry as a naive UTC datetime
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        return self._creds.expiry - now < self.refresh_margin
+
+
+# Process-wide provider shared by all sessions
+google_client_provider = GoogleClientProvider(
+    refresh_margin=float(os.getenv("GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+)
@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+# Import-time budget per module in milliseconds; exceeding one fails the check
+DEFAULT_BUDGETS_MS = {
+    "function_mapping": 30,
+    "service_utils": 100,
+    "assistant": 150,
+}
+
+# Dependencies that must only be imported on first use, never when the app modules are imported
+HEAVY_MODULES = ("pandas", "googleapiclient", "gspread", "gspread_dataframe", "streamlit", "openai", "pyarrow",
+                 "httpx")
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_importtime(stderr):
+    """
+    Parse ``python -X importtime`` output into (self_us, cumulative_us, depth, package) tuples.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|", 2)
+        name = package[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries.append((int(self_us), int(cumulative_us), depth, name.strip()))
+    return entries
+
+
+def measure_import(module, python=sys.executable):
+    """
+    Import a module in a fresh interpreter and measure it.
+
+    Returns:
+        dict: Total import time in milliseconds, the parsed importtime entries and the heavy modules it loaded.
+    """
+    code = (f"import sys, json; import {module}; "
+            f"print(json.dumps(sorted(m for m in {list(HEAVY_MODULES)!r} if m in sys.modules)))")
+    result = subprocess.run([python, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                            cwd=REPO_DIR)
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = parse_importtime(result.stderr)
+    total_us = next((cumulative for _, cumulative, depth, name in entries if depth == 0 and name == module), 0)
+    return {
+        "total_ms": total_us / 1000,
+        "entries": entries,
+        "heavy_modules": json.loads(result.stdout.strip().splitlines()[-1])
+    }
+
+
+def build_report(budgets, repeat=3, top=10):
+    """
+    Measure every module in the budget, keeping the fastest of ``repeat`` runs to reduce noise.
+    """
+    report = {}
+    for module, budget_ms in budgets.items():
+        best = min((measure_import(module) for _ in range(repeat)), key=lambda m: m["total_ms"])
+        slowest = sorted(best["entries"], key=lambda e: e[0], reverse=True)[:top]
+        report[module] = {
+            "total_ms": round(best["total_ms"], 1),
+            "budget_ms": budget_ms,
+            "within_budget": best["total_ms"] <= budget_ms,
+            "heavy_modules": best["heavy_modules"],
+            "slowest_imports": [{"package": name, "self_ms": round(self_us / 1000, 1),
+                                 "cumulative_ms": round(cumulative_us / 1000, 1)}
+                                for self_us, cumulative_us, _, name in slowest]
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of the app modules against a budget.")
+    parser.add_argument("--budget", action="append", default=[], metavar="MODULE=MS",
+                        help="Override or add a module budget in milliseconds, e.g. assistant=200.")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the fastest one is reported.")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to list per module.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    budgets = dict(DEFAULT_BUDGETS_MS)
+    for item in args.budget:
+        module, budget_ms = item.split("=", 1)
+        budgets[module] = float(budget_ms)
+
+    report = build_report(budgets, repeat=args.repeat, top=args.top)
+    failed = any(not r["within_budget"] or r["heavy_modules"] for r in report.values())
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for module, r in report.items():
+            status = "OK" if r["within_budget"] and not r["heavy_modules"] else "FAIL"
+            print(f"{module}: {r['total_ms']} ms (budget {r['budget_ms']} ms) {status}")
+            if r["heavy_modules"]:
+                print(f"  eagerly imported heavy modules: {', '.join(r['heavy_modules'])}")
+            for item in r["slowest_imports"]:
+                print(f"  {item['self_ms']:>8} ms self {item['cumulative_ms']:>8} ms cumulative  {item['package']}")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,12 @@
 from service_utils import (
-    get_google_creds_and_service,
-    get_service_price_list
+    append_booking_row,
+    get_price_index
 )
-import os
 
 
 def save_laundry_booking_information(laundry_items, preferred_service_date, preferred_service_time,
                                      customer_budget="not mentioned", additional_request="no request"):
 
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
     data = [""] * 29
     data[0] = preferred_service_date
@@ -27,11 +20,7 @@ def save_laundry_booking_information(laundry_items, preferred_service_date, pref
         data[5 + (3 * i)] = details.get('clothing_type', '')
         data[6 + (3 * i)] = details.get('special_fabrics', '')
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="laundry!A1:S1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": [data]}).execute()
+    append_booking_row("laundry!A1:S1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "check the vendor’s availability. Let them know you’ll get back to them as soon as possible with a "
@@ -43,13 +32,12 @@ def estimate_price_by_clothing_type(clothing_type):
         return ("Since the price list does not include a rate for the clothing type the customer mentioned, "
                 "inform them that you will check with the vendor and provide an update shortly.")
     else:
-        price_df = get_service_price_list("Laundry")
-        price = price_df.loc[price_df["Clothing Type"] == clothing_type, ["Service Type", "Price"]]
+        price = get_price_index("Laundry").rows(clothing_type)
         reply = f"Here are the available laundry service options for '{clothing_type}' for customers to choose from:\n"
-        for index, row in price.iterrows():
+        for row in price:
             service_type = row["Service Type"]
             service_price = row["Price"]
-            reply += f"{index + 1}. {service_type}: {service_price}\n"
+            reply += f"{row.index + 1}. {service_type}: {service_price}\n"
 
         reply += ("Important Note:\n"
                   "- The ironing service will cost RM3 per piece and will typically take 2-3 days.\n"
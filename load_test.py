@@ -0,0 +1,347 @@
+"""
+Offline load test: many simultaneous booking conversations against the local fakes in local_fakes.py.
+
+Each step of the ramp runs the given number of simulated customers at once for a fixed time. Every customer
+works through the services of HOME_SERVICES in turn, running a scripted multi-turn dialogue per service through
+OpenAIClient.get_response_without_streaming, with the real tools, caches, rate limiter, retries and booking
+journal behind it. Each conversation books its own date and adds its own special request, so no two
+customers save the same booking. Reports throughput, turn latency percentiles, error and busy rates, and upstream calls per
+turn for each concurrency step, so the point where latency collapses can be read off the table.
+"""
+
+import os
+import json
+import time
+import logging
+import argparse
+import tempfile
+from datetime import date, timedelta
+from concurrent.futures import ThreadPoolExecutor
+
+from bench_turn_latency import SCENARIOS, PREFERRED_DATE, build_script, _count_delta
+
+# Dialogues for the services the turn-latency benchmark does not cover
+DIALOGUES = dict(SCENARIOS, **{
+    "Aircon Installation": [
+        ("Hi, I want to install a new aircon.", []),
+        ("How much is installation for one 1HP wall mounted unit?", [[("estimate_aircon_installation_price", {})]]),
+        (f"It's for my condo, can you come on {PREFERRED_DATE} at 11am?",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Yes, please book the site visit.", [[("save_aircon_installation_booking_details", {
+            "number_of_ac_units": 1, "ac_details": [{"ac_type": "Wall Mounted", "horsepower": 1.0}],
+            "property_type": "Condo", "preferred_site_visit_date": PREFERRED_DATE,
+            "preferred_site_visit_time": "11:00 AM"})]]),
+    ],
+    "Aircon Troubleshooting": [
+        ("Hi, my aircon is leaking water.", [[("check_issue_description_complete", {})]]),
+        (f"It's a Daikin wall mounted unit. Could someone come on {PREFERRED_DATE} at 3pm?",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Please book the troubleshooting visit.", [[("save_ac_troubleshooting_booking_details", {
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "3:00 PM",
+            "issue_description": "Leaking water", "ac_type": "Wall Mounted", "ac_brand": "Daikin"})]]),
+    ],
+    "Appliance Repair": [
+        ("Hi, my washing machine stopped spinning.",
+         [[("determine_site_inspection_fees", {"appliance_type": "Washing Machine"})]]),
+        (f"That's fine, inspection on {PREFERRED_DATE} at 10am please.",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Go ahead and book it.", [[("save_appliance_repair_booking_details", {
+            "appliance_type": "Washing Machine", "issue_description": "Drum does not spin",
+            "appliance_functionality": "Powers on but does not spin", "preferred_site_inspection_date": PREFERRED_DATE,
+            "preferred_site_inspection_time": "10:00 AM"})]]),
+    ],
+    "Curtain Making": [
+        ("Hi, I'd like new day curtains for my living room.", [[("is_curtain_type_selected", {})]]),
+        (f"The window is 2m by 1.5m. Site visit on {PREFERRED_DATE} at 4pm?",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Please book the site visit.", [[("save_curtain_making_booking_information", {
+            "curtain_type": "Day Curtain", "window_dimensions": "2m x 1.5m",
+            "preferred_site_visit_date": PREFERRED_DATE, "preferred_site_visit_time": "4:00 PM"})]]),
+    ],
+    "Electrician & Wiring": [
+        ("Hi, I need some bulbs replaced.",
+         [[("estimate_price_by_electrical_service_type", {"service_type": "Bulbs Replacement"})]]),
+        ("Four bulbs in the kitchen, here is a photo.", [[("check_electrical_issue_description_complete", {})]]),
+        (f"Book it for {PREFERRED_DATE} at 9am at 12 Jalan Example.", [
+            [("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})],
+            [("save_electrical_booking_information", {
+                "service_address": "12 Jalan Example", "preferred_service_date": PREFERRED_DATE,
+                "preferred_service_time": "9:00 AM", "service_type": "Bulbs Replacement",
+                "issue_description": "Four bulbs blown", "appliance_or_fixture": "Ceiling lights",
+                "property_type": "Condo"})]
+        ]),
+    ],
+    "Laundry": [
+        ("Hi, how much is laundry for normal clothes?",
+         [[("estimate_price_by_clothing_type", {"clothing_type": "Normal Clothes"})]]),
+        (f"Wash and fold, pick up on {PREFERRED_DATE} at 8am please.", [[("save_laundry_booking_information", {
+            "laundry_items": [{"laundry_service_type": "Wash & Fold", "clothing_type": "Normal Clothes",
+                               "special_fabrics": "None"}],
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "8:00 AM"})]]),
+    ],
+    "Locksmith": [
+        ("Hi, my front door lock is jammed.", [[("check_service_description_complete", {})]]),
+        (f"Uploaded a photo. Can you come to 8 Jalan Example on {PREFERRED_DATE} at 1pm?",
+         [[("save_locksmith_booking_details", {
+             "service_description": "Front door lock jammed", "service_type": "Lock repair",
+             "service_address": "8 Jalan Example", "preferred_service_date": PREFERRED_DATE,
+             "preferred_service_time": "1:00 PM"})]]),
+    ],
+    "Others": [
+        ("Hi, can you help me assemble some furniture?", []),
+        ("Do you refund the deposit if I cancel?",
+         [[("is_service_policy_question", {"customer_question": "Do you refund the deposit if I cancel?"})]]),
+        (f"OK. Two wardrobes, on {PREFERRED_DATE} at 10am.", [
+            [("validate_other_service_date", {"preferred_service_date": PREFERRED_DATE})],
+            [("save_other_service_booking_information", {
+                "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "10:00 AM",
+                "service_description": "Assemble two wardrobes"})]
+        ]),
+    ],
+    "Plumbing": [
+        ("Hi, my kitchen sink is clogged.", [[("check_issue_description_complete", {})]]),
+        (f"It's a terrace house. Is {PREFERRED_DATE} at 2pm possible?",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Please book it.", [[("save_plumbing_booking_information", {
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "2:00 PM",
+            "property_type": "Terrace", "service_description": "Clogged kitchen sink"})]]),
+    ],
+    "Renovation": [
+        ("Hi, I'm planning to renovate my bathroom.", []),
+        (f"Can someone visit on {PREFERRED_DATE} at 11am?",
+         [[("validate_renovation_service_date", {"preferred_site_visit_date": PREFERRED_DATE})]]),
+        ("Yes, book the site visit please.", [[("save_renovation_booking_information", {
+            "renovation_location": "Bathroom", "renovation_description": "Retile floor and replace vanity",
+            "preferred_site_visit_date": PREFERRED_DATE, "preferred_site_visit_time": "11:00 AM"})]]),
+    ],
+    "Upholstery Cleaning": [
+        ("Hi, my fabric sofa has coffee stains.", [[("check_upholstery_description_complete", {})]]),
+        (f"Sent the photos. Clean it on {PREFERRED_DATE} at 3pm?",
+         [[("validate_general_service_date", {"preferred_service_date": PREFERRED_DATE})]]),
+        ("Please book it.", [[("save_upholstery_cleaning_booking_information", {
+            "upholstery_type": "Sofa", "upholstery_material": "Fabric", "upholstery_condition": "Coffee stains",
+            "preferred_service_date": PREFERRED_DATE, "preferred_service_time": "3:00 PM"})]]),
+    ],
+})
+
+
+# Special requests customers add to their bookings
+SPECIAL_REQUESTS = [
+    "Please call before coming.",
+    "Please ring the bell twice, the intercom is broken.",
+    "Visitor parking is at the back of the block.",
+    "We have a cat, please keep the door closed.",
+    "Please bring shoe covers.",
+]
+
+# Booking fields the special request goes into, for save tools without an additional_request argument
+_REQUEST_FIELDS = {
+    "save_curtain_making_booking_information": "additional_features",
+    "save_renovation_booking_information": "renovation_description",
+}
+
+
+def booking_dates(count=60):
+    """
+    Return ``count`` weekdays from two weeks out, skipping public holidays, which every service accepts.
+    """
+    from business_calendar import business_calendar
+
+    dates, day = [], date.today() + timedelta(days=14)
+    while len(dates) < count:
+        if day.weekday() < 5 and day not in business_calendar.holidays:
+            dates.append(day.strftime("%d-%b-%Y"))
+        day += timedelta(days=1)
+    return dates
+
+
+def personalise_dialogue(dialogue, booking_date, request=None):
+    """
+    Return a copy of a dialogue booking ``booking_date`` instead of PREFERRED_DATE, with ``request``, if given,
+    added to the prompt that saves the booking and to the saved booking.
+    """
+    personalised = []
+    for prompt, rounds in dialogue:
+        prompt = prompt.replace(PREFERRED_DATE, booking_date)
+        new_rounds = []
+        for tool_calls in rounds:
+            new_calls = []
+            for name, arguments in tool_calls:
+                arguments = {key: booking_date if value == PREFERRED_DATE else value
+                             for key, value in arguments.items()}
+                if request and name.startswith("save_"):
+                    field = _REQUEST_FIELDS.get(name, "additional_request")
+                    arguments[field] = f"{arguments[field]}. {request}" if field in arguments else request
+                    prompt = f"{prompt} {request}"
+                new_calls.append((name, arguments))
+            new_rounds.append(new_calls)
+        personalised.append((prompt, new_rounds))
+    return personalised
+
+
+def _run_customer(customer, services, deadline, turns, script, dates):
+    """
+    Run conversations for one simulated customer until the deadline, starting at a different service per
+    customer, and append one (latency_seconds, outcome) sample per turn. The prompts of each conversation are
+    added to the fake assistant's ``script`` while it runs.
+    """
+    from assistant import OpenAIClient
+    from rate_limiter import BUSY_REPLY
+
+    conversation = customer
+    while time.monotonic() < deadline:
+        service_name = services[conversation % len(services)]
+        conversation += 1
+        start = time.monotonic()
+        try:
+            client = OpenAIClient(service_name)
+        except Exception as e:
+            logging.error("Failed to start a %s conversation: %s", service_name, e)
+            turns.append((time.monotonic() - start, "error"))
+            continue
+
+        reference = f"Ref {customer}-{conversation}."
+        dialogue = personalise_dialogue(DIALOGUES[service_name], dates[(customer + conversation) % len(dates)],
+                                        f"{SPECIAL_REQUESTS[conversation % len(SPECIAL_REQUESTS)]} {reference}")
+        # The booking prompt names the conversation, so its script entry is not shared with other customers
+        booking_prompts = {prompt: rounds for prompt, rounds in dialogue if reference in prompt}
+        script.update(booking_prompts)
+        try:
+            _run_dialogue(client, dialogue, turns, BUSY_REPLY)
+        finally:
+            for prompt in booking_prompts:
+                script.pop(prompt, None)
+
+
+def _run_dialogue(client, dialogue, turns, busy_reply):
+    """
+    Run the turns of one conversation, appending one (latency_seconds, outcome) sample per turn.
+    """
+    for prompt, _rounds in dialogue:
+        start = time.monotonic()
+        reply = client.get_response_without_streaming(prompt)
+        latency = time.monotonic() - start
+        if reply == busy_reply:
+            outcome = "busy"
+        # The fake assistant echoes tool outputs, so failed tools show up in the reply
+        elif reply in ("Error getting response.", "Harmful content.") or "Error:" in reply:
+            outcome = "error"
+        else:
+            outcome = "ok"
+        turns.append((latency, outcome))
+
+
+def run_step(fakes, concurrency, duration, services, dates):
+    """
+    Run ``concurrency`` simulated customers at once for ``duration`` seconds.
+
+    Returns:
+        dict: Throughput, latency percentiles, error and busy rates and upstream calls of the step.
+    """
+    from metrics import percentile
+
+    turns = []
+    deadline = time.monotonic() + duration
+    before = fakes.calls.snapshot()
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="customer") as pool:
+        for customer in range(concurrency):
+            pool.submit(_run_customer, customer, services, deadline, turns, fakes.openai.script, dates)
+    elapsed = time.monotonic() - start
+    after = fakes.calls.snapshot()
+
+    latencies = [latency for latency, outcome in turns if outcome == "ok"]
+    count = len(turns) or 1
+    openai_calls, sheets_calls = _count_delta(before, after)
+    return {
+        "concurrency": concurrency,
+        "turns": len(turns),
+        "seconds": round(elapsed, 2),
+        "turns_per_second": round(len(turns) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "error_rate": round(sum(1 for _, outcome in turns if outcome == "error") / count, 4),
+        "busy_rate": round(sum(1 for _, outcome in turns if outcome == "busy") / count, 4),
+        "openai_calls_per_turn": round(openai_calls / count, 2),
+        "sheets_calls_per_turn": round(sheets_calls / count, 2),
+        "upstream_calls": {name: after.get(name, 0) - before.get(name, 0)
+                           for name in sorted(after) if after.get(name, 0) != before.get(name, 0)},
+    }
+
+
+def run_load_test(steps, duration, latency_scale=1.0, services=None, stop_p95_ms=None, stop_error_rate=None):
+    """
+    Ramp through the concurrency steps, stopping early once a step breaches the p95 or error-rate limit.
+
+    Returns:
+        list: The report of every step run.
+    """
+    from local_fakes import install_fakes
+    from assistant import HOME_SERVICES
+    from service_utils import booking_journal
+
+    services = services or list(HOME_SERVICES)
+    dates = booking_dates()
+    # Every turn but the booking itself depends only on the date; booking prompts are added per conversation
+    script = {}
+    for booking_date in dates:
+        script.update(build_script({name: personalise_dialogue(dialogue, booking_date)
+                                    for name, dialogue in DIALOGUES.items()}))
+    fakes = install_fakes(latency_scale=latency_scale, script=script)
+    for env_key in HOME_SERVICES.values():
+        os.environ.setdefault(env_key, f"asst_fake_{env_key.lower()}")
+    os.environ.setdefault("SERVICE_POLICY_ASSISTANT_ID", "asst_fake_service_policy")
+
+    reports = []
+    for concurrency in steps:
+        report = run_step(fakes, concurrency, duration, services, dates)
+        reports.append(report)
+        if (stop_p95_ms is not None and report["p95_ms"] > stop_p95_ms) or \
+                (stop_error_rate is not None and report["error_rate"] + report["busy_rate"] > stop_error_rate):
+            break
+
+    booking_journal.flush()
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test many simultaneous booking conversations against local "
+                                                 "OpenAI and Sheets fakes.")
+    parser.add_argument("--steps", default="1,5,10,25,50",
+                        help="Comma-separated numbers of simultaneous customers to ramp through.")
+    parser.add_argument("--duration", type=float, default=60.0, help="Seconds per concurrency step.")
+    parser.add_argument("--latency-scale", type=float, default=1.0,
+                        help="Factor applied to every fake latency, e.g. 0.1 for a quick run.")
+    parser.add_argument("--service", action="append", choices=sorted(DIALOGUES),
+                        help="Only simulate these services (default: all).")
+    parser.add_argument("--stop-p95-ms", type=float, help="Stop the ramp after a step with a higher p95 latency.")
+    parser.add_argument("--stop-error-rate", type=float,
+                        help="Stop the ramp after a step with a higher share of failed or busy turns, e.g. 0.05.")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON.")
+    args = parser.parse_args()
+
+    # Keep load-test snapshots and bookings out of the app's own state
+    state_dir = tempfile.mkdtemp(prefix="load_test_")
+    os.environ.setdefault("PRICE_SNAPSHOT_DIR", os.path.join(state_dir, "price_snapshots"))
+    os.environ.setdefault("BOOKING_JOURNAL_PATH", os.path.join(state_dir, "booking_journal.db"))
+    logging.disable(logging.WARNING)
+
+    steps = [int(step) for step in args.steps.split(",") if step.strip()]
+    reports = run_load_test(steps, args.duration, latency_scale=args.latency_scale, services=args.service,
+                            stop_p95_ms=args.stop_p95_ms, stop_error_rate=args.stop_error_rate)
+
+    if args.json:
+        print(json.dumps(reports, indent=2))
+        return
+
+    print(f"{'customers':>10}{'turns':>8}{'turns/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>9}"
+          f"{'busy':>8}{'openai/turn':>13}{'sheets/turn':>13}")
+    for r in reports:
+        print(f"{r['concurrency']:>10}{r['turns']:>8}{r['turns_per_second']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}"
+              f"{r['p99_ms']:>10}{r['error_rate']:>9.1%}{r['busy_rate']:>8.1%}{r['openai_calls_per_turn']:>13}"
+              f"{r['sheets_calls_per_turn']:>13}")
+
+
+if __name__ == "__main__":
+    main()
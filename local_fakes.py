@@ -0,0 +1,614 @@
+"""
+In-process stand-ins for the OpenAI Assistants API, moderation, Google Sheets v4 and gspread.
+
+They implement only the calls this app makes, add configurable latency to each one and count every call, so
+chat turns and tools can be measured offline. A FaultInjector makes chosen calls fail with HTTP errors or
+timeouts, for exercising the retries and circuit breakers in resilience.py. install_fakes() points the shared
+OpenAI client and the Google client provider at them.
+"""
+
+from collections import Counter, defaultdict, deque, namedtuple
+from types import SimpleNamespace
+import itertools
+import threading
+import random
+import math
+import json
+import time
+
+# Median and 95th percentile latency in milliseconds per fake call. "run.processing" is the time the assistant
+# spends on each round of a run before it completes or requires action.
+DEFAULT_LATENCIES_MS = {
+    "moderations.create": (150, 400),
+    "assistants.retrieve": (100, 250),
+    "assistants.update": (150, 350),
+    "threads.create": (120, 300),
+    "threads.retrieve": (80, 200),
+    "threads.update": (100, 250),
+    "threads.delete": (100, 250),
+    "threads.create_and_run": (150, 350),
+    "messages.create": (100, 250),
+    "messages.list": (120, 300),
+    "messages.delete": (100, 250),
+    "runs.create": (150, 350),
+    "runs.retrieve": (80, 200),
+    "runs.list": (100, 250),
+    "runs.cancel": (100, 250),
+    "runs.submit_tool_outputs": (150, 350),
+    "run.processing": (1500, 4000),
+    "sheets.read": (300, 800),
+    "sheets.write": (250, 700),
+}
+
+# Small price lists with the columns the estimate tools read, as Sheets returns them (header row first)
+SAMPLE_PRICE_LISTS = {
+    "Aircon Cleaning": [
+        ["Aircon Type", "Cleaning Type", "Horsepower", "Price per Unit (RM)"],
+        ["Wall Mounted", "Normal Cleaning", 1.0, "RM80"],
+        ["Wall Mounted", "Normal Cleaning", 1.5, "RM90"],
+        ["Wall Mounted", "Normal Cleaning", 2.5, "RM110"],
+        ["Wall Mounted", "Chemical Cleaning", 1.0, "RM150"],
+        ["Wall Mounted", "Chemical Cleaning", 1.5, "RM170"],
+        ["Wall Mounted", "Chemical Cleaning", 2.5, "RM200"],
+        ["Cassette", "Normal Cleaning", 2.0, "RM150"],
+        ["Cassette", "Chemical Cleaning", 2.0, "RM280"],
+    ],
+    "Appliance Repair": [
+        ["Appliance Type", "Site Inspection/Troubleshooting Charges"],
+        ["Washing Machine", 80],
+        ["Clothes Dryer", 80],
+        ["Refrigerator", 100],
+        ["Water Heater", 80],
+        ["Water Boiler", 80],
+        ["Television", 120],
+    ],
+    "Home Cleaning": [
+        ["Cleaning Type", "Property Size", "Manpower", "Manpower Cost", "Total Cost"],
+        ["Basic Cleaning", 800, "2 workers x 4 hours", 160, "RM160-RM200"],
+        ["Basic Cleaning", 1500, "3 workers x 4 hours", 240, "RM240-RM300"],
+        ["Deep Cleaning", 800, "3 workers x 5 hours", 350, "RM350-RM450"],
+        ["Deep Cleaning", 1500, "4 workers x 6 hours", 560, "RM560-RM700"],
+        ["Post-Renovation", 1500, "5 workers x 8 hours", 900, "RM900"],
+    ],
+    "Laundry": [
+        ["Clothing Type", "Service Type", "Price"],
+        ["Normal Clothes", "Wash & Fold", "RM6/kg"],
+        ["Normal Clothes", "Wash & Iron", "RM9/kg"],
+        ["Curtains", "Dry Clean", "RM15/panel"],
+    ],
+    "Pest Control": [
+        ["Pest Type", "Price"],
+        ["Ants", 150],
+        ["Cockroaches", 150],
+        ["Termites", 350],
+    ],
+}
+
+# Booking tabs written by the save_* tools
+BOOKING_TABS = ["ac_cleaning", "ac_installation", "ac_troubleshooting", "appliance_repair", "curtain_making",
+                "electrician", "home_cleaning", "laundry", "locksmith", "others", "pest_control", "plumbing",
+                "renovation", "upholstery_cleaning"]
+
+
+class LatencyModel:
+    """
+    Log-normal latency described by its median and 95th percentile in milliseconds.
+    """
+
+    def __init__(self, median_ms, p95_ms=None, scale=1.0):
+        self.median = median_ms / 1000 * scale
+        p95 = (p95_ms if p95_ms is not None else median_ms) / 1000 * scale
+        self.sigma = math.log(p95 / self.median) / 1.645 if self.median > 0 and p95 > self.median else 0.0
+
+    def sample(self):
+        if self.median <= 0:
+            return 0.0
+        return self.median * math.exp(random.gauss(0, self.sigma)) if self.sigma else self.median
+
+    def sleep(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def build_latencies(overrides=None, scale=1.0):
+    """
+    Build the latency models of every fake call from DEFAULT_LATENCIES_MS, overridden per call name.
+
+    Args:
+        overrides (dict, optional): Call name to (median_ms, p95_ms).
+        scale (float): Factor applied to every latency, e.g. 0 for no latency at all.
+    """
+    latencies = dict(DEFAULT_LATENCIES_MS)
+    latencies.update(overrides or {})
+    return {name: LatencyModel(median, p95, scale=scale) for name, (median, p95) in latencies.items()}
+
+
+class CallCounter:
+    """
+    Thread-safe count of calls made to the fakes, by call name.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = Counter()
+
+    def increment(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+class FakeAPIError(Exception):
+    """
+    Error response injected into a fake call. It carries the status the way openai (``status_code``),
+    googleapiclient (``resp.status``) and gspread (``response.status_code``) errors do.
+    """
+
+    def __init__(self, name, status):
+        super().__init__(f"Injected HTTP {status} from {name}.")
+        self.status_code = status
+        self.resp = SimpleNamespace(status=status)
+        self.response = SimpleNamespace(status_code=status, headers={})
+
+
+class FaultInjector:
+    """
+    Makes fake calls fail, at random with a rate per call name or once per fail_next().
+
+    A fault is an HTTP status such as 429 or 503, raised as FakeAPIError, or "timeout", raised as TimeoutError.
+    Faults are raised after the call's latency and before it takes effect. ``injected`` counts them by call name.
+    """
+
+    def __init__(self, rates=None, fault=503, seed=None):
+        self.rates = rates or {}
+        self.fault = fault
+        self.injected = Counter()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._scheduled = defaultdict(deque)
+
+    def fail_next(self, name, count=1, fault=503):
+        """Fail the next ``count`` calls named ``name``, e.g. "runs.retrieve", with ``fault``."""
+        with self._lock:
+            self._scheduled[name].extend([fault] * count)
+
+    def check(self, name):
+        with self._lock:
+            if self._scheduled[name]:
+                fault = self._scheduled[name].popleft()
+            elif self._random.random() < self.rates.get(name, self.rates.get("*", 0)):
+                fault = self.fault
+            else:
+                return
+            self.injected[name] += 1
+
+        if fault == "timeout":
+            raise TimeoutError(f"Injected timeout from {name}.")
+        raise FakeAPIError(name, fault)
+
+
+class _FakeUpstream:
+    """Base for fakes that count their calls and add latency and injected faults to them."""
+
+    faults = None
+
+    def __init__(self, latencies, calls):
+        self.latencies = latencies
+        self.calls = calls
+
+    def _call(self, name, latency_name=None):
+        self.calls.increment(name)
+        latency = self.latencies.get(latency_name or name)
+        if latency is not None:
+            latency.sleep()
+        if self.faults is not None:
+            self.faults.check(name)
+
+
+def _text_message(message_id, thread_id, role, text, run_id=None):
+    return SimpleNamespace(
+        id=message_id, object="thread.message", thread_id=thread_id, role=role, run_id=run_id,
+        created_at=int(time.time()), content=[SimpleNamespace(type="text", text=SimpleNamespace(value=text))]
+    )
+
+
+class FakePage:
+    """
+    A page of list results; iterating it walks the following pages too, like the SDK's auto-paginating pages.
+    """
+
+    def __init__(self, fake, items, limit):
+        self._fake = fake
+        self._items = items
+        self.data = items[:limit]
+        self.has_more = len(items) > limit
+        self._limit = limit
+
+    def __iter__(self):
+        for start in range(0, len(self._items), self._limit):
+            if start:
+                self._fake._call("messages.list")
+            yield from self._items[start:start + self._limit]
+
+    def __getitem__(self, index):
+        return self.data[index]
+
+    def __len__(self):
+        return len(self.data)
+
+
+class FakeOpenAI(_FakeUpstream):
+    """
+    Fake of the OpenAI client covering moderation, assistants, threads, messages and polled runs.
+
+    Runs take a "run.processing" latency per round. A script maps a user prompt to the rounds of tool calls the
+    run requires before it completes, each round a list of (function_name, arguments) pairs. Runs without a
+    scripted prompt complete with an echo of the prompt. Prompts containing a flagged term fail moderation.
+    Streaming runs are not supported.
+    """
+
+    def __init__(self, latencies=None, calls=None, script=None, flagged_terms=("FLAG_ME",)):
+        super().__init__(latencies if latencies is not None else build_latencies(), calls or CallCounter())
+        self.script = script or {}
+        self.flagged_terms = flagged_terms
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._runs = {}
+
+        self.moderations = SimpleNamespace(create=self._create_moderation)
+        self.beta = SimpleNamespace(
+            assistants=SimpleNamespace(retrieve=self._retrieve_assistant, update=self._update_assistant),
+            threads=SimpleNamespace(
+                create=self._create_thread,
+                retrieve=self._retrieve_thread,
+                update=self._update_thread,
+                delete=self._delete_thread,
+                create_and_run=self._create_and_run,
+                messages=SimpleNamespace(create=self._create_message, list=self._list_messages,
+                                         delete=self._delete_message),
+                runs=SimpleNamespace(create=self._create_run, retrieve=self._retrieve_run, list=self._list_runs,
+                                     cancel=self._cancel_run, submit_tool_outputs=self._submit_tool_outputs)
+            )
+        )
+
+    def _new_id(self, prefix):
+        return f"{prefix}_fake{next(self._ids)}"
+
+    # Moderation and assistants
+
+    def _create_moderation(self, input, **kwargs):
+        self._call("moderations.create")
+        flagged = any(term in input for term in self.flagged_terms)
+        return SimpleNamespace(results=[SimpleNamespace(flagged=flagged)])
+
+    def _retrieve_assistant(self, assistant_id, **kwargs):
+        self._call("assistants.retrieve")
+        return SimpleNamespace(id=assistant_id, model="fake", instructions="", tools=[], tool_resources=None)
+
+    def _update_assistant(self, assistant_id, **kwargs):
+        self._call("assistants.update")
+        return SimpleNamespace(id=assistant_id, model="fake", instructions=kwargs.get("instructions", ""),
+                               tools=[], tool_resources=None)
+
+    # Threads and messages
+
+    def _create_thread(self, metadata=None, messages=None, **kwargs):
+        self._call("threads.create")
+        return self._new_thread(metadata, messages)
+
+    def _new_thread(self, metadata=None, messages=None):
+        thread = SimpleNamespace(id=self._new_id("thread"), object="thread", metadata=dict(metadata or {}))
+        with self._lock:
+            self._threads[thread.id] = {"thread": thread, "messages": []}
+        for message in messages or []:
+            self._append_message(thread.id, message["role"], message["content"])
+        return thread
+
+    def _get_thread(self, thread_id):
+        with self._lock:
+            state = self._threads.get(thread_id)
+        if state is None:
+            raise LookupError(f"No thread found with id '{thread_id}'.")
+        return state
+
+    def _retrieve_thread(self, thread_id, **kwargs):
+        self._call("threads.retrieve")
+        return self._get_thread(thread_id)["thread"]
+
+    def _update_thread(self, thread_id, metadata=None, **kwargs):
+        self._call("threads.update")
+        thread = self._get_thread(thread_id)["thread"]
+        thread.metadata.update(metadata or {})
+        return thread
+
+    def _delete_thread(self, thread_id, **kwargs):
+        self._call("threads.delete")
+        with self._lock:
+            self._threads.pop(thread_id, None)
+        return SimpleNamespace(id=thread_id, deleted=True)
+
+    def _append_message(self, thread_id, role, text, run_id=None):
+        message = _text_message(self._new_id("msg"), thread_id, role, text, run_id)
+        state = self._get_thread(thread_id)
+        with self._lock:
+            state["messages"].append(message)
+        return message
+
+    def _create_message(self, thread_id, role, content, **kwargs):
+        self._call("messages.create")
+        return self._append_message(thread_id, role, content)
+
+    def _list_messages(self, thread_id, run_id=None, order="desc", after=None, before=None, limit=20, **kwargs):
+        self._call("messages.list")
+        state = self._get_thread(thread_id)
+        with self._lock:
+            messages = [m for m in state["messages"] if run_id is None or m.run_id == run_id]
+        if order == "desc":
+            messages.reverse()
+        ids = [m.id for m in messages]
+        if after in ids:
+            messages = messages[ids.index(after) + 1:]
+        if before in ids:
+            messages = messages[:ids.index(before)][-limit:]
+        return FakePage(self, messages, limit)
+
+    def _delete_message(self, message_id, thread_id, **kwargs):
+        self._call("messages.delete")
+        state = self._get_thread(thread_id)
+        with self._lock:
+            state["messages"] = [m for m in state["messages"] if m.id != message_id]
+        return SimpleNamespace(id=message_id, deleted=True)
+
+    # Runs
+
+    def _start_run(self, thread_id, assistant_id):
+        messages = self._get_thread(thread_id)["messages"]
+        prompt = next((m.content[0].text.value for m in reversed(messages) if m.role == "user"), "")
+        run = {
+            "id": self._new_id("run"),
+            "thread_id": thread_id,
+            "assistant_id": assistant_id,
+            "prompt": prompt,
+            "rounds": list(self.script.get(prompt, [])),
+            "tool_outputs": [],
+            "status": "queued",
+            "ready_at": time.monotonic() + self._processing_time(),
+            "required_action": None
+        }
+        with self._lock:
+            self._runs[run["id"]] = run
+        return self._run_object(run)
+
+    def _processing_time(self):
+        latency = self.latencies.get("run.processing")
+        return latency.sample() if latency is not None else 0.0
+
+    def _create_run(self, thread_id, assistant_id, **kwargs):
+        self._call("runs.create")
+        return self._start_run(thread_id, assistant_id)
+
+    def _create_and_run(self, assistant_id, thread=None, **kwargs):
+        self._call("threads.create_and_run")
+        new_thread = self._new_thread((thread or {}).get("metadata"), (thread or {}).get("messages"))
+        return self._start_run(new_thread.id, assistant_id)
+
+    def _get_run(self, thread_id, run_id):
+        with self._lock:
+            run = self._runs.get(run_id)
+        if run is None or run["thread_id"] != thread_id:
+            raise LookupError(f"No run found with id '{run_id}'.")
+        return run
+
+    def _retrieve_run(self, thread_id, run_id, **kwargs):
+        self._call("runs.retrieve")
+        run = self._get_run(thread_id, run_id)
+        with self._lock:
+            if run["status"] in ("queued", "in_progress"):
+                run["status"] = "in_progress"
+                if time.monotonic() >= run["ready_at"]:
+                    self._advance(run)
+        return self._run_object(run)
+
+    def _list_runs(self, thread_id, order="desc", limit=20, **kwargs):
+        self._call("runs.list")
+        self._get_thread(thread_id)
+        with self._lock:
+            runs = [self._run_object(run) for run in self._runs.values() if run["thread_id"] == thread_id]
+        if order == "desc":
+            runs.reverse()
+        return FakePage(self, runs, limit)
+
+    def _advance(self, run):
+        """
+        Finish the current round of a run: require the next scripted tool calls or complete with a reply.
+        """
+        if run["rounds"]:
+            tool_calls = [
+                SimpleNamespace(id=self._new_id("call"), type="function",
+                                function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+                for name, arguments in run["rounds"].pop(0)
+            ]
+            run["status"] = "requires_action"
+            run["required_action"] = SimpleNamespace(
+                type="submit_tool_outputs", submit_tool_outputs=SimpleNamespace(tool_calls=tool_calls)
+            )
+            return
+
+        reply = f"Reply to: {run['prompt']}"
+        if run["tool_outputs"]:
+            reply += "\n" + "\n".join(str(output["output"]) for output in run["tool_outputs"])
+        message = _text_message(self._new_id("msg"), run["thread_id"], "assistant", reply, run["id"])
+        self._threads[run["thread_id"]]["messages"].append(message)
+        run["status"] = "completed"
+        run["required_action"] = None
+
+    def _cancel_run(self, thread_id, run_id, **kwargs):
+        self._call("runs.cancel")
+        run = self._get_run(thread_id, run_id)
+        with self._lock:
+            if run["status"] not in ("completed", "failed", "expired", "cancelled"):
+                run["status"] = "cancelled"
+                run["required_action"] = None
+        return self._run_object(run)
+
+    def _submit_tool_outputs(self, thread_id, run_id, tool_outputs, **kwargs):
+        self._call("runs.submit_tool_outputs")
+        run = self._get_run(thread_id, run_id)
+        with self._lock:
+            if run["status"] != "requires_action":
+                raise RuntimeError(f"Run {run_id} does not require tool outputs.")
+            run["tool_outputs"].extend(tool_outputs)
+            run["status"] = "queued"
+            run["required_action"] = None
+            run["ready_at"] = time.monotonic() + self._processing_time()
+        return self._run_object(run)
+
+    def _run_object(self, run):
+        return SimpleNamespace(
+            id=run["id"], object="thread.run", thread_id=run["thread_id"], assistant_id=run["assistant_id"],
+            status=run["status"], required_action=run["required_action"], last_error=None, incomplete_details=None
+        )
+
+
+class _FakeRequest:
+    """A prepared Sheets v4 request; the call is counted and delayed when it is executed."""
+
+    def __init__(self, fake, name, latency_name, handler):
+        self._fake = fake
+        self._name = name
+        self._latency_name = latency_name
+        self._handler = handler
+
+    def execute(self, **kwargs):
+        self._fake._call(self._name, self._latency_name)
+        return self._handler()
+
+
+class FakeSheetsService(_FakeUpstream):
+    """
+    Fake of the Sheets v4 discovery client covering spreadsheets.get, batchUpdate (appendCells) and
+    values.append. Appended rows are kept per tab in ``rows``.
+    """
+
+    def __init__(self, latencies=None, calls=None, tabs=BOOKING_TABS):
+        super().__init__(latencies if latencies is not None else build_latencies(), calls or CallCounter())
+        self._lock = threading.Lock()
+        self._sheet_titles = {sheet_id: title for sheet_id, title in enumerate(tabs, start=1)}
+        self.rows = defaultdict(list)
+
+    def spreadsheets(self):
+        return self
+
+    def values(self):
+        return SimpleNamespace(append=self._append)
+
+    def get(self, spreadsheetId=None, fields=None, **kwargs):
+        sheets = [{"properties": {"sheetId": sheet_id, "title": title}}
+                  for sheet_id, title in self._sheet_titles.items()]
+        return _FakeRequest(self, "sheets.get", "sheets.read", lambda: {"sheets": sheets})
+
+    def batchUpdate(self, spreadsheetId=None, body=None, **kwargs):
+        def handler():
+            with self._lock:
+                for request in body["requests"]:
+                    append = request["appendCells"]
+                    tab = self._sheet_titles[append["sheetId"]]
+                    for row in append["rows"]:
+                        # Empty cells are sent without a userEnteredValue
+                        self.rows[tab].append([next(iter(cell["userEnteredValue"].values()), "")
+                                               if "userEnteredValue" in cell else ""
+                                               for cell in row["values"]])
+            return {"replies": [{} for _ in body["requests"]]}
+
+        return _FakeRequest(self, "sheets.batchUpdate", "sheets.write", handler)
+
+    def _append(self, spreadsheetId=None, range=None, body=None, **kwargs):
+        def handler():
+            with self._lock:
+                self.rows[range.split("!")[0]].extend(body["values"])
+            return {"updates": {"updatedRows": len(body["values"])}}
+
+        return _FakeRequest(self, "sheets.values.append", "sheets.write", handler)
+
+
+class _FakeSpreadsheet:
+    def __init__(self, fake, price_lists):
+        self._fake = fake
+        self._price_lists = price_lists
+
+    def worksheet(self, title):
+        self._fake._call("sheets.worksheet", "sheets.read")
+        if title not in self._price_lists:
+            raise LookupError(f"No worksheet named '{title}'.")
+        return _FakeWorksheet(self, title, self._price_lists[title])
+
+    def values_get(self, range, params=None):
+        self._fake._call("sheets.values_get", "sheets.read")
+        title = range.strip("'")
+        return {"range": f"'{title}'!A1", "majorDimension": "ROWS", "values": self._price_lists[title]}
+
+
+class _FakeWorksheet:
+    def __init__(self, spreadsheet, title, values):
+        self.spreadsheet = spreadsheet
+        self.title = title
+        self.row_count = len(values)
+        self.col_count = max(len(row) for row in values)
+        self._values = values
+
+    def get_all_values(self, **kwargs):
+        self.spreadsheet._fake._call("sheets.values_get", "sheets.read")
+        return [list(row) for row in self._values]
+
+
+class FakeGspreadClient(_FakeUpstream):
+    """
+    Fake of the gspread client serving the price-list workbook, readable with gspread_dataframe.
+    """
+
+    def __init__(self, latencies=None, calls=None, price_lists=None):
+        super().__init__(latencies if latencies is not None else build_latencies(), calls or CallCounter())
+        self.price_lists = price_lists if price_lists is not None else SAMPLE_PRICE_LISTS
+
+    def open(self, title, folder_id=None):
+        self._call("sheets.open", "sheets.read")
+        return _FakeSpreadsheet(self, self.price_lists)
+
+
+LocalFakes = namedtuple("LocalFakes", ["openai", "sheets", "gspread", "calls", "faults"])
+
+
+def install_fakes(latency_overrides=None, latency_scale=1.0, script=None, price_lists=None, faults=None):
+    """
+    Point the shared OpenAI client and the Google client provider at new local fakes sharing one call counter
+    and, if given, one FaultInjector.
+
+    Returns:
+        LocalFakes: The fakes and their call counter.
+    """
+    from openai_transport import set_openai_client
+    from google_clients import google_client_provider
+
+    latencies = build_latencies(latency_overrides, scale=latency_scale)
+    calls = CallCounter()
+    fakes = LocalFakes(
+        FakeOpenAI(latencies, calls, script=script),
+        FakeSheetsService(latencies, calls),
+        FakeGspreadClient(latencies, calls, price_lists=price_lists),
+        calls,
+        faults
+    )
+    for fake in (fakes.openai, fakes.sheets, fakes.gspread):
+        fake.faults = faults
+    set_openai_client(fakes.openai)
+    google_client_provider.use_clients(gspread_client=fakes.gspread, services={("sheets", "v4"): fakes.sheets})
+    return fakes
@@ -1,26 +1,15 @@
-from service_utils import get_google_creds_and_service
-import os
+from service_utils import append_booking_row
 
 
 def save_locksmith_booking_details(service_description, service_type, service_address, preferred_service_date,
                                    preferred_service_time, customer_budget="Not mentioned",
                                    additional_request="No request"):
 
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[service_address, preferred_service_date, preferred_service_time, service_type, service_description,
-             customer_budget, additional_request]]
-
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="locksmith!A1:G1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    data = [service_address, preferred_service_date, preferred_service_time, service_type, service_description,
+            customer_budget, additional_request]
+
+    append_booking_row("locksmith!A1:G1", data)
 
     return ("Inform the customer that their booking details have been submitted and that you’ll need some time to "
             "check the vendor’s availability. Let them know you’ll get back to them as soon as possible with a "
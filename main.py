@@ -1,5 +1,14 @@
 import streamlit as st
-from assistant import OpenAIClient
+from assistant import OpenAIClient, HOME_SERVICES
+from assistant_instructions import start_daily_refresh
+from warm_threads import warm_thread_pool
+from service_utils import booking_journal
+import os
+
+# Messages rendered per window of chat history; older ones are shown on request
+HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "20"))
+# Messages kept in the session; older ones are fetched again from the thread when needed
+HISTORY_MAX_MESSAGES = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "200"))
 
 
 # Function to initialize session state
@@ -10,17 +19,48 @@ def initialize_session_state(home_service, language):
         st.session_state.selected_home_service = home_service
     if "selected_language" not in st.session_state:
         st.session_state.selected_language = language
+    if "history_window" not in st.session_state:
+        st.session_state.history_window = HISTORY_WINDOW
+    if "has_older_messages" not in st.session_state:
+        st.session_state.has_older_messages = False
+
+
+# Start the process-wide job that keeps the assistants' instruction dates current
+@st.cache_resource
+def start_instruction_refresh():
+    return start_daily_refresh(HOME_SERVICES)
+
+
+# Fill the pool of ready conversation threads once per process so new sessions skip thread creation
+@st.cache_resource
+def prefill_thread_pool():
+    warm_thread_pool.prefill()
+    return warm_thread_pool
+
+
+# Start delivering journaled bookings, including any left pending by a previous run
+@st.cache_resource
+def start_booking_journal():
+    booking_journal.start()
+    return booking_journal
 
 
 # Function to reinitialize client if needed
 def initialize_client(home_service):
     try:
         st.session_state.client = OpenAIClient(home_service)
-        st.session_state.client.update_assistant_instructions(home_service)
     except Exception as e:
         st.error(f"Failed to initialize OpenAI client: {e}")
 
 
+# Function to hand the conversation to another service's assistant, keeping its thread and history
+def switch_client(home_service):
+    try:
+        st.session_state.client.switch_service(home_service)
+    except Exception as e:
+        st.error(f"Failed to switch service: {e}")
+
+
 # Function to handle the first prompt and response
 def send_first_prompt(language):
     try:
@@ -34,17 +74,69 @@ def send_first_prompt(language):
         # Set a default prompt if the selected language is not in the dictionary
         first_prompt = prompts.get(language, "Hi. I'd like to book a service.")
 
-        # Send the first prompt and store the response
-        first_response = st.session_state.client.get_response_without_streaming(first_prompt)
-        st.session_state.messages = [{"role": "assistant", "content": first_response}]
+        # Stream the response to the first prompt and store it
+        with st.chat_message("assistant"):
+            first_response = st.write_stream(st.session_state.client.get_response_streaming(first_prompt))
+        st.session_state.messages = [
+            {"role": "assistant", "content": first_response, "id": st.session_state.client.last_message_id}
+        ]
 
         return first_response
     except Exception as e:
         st.error(f"Failed to send first prompt: {e}")
 
 
+# Function to ask the assistant to carry on an ongoing conversation in another language
+def send_language_switch(language):
+    try:
+        prompts = {
+            "English": "Please continue our conversation in English.",
+            "Chinese": "请用中文继续我们的对话。",
+            "Malay": "Sila teruskan perbualan kita dalam Bahasa Melayu."
+        }
+        switch_prompt = prompts.get(language, prompts["English"])
+
+        with st.chat_message("user"):
+            st.markdown(switch_prompt)
+        with st.chat_message("assistant"):
+            client = st.session_state.client
+            response = st.write_stream(client.get_response_streaming(switch_prompt))
+        append_message("user", switch_prompt, client.last_prompt_message_id)
+        append_message("assistant", response, client.last_message_id)
+    except Exception as e:
+        st.error(f"Failed to switch language: {e}")
+
+
+# Function to keep the session's chat history bounded
+def append_message(role, content, message_id=None):
+    messages = st.session_state.messages
+    messages.append({"role": role, "content": content, "id": message_id})
+    if len(messages) > HISTORY_MAX_MESSAGES:
+        del messages[:-HISTORY_MAX_MESSAGES]
+        st.session_state.has_older_messages = True
+
+
+# Function to show one more window of older messages, fetching them from the thread if they were trimmed
+def load_older_messages():
+    st.session_state.history_window += HISTORY_WINDOW
+    messages = st.session_state.messages
+    missing = st.session_state.history_window - len(messages)
+    if missing <= 0 or not st.session_state.has_older_messages or not messages or not messages[0].get("id"):
+        return
+
+    try:
+        older, has_more = st.session_state.client.fetch_older_messages(messages[0]["id"], limit=missing)
+        st.session_state.messages = older + messages
+        st.session_state.has_older_messages = has_more
+    except Exception as e:
+        st.error(f"Failed to load older messages: {e}")
+
+
 def main():
     st.title("ChatGPT-like clone")
+    start_instruction_refresh()
+    prefill_thread_pool()
+    start_booking_journal()
 
     # Sidebar for home service selection
     home_service = st.sidebar.selectbox(
@@ -64,34 +156,56 @@ def main():
     # Initialize session state
     initialize_session_state(home_service, language)
 
-    # Check if client needs to be reinitialized
-    if ("client" not in st.session_state or
-            st.session_state.selected_home_service != home_service or
-            st.session_state.selected_language != language):
+    # Check if client needs to be initialized or switched to another service
+    needs_first_prompt = False
+    needs_language_switch = False
+    if "client" not in st.session_state:
         initialize_client(home_service)
         st.session_state.selected_home_service = home_service
         st.session_state.selected_language = language
+        st.session_state.messages = []
+        st.session_state.history_window = HISTORY_WINDOW
+        st.session_state.has_older_messages = False
+        needs_first_prompt = True
+    elif (st.session_state.selected_home_service != home_service or
+            st.session_state.selected_language != language):
+        switch_client(home_service)
+        language_changed = st.session_state.selected_language != language
+        st.session_state.selected_home_service = home_service
+        st.session_state.selected_language = language
+        # Greet again in the new service and language until the customer has written something
+        needs_first_prompt = not any(message["role"] == "user" for message in st.session_state.messages)
+        if needs_first_prompt:
+            st.session_state.messages = []
+        else:
+            # The assistant keeps the language of the conversation so far unless it is asked to change
+            needs_language_switch = language_changed
+
+    # Display the latest window of chat messages
+    if len(st.session_state.messages) > st.session_state.history_window or st.session_state.has_older_messages:
+        if st.button("Load older messages"):
+            load_older_messages()
+
+    for message in st.session_state.messages[-st.session_state.history_window:]:
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
 
+    if needs_first_prompt:
         # Send the first prompt to initiate the conversation with OpenAI's API
         send_first_prompt(language)
-
-    # Display chat messages
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.markdown(message["content"])
+    elif needs_language_switch:
+        send_language_switch(language)
 
     # Handle user input
     if prompt := st.chat_input("What is up?"):
-        st.session_state.messages.append({"role": "user", "content": prompt})
-
         with st.chat_message("user"):
             st.markdown(prompt)
 
-        response = st.session_state.client.get_response_without_streaming(prompt)
-
         with st.chat_message("assistant"):
-            st.markdown(response)
-            st.session_state.messages.append({"role": "assistant", "content": response})
+            client = st.session_state.client
+            response = st.write_stream(client.get_response_streaming(prompt))
+            append_message("user", prompt, client.last_prompt_message_id)
+            append_message("assistant", response, client.last_message_id)
 
 
 # Run the main function
@@ -0,0 +1,85 @@
+import math
+import threading
+from collections import defaultdict, deque
+
+# Number of recent samples kept per histogram for percentile estimates
+HISTOGRAM_SAMPLE_SIZE = 1024
+
+_lock = threading.Lock()
+_counters = defaultdict(float)
+_gauges = {}
+_histograms = {}
+
+
+def _key(name, labels):
+    """Build the registry key for a metric name and its labels."""
+    if not labels:
+        return name
+    label_str = ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    return f"{name}{{{label_str}}}"
+
+
+def increment(name, value=1, **labels):
+    """Increase a counter by the given value."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def set_gauge(name, value, **labels):
+    """Record the current value of a gauge."""
+    with _lock:
+        _gauges[_key(name, labels)] = value
+
+
+def observe(name, value, **labels):
+    """Record a sample (e.g. a latency in seconds or a batch size) in a histogram."""
+    key = _key(name, labels)
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {
+                "count": 0, "sum": 0.0, "max": 0.0, "samples": deque(maxlen=HISTOGRAM_SAMPLE_SIZE)
+            }
+        histogram["count"] += 1
+        histogram["sum"] += value
+        histogram["max"] = max(histogram["max"], value)
+        histogram["samples"].append(value)
+
+
+def percentile(samples, pct):
+    """Return the nearest-rank percentile of a list of samples."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def snapshot():
+    """
+    Return a point-in-time copy of all counters, gauges and histogram summaries.
+    """
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+        histograms = {key: (h["count"], h["sum"], h["max"], list(h["samples"])) for key, h in _histograms.items()}
+
+    summaries = {}
+    for key, (count, total, maximum, samples) in histograms.items():
+        summaries[key] = {
+            "count": count,
+            "mean": total / count if count else 0.0,
+            "max": maximum,
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+        }
+    return {"counters": counters, "gauges": gauges, "histograms": summaries}
+
+
+def reset():
+    """Clear all recorded metrics."""
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _histograms.clear()
@@ -0,0 +1,85 @@
+import os
+import logging
+import threading
+from dotenv import load_dotenv
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _connection_limits():
+    """Build the connection pool limits from the environment."""
+    import httpx
+
+    return httpx.Limits(
+        max_connections=int(os.getenv("OPENAI_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=int(os.getenv("OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        keepalive_expiry=float(os.getenv("OPENAI_KEEPALIVE_EXPIRY_SECONDS", "30"))
+    )
+
+
+def get_openai_client():
+    """
+    Return the OpenAI client shared by every session in the process.
+
+    The client is thread-safe and owns a single HTTP connection pool, so TLS connections are kept alive and
+    reused across sessions instead of being opened per OpenAIClient.
+    """
+    global _client
+
+    if _client is None:
+        # The OpenAI SDK is imported on first use to keep module import cheap
+        from openai import OpenAI, DefaultHttpxClient
+
+        with _client_lock:
+            if _client is None:
+                load_dotenv()
+                _client = OpenAI(
+                    http_client=DefaultHttpxClient(limits=_connection_limits()),
+                    timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60")),
+                    # Retries are made by the resilience layer, under its retry budget and circuit breaker
+                    max_retries=0
+                )
+                logging.info("Shared OpenAI client created.")
+    return _client
+
+
+def set_openai_client(client):
+    """
+    Replace the shared OpenAI client, e.g. with a local stand-in for tests and benchmarks.
+    """
+    global _client
+
+    with _client_lock:
+        _client = client
+
+
+def get_async_openai_client():
+    """
+    Return the AsyncOpenAI client shared by every request handled by this process's event loop.
+    """
+    global _async_client
+
+    if _async_client is None:
+        from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+        with _client_lock:
+            if _async_client is None:
+                load_dotenv()
+                _async_client = AsyncOpenAI(
+                    http_client=DefaultAsyncHttpxClient(limits=_connection_limits()),
+                    timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", "60"))
+                )
+                logging.info("Shared AsyncOpenAI client created.")
+    return _async_client
+
+
+def set_async_openai_client(client):
+    """
+    Replace the shared AsyncOpenAI client, e.g. with a local stand-in for tests.
+    """
+    global _async_client
+
+    with _client_lock:
+        _async_client = client
@@ -1,6 +1,5 @@
-from service_utils import get_google_creds_and_service
-from datetime import datetime, timedelta
-import os
+from service_utils import append_booking_row
+from business_calendar import business_calendar, SAME_DAY, TOO_SOON, CLOSED_DAY, PUBLIC_HOLIDAY
 
 
 def save_other_service_booking_information(preferred_service_date, preferred_service_time, service_description,
@@ -18,20 +17,10 @@ def save_other_service_booking_information(preferred_service_date, preferred_ser
             str: A confirmation message for the customer.
     """
 
-    # Build the Google Sheets API service using the authenticated credentials
-    service = get_google_creds_and_service(service_name='sheets', version='v4')
-
-    # Call the Sheets API
-    sheet = service.spreadsheets()
-
     # Insert a new row into the Google Sheet
-    data = [[preferred_service_date, preferred_service_time, service_description, additional_request]]
+    data = [preferred_service_date, preferred_service_time, service_description, additional_request]
 
-    sheet.values().append(spreadsheetId=os.getenv("SAMPLE_SPREADSHEET_ID"),
-                          range="others!A1:D1",
-                          valueInputOption="USER_ENTERED",
-                          insertDataOption="INSERT_ROWS",
-                          body={"values": data}).execute()
+    append_booking_row("others!A1:D1", data)
 
     return ("Inform the customer that their booking details have been successfully submitted and that you will "
             "take some time to identify suitable vendors who can address their issue or provide the requested service. "
@@ -42,28 +31,26 @@ def validate_other_service_date(preferred_service_date):
     """
     Validates the customer's preferred service date, ensuring it's at least 3 working days from today.
     """
-    # Convert the preferred service date to the expected format (DD-MMM-YYYY)
-    preferred_date = datetime.strptime(preferred_service_date, '%d-%b-%Y')
-
-    # Get today's date
-    today = datetime.now().date()
+    # Look up the preferred date (DD-MMM-YYYY) in today's precomputed business calendar
+    status = business_calendar.check("other", preferred_service_date)
 
-    # Calculate the earliest valid date
-    minimum_lead_days = 3
-    earliest_valid_date = today + timedelta(days=minimum_lead_days)
-
-    if preferred_date.date() == today:
+    if status == SAME_DAY:
         return "Politely inform the customer that same-day requests are not accepted."
 
-    if preferred_date.date() < earliest_valid_date:     # Check if the preferred date is within 3 days from today
+    if status == TOO_SOON:
         return (f"Inform the customer that since their requested service on {preferred_service_date} is outside "
                 "our usual booking window, which requires at least 2 days' notice, you will try to find "
                 "vendors who can accommodate the urgent request, but be sure to avoid making promises.")
 
-    if preferred_date.weekday() == 6:    # Check if the preferred date falls on a Saturday or Sunday
+    if status == CLOSED_DAY:
         return (f"Inform the customer that since their requested service on {preferred_service_date} falls "
                 "on a Sunday, you will try to find vendors who can accommodate the request, but be sure to "
                 "avoid making promises.")
 
+    if status == PUBLIC_HOLIDAY:
+        return (f"Inform the customer that since their requested service on {preferred_service_date} falls "
+                "on a public holiday, you will try to find vendors who can accommodate the request, but be "
+                "sure to avoid making promises.")
+
     return ("Inform the customer that you will try to find suitable vendors who can address their issue or provide the "
             "requested service. At the same time, continue to gather all other necessary information from the customer.")
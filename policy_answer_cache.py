@@ -0,0 +1,127 @@
+from collections import OrderedDict
+from concurrent.futures import Future
+import unicodedata
+import logging
+import threading
+import time
+import re
+
+import metrics
+
+
+def normalize_question(question):
+    """
+    Normalize a customer question so trivially different phrasings share a cache entry.
+
+    Case, punctuation and extra whitespace are ignored, e.g. "Is the inspection fee refundable?" and
+    "is the inspection fee  refundable" map to the same key.
+    """
+    text = unicodedata.normalize("NFKC", question).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return " ".join(text.split())
+
+
+class PolicyAnswerCache:
+    """
+    Process-wide cache of service policy answers keyed by the normalized question.
+
+    Answers expire after ``ttl`` seconds and the least recently used entries are evicted beyond ``max_entries``.
+    Every ``check_interval`` seconds the policy assistant's fingerprint is compared with the one the cached
+    answers were produced with; if the assistant changed, the whole cache is dropped. The check runs on a
+    background thread, so it never adds latency to a lookup. Concurrent misses for the same question share a
+    single computation.
+    """
+
+    def __init__(self, get_fingerprint, ttl=86400, max_entries=1000, check_interval=300):
+        self._get_fingerprint = get_fingerprint
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._fingerprint = None
+        self._fingerprint_checked_at = None
+
+    def get_or_compute(self, question, compute):
+        """
+        Return the cached answer for the question, or compute, cache and return it.
+
+        Args:
+            question (str): The customer question.
+            compute (callable): Called without arguments to produce the answer on a miss.
+        """
+        self._check_fingerprint()
+        key = normalize_question(question)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self._entries.move_to_end(key)
+                metrics.increment("policy_answer_cache.hits")
+                return entry[0]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if not owner:
+            metrics.increment("policy_answer_cache.shared_misses")
+            return future.result()
+
+        metrics.increment("policy_answer_cache.misses")
+        try:
+            answer = compute()
+            future.set_result(answer)
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+        # Errors are not cached, so the next ask gets a fresh attempt
+        if not answer.startswith("Error:"):
+            with self._lock:
+                self._entries[key] = (answer, time.monotonic())
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return answer
+
+    def invalidate(self):
+        """
+        Drop every cached answer.
+        """
+        with self._lock:
+            self._entries.clear()
+        metrics.increment("policy_answer_cache.invalidations")
+        logging.info("Service policy answer cache invalidated.")
+
+    def _check_fingerprint(self):
+        """
+        Start a background check of the policy assistant if the last one is older than the check interval.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._fingerprint_checked_at is not None and now - self._fingerprint_checked_at < self.check_interval:
+                return
+            self._fingerprint_checked_at = now
+        threading.Thread(target=self._refresh_fingerprint, name="policy-fingerprint", daemon=True).start()
+
+    def _refresh_fingerprint(self):
+        """
+        Invalidate the cache if the policy assistant changed since the last check.
+        """
+        try:
+            fingerprint = self._get_fingerprint()
+        except Exception as e:
+            logging.error("Failed to check the service policy assistant for changes: %s", e)
+            return
+
+        if self._fingerprint is not None and fingerprint != self._fingerprint:
+            logging.info("Service policy assistant changed.")
+            self.invalidate()
+        self._fingerprint = fingerprint
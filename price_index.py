@@ -0,0 +1,133 @@
+from bisect import bisect_left
+from collections import namedtuple
+import re
+
+# Categorical key columns and the numeric breakpoint column (if any) indexed for each price-list sheet
+PRICE_INDEX_SPECS = {
+    "Aircon Cleaning": (("Aircon Type", "Cleaning Type"), "Horsepower"),
+    "Appliance Repair": (("Appliance Type",), None),
+    "Home Cleaning": (("Cleaning Type",), "Property Size"),
+    "Laundry": (("Clothing Type",), None),
+    "Pest Control": (("Pest Type",), None),
+}
+
+# A "RMx-RMy" price range split into its two halves, with the numbers parsed out of each half
+PriceRange = namedtuple("PriceRange", ["low_text", "high_text", "low", "high"])
+
+_NUMBER_PATTERN = re.compile(r"\d+(?:\.\d+)?")
+
+
+def parse_price_range(value):
+    """
+    Parse a price range such as "RM150-RM200" into a PriceRange, or return None if the value is not a range.
+    """
+    if not isinstance(value, str) or "-" not in value:
+        return None
+    parts = value.split("-")
+    low_number = _NUMBER_PATTERN.search(parts[0])
+    high_number = _NUMBER_PATTERN.search(parts[1])
+    return PriceRange(
+        parts[0],
+        parts[1],
+        float(low_number.group()) if low_number else None,
+        float(high_number.group()) if high_number else None
+    )
+
+
+def _is_number(value):
+    """Check whether a cell holds a usable number (not text and not NaN)."""
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and value == value
+
+
+class PriceRow:
+    """
+    One row of a price list, with its price ranges parsed up front.
+
+    Attributes:
+        index: The row's index label in the price-list DataFrame.
+        values (dict): Column name to cell value.
+        ranges (dict): Column name to PriceRange, for every cell holding a "RMx-RMy" range.
+    """
+
+    __slots__ = ("index", "values", "ranges")
+
+    def __init__(self, index, values):
+        self.index = index
+        self.values = values
+        self.ranges = {}
+        for column, value in values.items():
+            price_range = parse_price_range(value)
+            if price_range is not None:
+                self.ranges[column] = price_range
+
+    def __getitem__(self, column):
+        return self.values[column]
+
+
+class PriceIndex:
+    """
+    Compiled lookup structure for one price-list sheet.
+
+    Rows are grouped by the values of the key columns, keeping their order in the sheet. When a breakpoint
+    column is given (e.g. Horsepower), each group also keeps its sorted distinct breakpoints, so finding the
+    rows for the smallest breakpoint at or above a requested value is a binary search.
+    """
+
+    def __init__(self, price_df, key_columns, breakpoint_column=None):
+        self.key_columns = tuple(key_columns)
+        self.breakpoint_column = breakpoint_column
+        self._rows = {}
+        self._breakpoints = {}
+
+        for index, values in zip(price_df.index, price_df.to_dict("records")):
+            row = PriceRow(index, values)
+            key = tuple(values.get(column) for column in self.key_columns)
+            self._rows.setdefault(key, []).append(row)
+
+        if breakpoint_column is not None:
+            for key, rows in self._rows.items():
+                groups = {}
+                for row in rows:
+                    breakpoint = row.values.get(breakpoint_column)
+                    if _is_number(breakpoint):
+                        groups.setdefault(breakpoint, []).append(row)
+                breakpoints = sorted(groups)
+                self._breakpoints[key] = (breakpoints, [groups[b] for b in breakpoints])
+
+    def rows(self, *key):
+        """
+        Return the rows matching the key column values, in sheet order.
+        """
+        return self._rows.get(key, [])
+
+    def ceiling(self, value, *key):
+        """
+        Return the rows with the smallest breakpoint at or above the value, or an empty list if there are none.
+        """
+        breakpoints, groups = self._breakpoints.get(key, ((), ()))
+        position = bisect_left(breakpoints, value)
+        if position == len(breakpoints):
+            return []
+        return groups[position]
+
+    def span(self, column, *key):
+        """
+        Return the lowest and highest text of the price ranges in a column, taken from the first and last rows.
+
+        Cells that are not ranges contribute their whole text.
+        """
+        rows = self.rows(*key)
+        if not rows:
+            return None
+        first, last = rows[0], rows[-1]
+        low = first.ranges[column].low_text if column in first.ranges else first[column]
+        high = last.ranges[column].high_text if column in last.ranges else last[column]
+        return low, high
+
+
+def build_price_index(sheet_name, price_df):
+    """
+    Build the price index for a sheet using its entry in PRICE_INDEX_SPECS.
+    """
+    key_columns, breakpoint_column = PRICE_INDEX_SPECS[sheet_name]
+    return PriceIndex(price_df, key_columns, breakpoint_column)
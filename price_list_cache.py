@@ -0,0 +1,219 @@
+import logging
+import threading
+import time
+
+import metrics
+
+
+class _Entry:
+    """A cached price list together with the time it was loaded and the structures derived from it."""
+
+    def __init__(self, value, loaded_at):
+        self.value = value
+        self.loaded_at = loaded_at
+        self.derived = {}
+
+
+class PriceListCache:
+    """
+    Process-wide cache of price lists keyed by sheet name.
+
+    Fresh entries (younger than ``ttl`` seconds) are served directly. Stale entries are still served while a
+    background refresh reloads the sheet, unless they are older than ``max_stale`` seconds, in which case the
+    caller waits for a reload. Concurrent misses for the same sheet share a single load.
+
+    When ``seed`` is given, a sheet that is not cached yet is first looked up through it (e.g. from a local
+    snapshot). A seeded price list is served immediately as a stale entry while the sheet is reloaded in the
+    background. If a blocking reload fails, the last known price list is served instead of failing the caller.
+
+    After invalidate() the next lookup of a sheet always waits for a reload: the seed is skipped, since it can
+    be as old as the dropped entry, and loads that started before the invalidation are not cached.
+
+    The cached DataFrames are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, loader, ttl=300, max_stale=3600, seed=None):
+        self._loader = loader
+        self._seed = seed
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._refreshing = set()
+        # Invalidation generations: bumped by every invalidate(), recorded per sheet and for all sheets
+        self._generation = 0
+        self._invalidated = {}
+        self._all_invalidated = 0
+
+    def get(self, sheet_name):
+        """
+        Return the price list for the given sheet, loading it if needed.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            seedable = self._seed is not None and self._sheet_generation(sheet_name) == 0
+
+        if entry is not None:
+            age = now - entry.loaded_at
+            if age < self.ttl:
+                metrics.increment("price_list_cache.hits", sheet=sheet_name)
+                return entry.value
+            if age < self.max_stale:
+                metrics.increment("price_list_cache.stale_hits", sheet=sheet_name)
+                self._schedule_refresh(sheet_name)
+                return entry.value
+
+        if entry is None and seedable:
+            entry = self._seed_entry(sheet_name, now)
+            if entry is not None:
+                metrics.increment("price_list_cache.seeded", sheet=sheet_name)
+                self._schedule_refresh(sheet_name)
+                return entry.value
+
+        metrics.increment("price_list_cache.misses", sheet=sheet_name)
+        try:
+            return self._load(sheet_name, min_loaded_at=now)
+        except Exception as e:
+            if entry is None:
+                raise
+            metrics.increment("price_list_cache.stale_fallbacks", sheet=sheet_name)
+            logging.error("Failed to reload price list for sheet %s, serving the last known copy: %s",
+                          sheet_name, e)
+            return entry.value
+
+    def get_derived(self, sheet_name, name, builder):
+        """
+        Return a structure derived from the sheet's price list (e.g. an index), built once per load.
+
+        Args:
+            sheet_name (str): The price-list sheet.
+            name (str): Identifies the derived structure.
+            builder (callable): Called with the price list to build the structure.
+        """
+        value = self.get(sheet_name)
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            derived = entry.derived.get(name) if entry is not None and entry.value is value else None
+        if derived is not None:
+            return derived
+
+        derived = builder(value)
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is not None and entry.value is value:
+                derived = entry.derived.setdefault(name, derived)
+        return derived
+
+    def refresh(self, sheet_name):
+        """
+        Reload the given sheet now and return the new price list.
+        """
+        return self._load(sheet_name, min_loaded_at=time.monotonic())
+
+    def invalidate(self, sheet_name=None):
+        """
+        Drop the cached price list for one sheet, or for every sheet when no name is given.
+        """
+        with self._lock:
+            self._generation += 1
+            if sheet_name is None:
+                self._entries.clear()
+                self._all_invalidated = self._generation
+            else:
+                self._entries.pop(sheet_name, None)
+                self._invalidated[sheet_name] = self._generation
+        logging.info("Price list cache invalidated: %s", sheet_name or "all sheets")
+
+    def stats(self):
+        """
+        Return the cache counters and the age of every cached sheet.
+        """
+        now = time.monotonic()
+        with self._lock:
+            ages = {name: round(now - entry.loaded_at, 1) for name, entry in self._entries.items()}
+        counters = metrics.snapshot()["counters"]
+        totals = {}
+        for key, value in counters.items():
+            if key.startswith("price_list_cache."):
+                name = key.split("{", 1)[0][len("price_list_cache."):]
+                totals[name] = totals.get(name, 0) + value
+        return {"entries": ages, **totals}
+
+    def _load(self, sheet_name, min_loaded_at):
+        """
+        Load a sheet through the loader, sharing the work with concurrent callers.
+        """
+        with self._lock:
+            load_lock = self._load_locks.setdefault(sheet_name, threading.Lock())
+
+        with load_lock:
+            # Another caller may have loaded the sheet while we were waiting
+            with self._lock:
+                entry = self._entries.get(sheet_name)
+            if entry is not None and entry.loaded_at >= min_loaded_at:
+                return entry.value
+
+            with self._lock:
+                generation = self._sheet_generation(sheet_name)
+            start = time.monotonic()
+            value = self._loader(sheet_name)
+            loaded_at = time.monotonic()
+            metrics.observe("price_list_cache.load_seconds", loaded_at - start, sheet=sheet_name)
+
+            with self._lock:
+                if self._sheet_generation(sheet_name) != generation:
+                    # Invalidated while loading, so the result may predate the change that caused it
+                    metrics.increment("price_list_cache.discarded_loads", sheet=sheet_name)
+                    logging.info("Price list load for sheet %s discarded after an invalidation.", sheet_name)
+                    return value
+                self._entries[sheet_name] = _Entry(value, loaded_at)
+            logging.info("Price list loaded for sheet: %s", sheet_name)
+            return value
+
+    def _sheet_generation(self, sheet_name):
+        """
+        Return the generation of the last invalidation covering a sheet, 0 if none. The caller must hold the lock.
+        """
+        return max(self._invalidated.get(sheet_name, 0), self._all_invalidated)
+
+    def _seed_entry(self, sheet_name, now):
+        """
+        Cache the seeded price list for a sheet as an already expired entry, or return None if there is none.
+        """
+        try:
+            value = self._seed(sheet_name)
+        except Exception as e:
+            logging.error("Failed to seed price list for sheet %s: %s", sheet_name, e)
+            return None
+        if value is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is None:
+                entry = self._entries[sheet_name] = _Entry(value, now - self.ttl)
+        return entry
+
+    def _schedule_refresh(self, sheet_name):
+        """
+        Start a background reload of the given sheet unless one is already running.
+        """
+        with self._lock:
+            if sheet_name in self._refreshing:
+                return
+            self._refreshing.add(sheet_name)
+
+        def refresh():
+            try:
+                self.refresh(sheet_name)
+                metrics.increment("price_list_cache.refreshes", sheet=sheet_name)
+            except Exception as e:
+                metrics.increment("price_list_cache.refresh_failures", sheet=sheet_name)
+                logging.error("Failed to refresh price list for sheet %s: %s", sheet_name, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(sheet_name)
+
+        threading.Thread(target=refresh, name=f"price-list-refresh-{sheet_name}", daemon=True).start()
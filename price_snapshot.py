@@ -0,0 +1,252 @@
+import os
+import json
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:
+    # Windows has no fcntl; msvcrt locks the manifest lock file instead
+    fcntl = None
+    import msvcrt
+
+# Price-list sheets read by the estimate tools
+PRICE_LIST_SHEETS = ["Aircon Cleaning", "Appliance Repair", "Home Cleaning", "Laundry", "Pest Control"]
+
+
+def _slug(sheet_name):
+    """Turn a sheet name into a file-name friendly slug, e.g. "Aircon Cleaning" -> "aircon_cleaning"."""
+    return "".join(c if c.isalnum() else "_" for c in sheet_name.lower())
+
+
+# Schema metadata key listing the columns stored as JSON text
+_JSON_COLUMNS_KEY = b"price_snapshot.json_columns"
+
+
+def _to_table(price_df):
+    """
+    Convert a price list to an Arrow table.
+
+    Sheets rows mix types within a column, e.g. numbers and "" for blank cells, which Arrow cannot store in one
+    column. Such object columns are stored as JSON text and listed in the schema metadata, so load() can restore
+    the original values.
+    """
+    import pyarrow as pa
+
+    price_df = price_df.copy()
+    json_columns = []
+    for column in price_df.columns:
+        values = price_df[column]
+        if values.dtype == object and not values.map(lambda value: value is None or isinstance(value, str)).all():
+            price_df[column] = values.map(lambda value: json.dumps(value, default=str))
+            json_columns.append(str(column))
+
+    table = pa.Table.from_pandas(price_df, preserve_index=True)
+    metadata = dict(table.schema.metadata or {})
+    metadata[_JSON_COLUMNS_KEY] = json.dumps(json_columns).encode("utf-8")
+    return table.replace_schema_metadata(metadata)
+
+
+def _from_table(table):
+    """
+    Convert an Arrow table written by _to_table back to a price list.
+    """
+    json_columns = json.loads((table.schema.metadata or {}).get(_JSON_COLUMNS_KEY, b"[]"))
+    price_df = table.to_pandas()
+    for column in price_df.columns:
+        if str(column) in json_columns:
+            price_df[column] = price_df[column].map(json.loads)
+    return price_df
+
+
+class PriceSnapshotStore:
+    """
+    Versioned on-disk snapshots of price lists in Arrow IPC format.
+
+    Each sheet is written to ``<slug>.v<version>.arrow`` and tracked in ``manifest.json`` with its version,
+    content hash and fetch time. The version only increases when the content changes. Snapshots are read
+    through a memory map, so loading one at startup is cheap. Files are written under unique temporary names
+    and the manifest is updated under a file lock, so several processes can share one directory.
+    """
+
+    def __init__(self, directory, keep_versions=3):
+        self.directory = directory
+        self.keep_versions = keep_versions
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.directory, "manifest.json")
+
+    def read_manifest(self):
+        """
+        Return the manifest, mapping sheet name to its latest snapshot details.
+        """
+        try:
+            with open(self.manifest_path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def save(self, sheet_name, price_df):
+        """
+        Persist a price list as the sheet's latest snapshot.
+
+        The snapshot version is stored in ``price_df.attrs["snapshot_version"]``.
+
+        Returns:
+            int: The snapshot version, or None if the snapshot could not be written.
+        """
+        try:
+            content_hash = hashlib.sha256(price_df.to_json(orient="split").encode("utf-8")).hexdigest()
+
+            with self._lock, self._manifest_lock():
+                manifest = self.read_manifest()
+                current = manifest.get(sheet_name)
+                if current and current["sha256"] == content_hash:
+                    version = current["version"]
+                else:
+                    version = (current["version"] + 1) if current else 1
+                    file_name = f"{_slug(sheet_name)}.v{version}.arrow"
+                    self._write_table(os.path.join(self.directory, file_name), _to_table(price_df))
+                    manifest[sheet_name] = {
+                        "version": version,
+                        "sha256": content_hash,
+                        "file": file_name,
+                        "fetched_at": datetime.now(timezone.utc).isoformat(timespec="seconds")
+                    }
+                    self._write_manifest(manifest)
+                    self._prune(sheet_name, version)
+                    logging.info("Price snapshot for %s saved as version %d.", sheet_name, version)
+
+            price_df.attrs["snapshot_version"] = version
+            return version
+        except Exception as e:
+            logging.error("Failed to save price snapshot for %s: %s", sheet_name, e)
+            return None
+
+    def load(self, sheet_name):
+        """
+        Load the latest snapshot of a sheet, or return None if there is none.
+        """
+        entry = self.read_manifest().get(sheet_name)
+        if entry is None:
+            return None
+
+        # pyarrow is imported on first use to keep module import cheap
+        import pyarrow as pa
+
+        try:
+            with pa.memory_map(os.path.join(self.directory, entry["file"])) as source:
+                price_df = _from_table(pa.ipc.open_file(source).read_all())
+        except Exception as e:
+            logging.error("Failed to load price snapshot for %s: %s", sheet_name, e)
+            return None
+
+        price_df.attrs["snapshot_version"] = entry["version"]
+        logging.info("Price snapshot for %s loaded, version %d from %s.", sheet_name, entry["version"],
+                     entry["fetched_at"])
+        return price_df
+
+    @contextmanager
+    def _manifest_lock(self):
+        """
+        Hold an exclusive lock on the snapshot directory across processes while the manifest is updated.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, "manifest.lock"), "a+b") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                # LK_LOCK retries for about 10 seconds before giving up
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    @contextmanager
+    def _temp_file(self, path, mode):
+        """
+        Open a uniquely named temporary file next to ``path`` and move it into place once written.
+        """
+        tmp = tempfile.NamedTemporaryFile(mode, dir=self.directory, prefix=os.path.basename(path) + ".",
+                                          suffix=".tmp", delete=False, encoding=None if "b" in mode else "utf-8")
+        try:
+            with tmp:
+                yield tmp
+            os.replace(tmp.name, path)
+        except BaseException:
+            if os.path.exists(tmp.name):
+                os.remove(tmp.name)
+            raise
+
+    def _write_table(self, path, table):
+        """
+        Write an Arrow table to a file atomically.
+        """
+        import pyarrow as pa
+
+        with self._temp_file(path, "wb") as sink:
+            with pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+
+    def _write_manifest(self, manifest):
+        """
+        Write the manifest atomically.
+        """
+        with self._temp_file(self.manifest_path, "w") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+
+    def _prune(self, sheet_name, latest_version):
+        """
+        Delete snapshot files of a sheet older than the kept versions.
+        """
+        for version in range(1, latest_version - self.keep_versions + 1):
+            path = os.path.join(self.directory, f"{_slug(sheet_name)}.v{version}.arrow")
+            if os.path.exists(path):
+                os.remove(path)
+
+
+# Snapshot store used by the shared price-list cache
+price_snapshot_store = PriceSnapshotStore(os.getenv("PRICE_SNAPSHOT_DIR", "price_snapshots"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prebuild local price-list snapshots from Google Sheets.")
+    parser.add_argument("sheets", nargs="*", default=PRICE_LIST_SHEETS,
+                        help="Sheets to snapshot (default: all price-list sheets).")
+    parser.add_argument("--list", action="store_true", help="Show the current snapshot manifest and exit.")
+    args = parser.parse_args()
+
+    if args.list:
+        print(json.dumps(price_snapshot_store.read_manifest(), indent=2, sort_keys=True))
+        return
+
+    # Imported here so listing snapshots does not need Google credentials
+    from service_utils import fetch_and_snapshot_price_list
+
+    failed = False
+    for sheet_name in args.sheets:
+        try:
+            price_df = fetch_and_snapshot_price_list(sheet_name)
+            print(f"{sheet_name}: version {price_df.attrs.get('snapshot_version')} ({len(price_df)} rows)")
+        except Exception as e:
+            failed = True
+            print(f"{sheet_name}: failed ({e})")
+
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
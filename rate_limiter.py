@@ -0,0 +1,132 @@
+import threading
+import logging
+import time
+import os
+
+import metrics
+
+# Requests per second and burst size per upstream endpoint class. Sheets defaults stay under the per-user quota
+# of 60 reads and 60 writes per minute.
+DEFAULT_RATE_LIMITS = {
+    "openai.moderation": (50, 100),
+    "openai.threads": (20, 40),
+    "openai.messages": (50, 100),
+    "openai.runs": (50, 100),
+    "openai.assistants": (5, 10),
+    "sheets.read": (1, 5),
+    "sheets.write": (1, 5),
+}
+
+# Reply shown to a customer when a turn is not admitted
+BUSY_REPLY = "We're handling a lot of requests right now. Please try again in a moment."
+
+
+class UpstreamBusyError(Exception):
+    """Raised when a call is not admitted because its upstream is saturated."""
+
+    def __init__(self, endpoint, wait=None):
+        detail = f" (would wait {wait:.1f}s)" if wait is not None else " (wait queue full)"
+        super().__init__(f"{endpoint} is busy{detail}.")
+        self.endpoint = endpoint
+
+
+class TokenBucket:
+    """
+    Token bucket that hands out reservations, so waiting callers are served in arrival order.
+
+    Tokens refill at ``rate`` per second up to ``burst``. A caller that finds no token reserves one anyway,
+    putting the bucket into debt, and sleeps until its token would have been refilled.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.waiting = 0
+
+    def wait_time(self, tokens, now):
+        """Refill the bucket and return how long a reservation of ``tokens`` would wait."""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+
+class RateLimiter:
+    """
+    Process-wide rate limiter with one token bucket per upstream endpoint class.
+
+    Calls that start a customer turn use admission control: if ``max_queue`` callers are already waiting on the
+    endpoint, or the call would wait longer than ``max_wait`` seconds, UpstreamBusyError is raised right away so
+    the customer gets a quick "busy, please retry" reply instead of a slow timeout. Other calls, e.g. polls of a
+    run already started or background writes, always wait their turn.
+    """
+
+    def __init__(self, limits, max_queue=100, max_wait=5.0):
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._buckets = {endpoint: TokenBucket(rate, burst) for endpoint, (rate, burst) in limits.items()}
+
+    def acquire(self, endpoint, tokens=1, admission=False):
+        """
+        Wait until the endpoint may be called.
+
+        Args:
+            endpoint (str): The endpoint class, e.g. "openai.runs". Unknown classes are not limited.
+            tokens (int): The number of upstream requests about to be made.
+            admission (bool): Reject instead of queueing when the endpoint is saturated.
+
+        Raises:
+            UpstreamBusyError: If ``admission`` is set and the call is not admitted.
+        """
+        bucket = self._buckets.get(endpoint)
+        if bucket is None:
+            return
+
+        with self._lock:
+            wait = bucket.wait_time(tokens, time.monotonic())
+            if admission and wait > 0 and (bucket.waiting >= self.max_queue or wait > self.max_wait):
+                metrics.increment("rate_limiter.rejected", endpoint=endpoint)
+                logging.warning("Rate limiter rejected a call to %s: %d waiting, %.1fs wait.", endpoint,
+                                bucket.waiting, wait)
+                raise UpstreamBusyError(endpoint, wait)
+            bucket.tokens -= tokens
+            if wait > 0:
+                bucket.waiting += 1
+                metrics.set_gauge("rate_limiter.queue_depth", bucket.waiting, endpoint=endpoint)
+
+        metrics.observe("rate_limiter.wait_seconds", wait, endpoint=endpoint)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    bucket.waiting -= 1
+                    metrics.set_gauge("rate_limiter.queue_depth", bucket.waiting, endpoint=endpoint)
+
+
+def parse_rate_limits(spec):
+    """
+    Parse overrides such as "openai.runs=20/40,sheets.write=0.5/2" into {endpoint: (rate, burst)}.
+    """
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        endpoint, value = item.split("=", 1)
+        rate, _, burst = value.partition("/")
+        limits[endpoint.strip()] = (float(rate), float(burst or rate))
+    return limits
+
+
+def _create_rate_limiter():
+    limits = dict(DEFAULT_RATE_LIMITS)
+    limits.update(parse_rate_limits(os.getenv("RATE_LIMITS", "")))
+    return RateLimiter(
+        limits,
+        max_queue=int(os.getenv("RATE_LIMIT_MAX_QUEUE", "100")),
+        max_wait=float(os.getenv("RATE_LIMIT_MAX_WAIT_SECONDS", "5"))
+    )
+
+
+# Limiter shared by every session, tool and background job in the process
+rate_limiter = _create_rate_limiter()
@@ -0,0 +1,330 @@
+from collections import deque
+from contextlib import contextmanager
+import threading
+import logging
+import random
+import time
+import os
+
+import metrics
+from rate_limiter import rate_limiter, UpstreamBusyError
+
+# Class names of client errors raised when a request timed out or never reached the upstream: openai's
+# APIConnectionError (and its APITimeoutError) and httpx's TransportError
+_CONNECTION_ERROR_NAMES = {"APIConnectionError", "TransportError"}
+
+
+class CircuitOpenError(UpstreamBusyError):
+    """Raised without calling the upstream while its circuit breaker is open."""
+
+    def __init__(self, upstream, retry_in):
+        Exception.__init__(self, f"{upstream} is unavailable, circuit open for another {retry_in:.0f}s.")
+        self.endpoint = upstream
+
+
+def error_status(error):
+    """
+    Return the HTTP status of an upstream error, from openai's ``status_code``, googleapiclient's
+    ``resp.status`` or gspread's ``response.status_code``, or None.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "resp", None), "status", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def classify_error(error):
+    """
+    Classify an upstream error for retrying.
+
+    Returns:
+        str: "throttled" for 429, "server" for 5xx, "connection" for timeouts and connection failures, or None
+        for errors that a retry would not fix.
+    """
+    status = error_status(error)
+    if status == 429:
+        return "throttled"
+    if status is not None:
+        return "server" if status >= 500 else None
+    if isinstance(error, (TimeoutError, ConnectionError)) or any(
+            cls.__name__ in _CONNECTION_ERROR_NAMES for cls in type(error).__mro__):
+        return "connection"
+    return None
+
+
+def _retry_after(error):
+    """Return the Retry-After delay in seconds sent with an error response, or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    try:
+        return float(headers.get("retry-after")) if headers else None
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """
+    Caps retries at a fraction of the requests made in a sliding window, so retries cannot multiply the load on
+    an upstream that is already failing. ``min_per_second`` retries are always allowed, so a quiet process can
+    still retry.
+    """
+
+    def __init__(self, ratio=0.2, min_per_second=1.0, window=10.0):
+        self.ratio = ratio
+        self.min_per_second = min_per_second
+        self.window = window
+        self._lock = threading.Lock()
+        self._requests = deque()
+        self._retries = deque()
+
+    def _expire(self, now):
+        for events in (self._requests, self._retries):
+            while events and now - events[0] > self.window:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            self._requests.append(now)
+
+    def try_retry(self):
+        """Take a retry from the budget, returning False if it is spent."""
+        with self._lock:
+            now = time.monotonic()
+            self._expire(now)
+            allowed = max(self.min_per_second * self.window, self.ratio * len(self._requests))
+            if len(self._retries) >= allowed:
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """
+    Fails calls fast after ``failure_threshold`` consecutive upstream failures.
+
+    The breaker opens for ``reset_timeout`` seconds. After that a single probe call is let through, and
+    concurrent calls still fail fast. A successful probe closes the breaker; a failed one opens it again. A probe
+    that never reports back is given up after ``probe_timeout`` seconds, so the next call can probe instead.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name, failure_threshold=5, reset_timeout=30.0, probe_timeout=60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.probe_timeout = probe_timeout
+        self.state = self.CLOSED
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def before_call(self):
+        """
+        Raises:
+            CircuitOpenError: If the breaker is open, or half open with a probe already in flight.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            now = time.monotonic()
+            retry_in = self._opened_at + self.reset_timeout - now
+            if self.state == self.OPEN and retry_in <= 0:
+                self._set_state(self.HALF_OPEN)
+            if self._probing and now - self._probe_started > self.probe_timeout:
+                logging.warning("Circuit breaker probe for %s did not report back, probing again.", self.name)
+                self._probing = False
+            if self.state == self.HALF_OPEN and not self._probing:
+                self._probing = True
+                self._probe_started = now
+                return
+        metrics.increment("circuit_breaker.rejected", upstream=self.name)
+        raise CircuitOpenError(self.name, max(0.0, retry_in))
+
+    def release_probe(self):
+        """
+        Give up the probe of a call that was admitted but never reached the upstream, without changing state.
+        """
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            if self.state != self.CLOSED:
+                self._set_state(self.CLOSED)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+                if self.state != self.OPEN:
+                    self._set_state(self.OPEN)
+
+    def _set_state(self, state):
+        """Change state; the caller must hold the lock."""
+        self.state = state
+        metrics.set_gauge("circuit_breaker.open", int(state != self.CLOSED), upstream=self.name)
+        log = logging.warning if state == self.OPEN else logging.info
+        log("Circuit breaker for %s is now %s.", self.name, state)
+
+
+class Upstream:
+    """
+    Resilience policy for calls to one upstream service: rate limiting, classified retries with jittered
+    exponential backoff, a retry budget and a circuit breaker.
+    """
+
+    def __init__(self, name, breaker, budget, max_attempts=3, base_backoff=0.5, max_backoff=8.0):
+        self.name = name
+        self.breaker = breaker
+        self.budget = budget
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+
+    def admit(self, endpoint, tokens=1, admission=False):
+        """
+        Check the circuit breaker and wait for the rate limiter. The caller must report the outcome of the call
+        with record_outcome().
+        """
+        self.breaker.before_call()
+        try:
+            rate_limiter.acquire(endpoint, tokens=tokens, admission=admission)
+        except BaseException:
+            self.breaker.release_probe()
+            raise
+
+    def record_outcome(self, error=None):
+        """
+        Report the outcome of an admitted call to the circuit breaker.
+
+        Returns:
+            str: The classification of ``error``, see classify_error().
+        """
+        kind = classify_error(error) if error is not None else None
+        if kind is None:
+            # The upstream answered, so it is healthy even if the request was rejected
+            self.breaker.record_success()
+        else:
+            self.breaker.record_failure()
+        return kind
+
+    @contextmanager
+    def guard(self, endpoint, tokens=1, admission=False):
+        """
+        Admit a call made outside call(), e.g. a stream, and report its outcome when the block exits. Nothing is
+        retried, since part of a stream may already have been used.
+        """
+        self.admit(endpoint, tokens=tokens, admission=admission)
+        try:
+            yield
+        except Exception as e:
+            kind = self.record_outcome(e)
+            if kind is not None:
+                metrics.increment("upstream.failures", upstream=self.name, endpoint=endpoint, kind=kind)
+            raise
+        except BaseException:
+            # Abandoned part way, e.g. a reply generator closed by a disconnected client: the outcome is unknown
+            self.breaker.release_probe()
+            raise
+        else:
+            self.breaker.record_success()
+
+    def call(self, endpoint, func, *args, idempotent=True, admission=False, tokens=1, **kwargs):
+        """
+        Call ``func(*args, **kwargs)`` against the upstream, retrying transient failures.
+
+        Throttled (429) calls are always retried, since the upstream did not process them. Server errors and
+        timeouts are only retried if the call is ``idempotent``, because a request that failed that way may
+        still have taken effect.
+
+        Args:
+            endpoint (str): The rate limiter endpoint class of the call, e.g. "openai.runs".
+            func (callable): The upstream call.
+            idempotent (bool): Whether the call is safe to repeat after an ambiguous failure.
+            admission (bool): Reject the first attempt with UpstreamBusyError if the endpoint is saturated.
+            tokens (int): The number of upstream requests ``func`` makes.
+
+        Raises:
+            CircuitOpenError: If the upstream's circuit breaker is open.
+            UpstreamBusyError: If the call is not admitted by the rate limiter.
+        """
+        self.budget.record_request()
+        attempt = 1
+        while True:
+            self.admit(endpoint, tokens=tokens, admission=admission and attempt == 1)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                if not isinstance(e, Exception):
+                    self.breaker.release_probe()
+                    raise
+                kind = self.record_outcome(e)
+                if kind is None:
+                    raise
+                metrics.increment("upstream.failures", upstream=self.name, endpoint=endpoint, kind=kind)
+
+                if attempt >= self.max_attempts or (kind != "throttled" and not idempotent):
+                    raise
+                if not self.budget.try_retry():
+                    metrics.increment("upstream.retry_budget_exhausted", upstream=self.name)
+                    raise
+
+                delay = _retry_after(e)
+                if delay is None:
+                    # Full jitter spreads out the retries of callers that failed together
+                    delay = random.uniform(0, min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1)))
+                metrics.increment("upstream.retries", upstream=self.name, endpoint=endpoint, kind=kind)
+                logging.warning("%s call failed (%s, attempt %d), retrying in %.2fs: %s", endpoint, kind, attempt,
+                                delay, e)
+                time.sleep(min(delay, self.max_backoff))
+                attempt += 1
+            else:
+                self.breaker.record_success()
+                return result
+
+
+def _create_upstream(name):
+    return Upstream(
+        name,
+        CircuitBreaker(name, failure_threshold=int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5")),
+                       reset_timeout=float(os.getenv("CIRCUIT_RESET_SECONDS", "30")),
+                       probe_timeout=float(os.getenv("CIRCUIT_PROBE_TIMEOUT_SECONDS", "60"))),
+        RetryBudget(ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+                    min_per_second=float(os.getenv("RETRY_BUDGET_MIN_PER_SECOND", "1"))),
+        max_attempts=int(os.getenv("UPSTREAM_MAX_ATTEMPTS", "3")),
+        base_backoff=float(os.getenv("UPSTREAM_BACKOFF_BASE_SECONDS", "0.5")),
+        max_backoff=float(os.getenv("UPSTREAM_BACKOFF_MAX_SECONDS", "8"))
+    )
+
+
+# One policy per upstream service, shared by every session, tool and background job in the process
+upstreams = {"openai": _create_upstream("openai"), "sheets": _create_upstream("sheets")}
+
+
+def call_upstream(endpoint, func, *args, **kwargs):
+    """
+    Call ``func`` through the policy of the upstream named by the endpoint class, e.g. "openai" for
+    "openai.runs". See Upstream.call for the options.
+    """
+    return upstreams[endpoint.split(".", 1)[0]].call(endpoint, func, *args, **kwargs)
+
+
+def guard_upstream(endpoint, tokens=1, admission=False):
+    """
+    Context manager admitting a call that cannot go through call_upstream, e.g. a stream, and reporting its
+    outcome to the upstream's circuit breaker. See Upstream.guard.
+    """
+    return upstreams[endpoint.split(".", 1)[0]].guard(endpoint, tokens=tokens, admission=admission)
@@ -0,0 +1,122 @@
+from collections import OrderedDict
+import logging
+import threading
+import random
+import time
+import os
+
+import metrics
+from tracing import span
+from resilience import call_upstream
+
+# Statuses in which a run is still being processed by OpenAI
+ACTIVE_RUN_STATUSES = {"queued", "in_progress", "cancelling"}
+
+# Statuses after which a run will not change any more
+TERMINAL_RUN_STATUSES = {"completed", "failed", "expired", "cancelled", "incomplete"}
+
+
+class RunPollTimeout(Exception):
+    """Raised when a run is still active once the polling deadline has passed."""
+
+    def __init__(self, run):
+        super().__init__(f"Run {run.id} still {run.status} at the polling deadline.")
+        self.run = run
+
+
+class RunPoller:
+    """
+    Polls assistant runs with exponential backoff and jitter until they need attention.
+
+    Polling starts at ``initial_interval`` seconds and grows by ``backoff`` up to ``max_interval``, with each wait
+    randomised by +/- ``jitter`` so concurrent sessions do not poll in lockstep. Polls and time spent waiting are
+    recorded per run and as histograms.
+    """
+
+    def __init__(self, initial_interval=0.25, max_interval=2.0, backoff=1.6, jitter=0.2, timeout=90,
+                 max_tracked_runs=1000):
+        self.initial_interval = initial_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.timeout = timeout
+        self.max_tracked_runs = max_tracked_runs
+        self._lock = threading.Lock()
+        self._run_stats = OrderedDict()
+
+    def wait(self, client, thread_id, run, deadline=None):
+        """
+        Poll a run until it requires action or reaches a terminal status.
+
+        Args:
+            client: The OpenAI client.
+            thread_id (str): The thread the run belongs to.
+            run: The run as last returned by the API.
+            deadline (float, optional): A time.monotonic() deadline; defaults to ``timeout`` seconds from now.
+
+        Returns:
+            The latest run object.
+
+        Raises:
+            RunPollTimeout: If the run is still active at the deadline.
+        """
+        start = time.monotonic()
+        if deadline is None:
+            deadline = start + self.timeout
+
+        polls = 0
+        interval = self.initial_interval
+        try:
+            while run.status in ACTIVE_RUN_STATUSES:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    metrics.increment("run_poller.timeouts")
+                    raise RunPollTimeout(run)
+
+                time.sleep(min(remaining, interval * random.uniform(1 - self.jitter, 1 + self.jitter)))
+                with span("openai.runs.retrieve", run_id=run.id, poll=polls + 1) as poll_span:
+                    run = call_upstream("openai.runs", client.beta.threads.runs.retrieve, thread_id=thread_id,
+                                        run_id=run.id)
+                    poll_span.set_attribute("status", run.status)
+                polls += 1
+                interval = min(self.max_interval, interval * self.backoff)
+        finally:
+            self._record(run, polls, time.monotonic() - start)
+
+        if run.status in ("failed", "expired", "cancelled"):
+            logging.error("Run %s ended with status %s: %s", run.id, run.status, run.last_error)
+        elif run.status == "incomplete":
+            logging.warning("Run %s is incomplete: %s", run.id, run.incomplete_details)
+        return run
+
+    def get_run_stats(self, run_id):
+        """
+        Return the number of polls and seconds spent waiting for a run, or None if it is not tracked.
+        """
+        with self._lock:
+            stats = self._run_stats.get(run_id)
+            return dict(stats) if stats else None
+
+    def _record(self, run, polls, waited):
+        """
+        Accumulate polling statistics for a run.
+        """
+        metrics.observe("run_poller.polls", polls)
+        metrics.observe("run_poller.wait_seconds", waited)
+        with self._lock:
+            stats = self._run_stats.pop(run.id, None) or {"polls": 0, "wait_seconds": 0.0}
+            stats["polls"] += polls
+            stats["wait_seconds"] += waited
+            stats["status"] = run.status
+            self._run_stats[run.id] = stats
+            while len(self._run_stats) > self.max_tracked_runs:
+                self._run_stats.popitem(last=False)
+        logging.info("Run %s is %s after %d poll(s), %.2fs waiting.", run.id, run.status, polls, waited)
+
+
+# Poller shared by the chat client and the service policy lookup
+run_poller = RunPoller(
+    initial_interval=float(os.getenv("RUN_POLL_INITIAL_INTERVAL_SECONDS", "0.25")),
+    max_interval=float(os.getenv("RUN_POLL_MAX_INTERVAL_SECONDS", "2")),
+    timeout=float(os.getenv("RUN_POLL_TIMEOUT_SECONDS", "90"))
+)
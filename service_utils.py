@@ -1,14 +1,18 @@
-from googleapiclient.discovery import build
-import streamlit as st
-import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
-from datetime import datetime, timedelta
-from openai import OpenAI
+from google_clients import google_client_provider
+from openai_transport import get_openai_client
+from price_list_cache import PriceListCache
+from price_index import build_price_index
+from price_snapshot import price_snapshot_store
+from booking_writer import create_booking_writer
+from booking_journal import create_booking_journal
+from run_poller import run_poller, RunPollTimeout
+from policy_answer_cache import PolicyAnswerCache
+from tracing import span
+from business_calendar import business_calendar, SAME_DAY, TOO_SOON, CLOSED_DAY, PUBLIC_HOLIDAY
+from resilience import call_upstream
 import logging
 import time
 import os
-import json
 
 # Configure logging
 logging.basicConfig(
@@ -18,34 +22,52 @@ logging.basicConfig(
 
 
 def get_google_creds_and_service(service_name=None, version=None):
-    """Create Google API credentials and return the appropriate service client."""
-    google_sheet_scopes = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive",
-        "https://www.googleapis.com/auth/spreadsheets"
-    ]
-    google_sheet_key_dict = json.loads(st.secrets["TEXTKEY"])
-    creds = Credentials.from_service_account_info(google_sheet_key_dict, scopes=google_sheet_scopes)
-
+    """Return the appropriate Google service client from the shared client provider."""
     if service_name and version:
-        return build(service_name, version, credentials=creds)
+        return google_client_provider.get_service(service_name, version)
     else:
-        sheets_client = gspread.authorize(creds)
-        return sheets_client
+        return google_client_provider.get_gspread_client()
 
 
-def get_service_price_list(sheet_name):
+# Shared booking writer, so save_* tools coalesce their appends into batched Sheets requests
+booking_writer = create_booking_writer(lambda: get_google_creds_and_service(service_name='sheets', version='v4'))
+
+
+# Durable journal in front of the booking writer: save_* tools return once a row is committed locally, and the
+# journal delivers it to Sheets in the background with retries
+booking_journal = create_booking_journal(booking_writer.submit)
+
+
+def append_booking_row(range_name, row):
+    """
+    Record a booking row in the durable journal; it is appended to its tab in the background.
+
+    A save repeated by the same tool call is recorded once and still reported as saved, since the first save was.
+    """
+    booking_journal.record(range_name, row)
+    return True
+
+
+def _fetch_service_price_list(sheet_name):
     """Fetch data from Google Sheets."""
+    # Imported on first use, so importing the service modules does not load pandas
+    from gspread_dataframe import get_as_dataframe
+
     folder_id = os.getenv("REPORT_FOLDER_ID")
 
     sheets_client = get_google_creds_and_service()
 
-    # Open the Google Sheet
-    spreadsheet = sheets_client.open(title="Home Services Price List", folder_id=folder_id)
-    worksheet = spreadsheet.worksheet(title=sheet_name)
+    def read_worksheet():
+        # Open the Google Sheet
+        spreadsheet = sheets_client.open(title="Home Services Price List", folder_id=folder_id)
+        worksheet = spreadsheet.worksheet(title=sheet_name)
 
-    # Read the existing data from the Google Sheet
-    existing_df = get_as_dataframe(worksheet)
+        # Read the existing data from the Google Sheet
+        return get_as_dataframe(worksheet)
+
+    with span("sheets.read", sheet=sheet_name):
+        # Opening the spreadsheet, finding the worksheet and reading its values are three requests
+        existing_df = call_upstream("sheets.read", read_worksheet, tokens=3)
 
     # Drop rows that are completely empty
     existing_df = existing_df.dropna(how='all')
@@ -56,6 +78,40 @@ def get_service_price_list(sheet_name):
     return existing_df
 
 
+def fetch_and_snapshot_price_list(sheet_name):
+    """Fetch a price list from Google Sheets and save it as the latest local snapshot."""
+    price_df = _fetch_service_price_list(sheet_name)
+    price_snapshot_store.save(sheet_name, price_df)
+    return price_df
+
+
+# Shared price-list cache, so estimate tools do not download the sheet on every call. Sheets not cached yet are
+# served from their local snapshot while Google Sheets is checked in the background.
+price_list_cache = PriceListCache(
+    fetch_and_snapshot_price_list,
+    ttl=float(os.getenv("PRICE_LIST_CACHE_TTL_SECONDS", "300")),
+    max_stale=float(os.getenv("PRICE_LIST_CACHE_MAX_STALE_SECONDS", "3600")),
+    seed=price_snapshot_store.load
+)
+
+
+def get_service_price_list(sheet_name):
+    """Return the price list for a service, served from the shared price-list cache."""
+    return price_list_cache.get(sheet_name)
+
+
+def get_price_index(sheet_name):
+    """Return the compiled price index for a service, rebuilt only when its price list is reloaded."""
+    return price_list_cache.get_derived(
+        sheet_name, "price_index", lambda price_df: build_price_index(sheet_name, price_df)
+    )
+
+
+def invalidate_service_price_list(sheet_name=None):
+    """Drop cached price lists so the next lookup reads Google Sheets again."""
+    price_list_cache.invalidate(sheet_name)
+
+
 def check_customer_disagreement_with_price(customer_budget):
     return ("Tell the customer that you will check vendors who can offer services within their budget "
             f"(RM {customer_budget}) and will get back to them soon. At the same time, "
@@ -81,11 +137,14 @@ def check_issue_description_complete():
             "Kindly ask them to notify you once they have uploaded the video or image. ")
 
 
-def is_service_policy_question(customer_question):
+# Policy runs are polled for less than the tool call timeout, so a slow run fails the tool call cleanly
+POLICY_RUN_TIMEOUT_SECONDS = float(os.getenv("POLICY_RUN_TIMEOUT_SECONDS", "45"))
+
+
+def _ask_service_policy_assistant(customer_question):
     try:
-        # Initialize the OpenAI client and create a new thread
-        client = OpenAI()
-        thread = client.beta.threads.create()
+        # Use the shared OpenAI client
+        client = get_openai_client()
 
         # Prepare the prompt for the assistant
         prompt = (
@@ -95,37 +154,37 @@ def is_service_policy_question(customer_question):
             "indicate that the query will be passed to our human concierge for further assistance."
         )
 
-        # Send the message to the assistant
-        client.beta.threads.messages.create(
-            thread_id=thread.id,
-            role="user",
-            content=prompt
-        )
-
-        # Start the assistant run and poll for completion
-        run = client.beta.threads.runs.create_and_poll(
-            thread_id=thread.id,
-            assistant_id=os.getenv("SERVICE_POLICY_ASSISTANT_ID")
-        )
-
-        # Set maximum iterations and sleep time
-        iteration = 0
-
-        # Poll until the run is completed or we reach the max iteration count
-        while run.status != "completed" and iteration < 10:
-            logging.info(f"Polling iteration {iteration}, current status: {run.status}")
-            time.sleep(3)
-            run = client.beta.threads.runs.retrieve(
-                thread_id=thread.id,
-                run_id=run.id
+        # Create the thread with the message and start the assistant run in a single request
+        with span("openai.threads.create_and_run", purpose="service_policy"):
+            run = call_upstream(
+                "openai.runs",
+                client.beta.threads.create_and_run,
+                idempotent=False,
+                assistant_id=os.getenv("SERVICE_POLICY_ASSISTANT_ID"),
+                thread={"messages": [{"role": "user", "content": prompt}]}
             )
-            iteration += 1
+        try:
+            run = run_poller.wait(client, run.thread_id, run,
+                                  deadline=time.monotonic() + POLICY_RUN_TIMEOUT_SECONDS)
+        except RunPollTimeout as e:
+            # Stop the abandoned run rather than leave it using tokens
+            try:
+                call_upstream("openai.runs", client.beta.threads.runs.cancel,
+                              thread_id=e.run.thread_id, run_id=e.run.id)
+            except Exception as cancel_error:
+                logging.warning("Failed to cancel service policy run %s: %s", e.run.id, cancel_error)
+            raise
+
+        if run.status != "completed":
+            logging.error("Service policy run ended with status: %s", run.status)
+            return "Error: No response from the assistant."
 
         # Retrieve and return the final message content
-        messages = list(client.beta.threads.messages.list(
-            thread_id=thread.id,
-            run_id=run.id
-        ))
+        with span("openai.messages.list", run_id=run.id):
+            messages = call_upstream("openai.messages", lambda: list(client.beta.threads.messages.list(
+                thread_id=run.thread_id,
+                run_id=run.id
+            )))
 
         # Check if any messages were returned and extract the content
         if messages and messages[0].content:
@@ -139,33 +198,58 @@ def is_service_policy_question(customer_question):
         raise
 
 
+def _service_policy_assistant_fingerprint():
+    """Fingerprint the service policy assistant, so cached answers are dropped when it changes."""
+    assistant = call_upstream(
+        "openai.assistants",
+        get_openai_client().beta.assistants.retrieve,
+        assistant_id=os.getenv("SERVICE_POLICY_ASSISTANT_ID")
+    )
+    return (assistant.model, assistant.instructions, str(assistant.tools), str(assistant.tool_resources))
+
+
+# Shared cache of service policy answers, keyed by the normalized customer question
+policy_answer_cache = PolicyAnswerCache(
+    _service_policy_assistant_fingerprint,
+    ttl=float(os.getenv("POLICY_ANSWER_CACHE_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("POLICY_ANSWER_CACHE_MAX_ENTRIES", "1000")),
+    check_interval=float(os.getenv("POLICY_ASSISTANT_CHECK_INTERVAL_SECONDS", "300"))
+)
+
+
+def is_service_policy_question(customer_question):
+    """Answer a customer's policy question, reusing cached answers to questions asked before."""
+    return policy_answer_cache.get_or_compute(
+        customer_question,
+        lambda: _ask_service_policy_assistant(customer_question)
+    )
+
+
 def validate_general_service_date(preferred_service_date):
     """
     Validates the customer's preferred service date, ensuring it's at least 2 days from today (excluding Sunday).
     """
-    # Convert the preferred service date to the expected format (DD-MMM-YYYY)
-    preferred_date = datetime.strptime(preferred_service_date, '%d-%b-%Y')
-
-    # Get today's date
-    today = datetime.now().date()
+    # Look up the preferred date (DD-MMM-YYYY) in today's precomputed business calendar
+    status = business_calendar.check("general", preferred_service_date)
 
-    # Calculate the earliest valid date
-    minimum_lead_days = 2
-    earliest_valid_date = today + timedelta(days=minimum_lead_days)
-
-    if preferred_date.date() == today:
+    if status == SAME_DAY:
         return "Politely inform the customer that same-day requests are not accepted."
 
-    if preferred_date.date() < earliest_valid_date:     # Check if the preferred date is within 3 days from today
+    if status == TOO_SOON:
         return (f"Inform the customer that since their requested service on {preferred_service_date} is outside "
                 "our usual booking window, which requires at least 2 days notice, you will try to find "
                 "vendors who can accommodate the urgent request, but be sure to avoid making promises.")
 
-    if preferred_date.weekday() == 6:    # Check if the preferred date falls on a Saturday or Sunday
+    if status == CLOSED_DAY:
         return (f"Inform the customer that since their requested service on {preferred_service_date} falls "
                 "on a Sunday, you will try to find vendors who can accommodate the request, but be sure to "
                 "avoid making promises.")
 
+    if status == PUBLIC_HOLIDAY:
+        return (f"Inform the customer that since their requested service on {preferred_service_date} falls "
+                "on a public holiday, you will try to find vendors who can accommodate the request, but be "
+                "sure to avoid making promises.")
+
     return ("Inform the customer that you will check with the vendors for their availability and will get back "
             "to them as soon as you have an update. At the same time, continue to gather all other necessary "
             "information from the customer.")
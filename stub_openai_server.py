@@ -0,0 +1,295 @@
+"""
+Minimal stand-in for the OpenAI Assistants endpoints used by the chat service, for local load testing.
+
+Start it with ``uvicorn stub_openai_server:app --port 9000`` and point the app at it with
+``OPENAI_BASE_URL=http://localhost:9000/v1``. Every reply echoes the customer message. A message of the form
+``/tool <function_name> <json arguments>`` makes the run require that tool call, and a message containing
+``STUB_FLAG`` is flagged by moderation. STUB_LATENCY_MS adds latency to every request and STUB_TOKEN_DELAY_MS
+to every streamed delta.
+"""
+
+import os
+import json
+import time
+import uuid
+import asyncio
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+
+app = FastAPI(title="Stub OpenAI API")
+
+LATENCY_SECONDS = float(os.getenv("STUB_LATENCY_MS", "0")) / 1000
+TOKEN_DELAY_SECONDS = float(os.getenv("STUB_TOKEN_DELAY_MS", "0")) / 1000
+
+_threads = {}
+_runs = {}
+
+
+def _new_id(prefix):
+    return f"{prefix}_{uuid.uuid4().hex[:24]}"
+
+
+def _text_message(thread_id, role, text, run_id=None, assistant_id=None):
+    return {
+        "id": _new_id("msg"),
+        "object": "thread.message",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "role": role,
+        "status": "completed",
+        "content": [{"type": "text", "text": {"value": text, "annotations": []}}],
+        "run_id": run_id,
+        "assistant_id": assistant_id,
+        "attachments": [],
+        "metadata": {}
+    }
+
+
+def _get_thread(thread_id):
+    thread = _threads.get(thread_id)
+    if thread is None:
+        raise HTTPException(status_code=404, detail={"error": {"message": f"No thread found with id '{thread_id}'."}})
+    return thread
+
+
+def _get_run(thread_id, run_id):
+    run = _runs.get(run_id)
+    if run is None or run["thread_id"] != thread_id:
+        raise HTTPException(status_code=404, detail={"error": {"message": f"No run found with id '{run_id}'."}})
+    return run
+
+
+def _last_user_text(thread):
+    for message in reversed(thread["messages"]):
+        if message["role"] == "user":
+            return message["content"][0]["text"]["value"]
+    return ""
+
+
+def _plan_run(run, prompt):
+    """
+    Decide the outcome of a run from the prompt: a scripted tool call or an echoed reply.
+    """
+    if prompt.startswith("/tool "):
+        _, name, *arguments = prompt.split(" ", 2)
+        run["status"] = "requires_action"
+        run["required_action"] = {
+            "type": "submit_tool_outputs",
+            "submit_tool_outputs": {"tool_calls": [{
+                "id": _new_id("call"),
+                "type": "function",
+                "function": {"name": name, "arguments": arguments[0] if arguments else "{}"}
+            }]}
+        }
+        return None
+    return f"Stub reply to: {prompt}"
+
+
+def _complete_run(run, reply):
+    """
+    Add the assistant reply to the thread and mark the run completed.
+    """
+    message = _text_message(run["thread_id"], "assistant", reply, run["id"], run["assistant_id"])
+    _threads[run["thread_id"]]["messages"].append(message)
+    run["status"] = "completed"
+    run["required_action"] = None
+    run["completed_at"] = int(time.time())
+    return message
+
+
+def _create_thread(body):
+    thread = {"id": _new_id("thread"), "object": "thread", "created_at": int(time.time()),
+              "metadata": body.get("metadata") or {}, "tool_resources": {}}
+    _threads[thread["id"]] = dict(thread, messages=[])
+    for message in body.get("messages") or []:
+        _threads[thread["id"]]["messages"].append(_text_message(thread["id"], message["role"], message["content"]))
+    return thread
+
+
+def _create_run(thread_id, assistant_id):
+    run = {
+        "id": _new_id("run"),
+        "object": "thread.run",
+        "created_at": int(time.time()),
+        "thread_id": thread_id,
+        "assistant_id": assistant_id,
+        "status": "queued",
+        "required_action": None,
+        "last_error": None,
+        "incomplete_details": None,
+        "completed_at": None,
+        "model": "stub",
+        "instructions": "",
+        "tools": [],
+        "metadata": {},
+        "parallel_tool_calls": True
+    }
+    _runs[run["id"]] = run
+    return run
+
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream_run(run, reply, created=True):
+    """
+    Stream a run's events in the order the Assistants API sends them.
+
+    Streams resumed after submitting tool outputs start at ``thread.run.queued`` instead of ``thread.run.created``.
+    """
+    queued = dict(run, status="queued", required_action=None)
+    yield _sse("thread.run.created" if created else "thread.run.queued", queued)
+    yield _sse("thread.run.in_progress", dict(queued, status="in_progress"))
+
+    if reply is None:
+        yield _sse("thread.run.requires_action", run)
+    else:
+        message = _complete_run(run, reply)
+        yield _sse("thread.message.created", dict(message, status="in_progress", content=[]))
+        for index, word in enumerate(reply.split(" ")):
+            if TOKEN_DELAY_SECONDS:
+                await asyncio.sleep(TOKEN_DELAY_SECONDS)
+            text = word if index == 0 else f" {word}"
+            yield _sse("thread.message.delta", {
+                "id": message["id"],
+                "object": "thread.message.delta",
+                "delta": {"content": [{"index": 0, "type": "text", "text": {"value": text, "annotations": []}}]}
+            })
+        yield _sse("thread.message.completed", message)
+        yield _sse("thread.run.completed", run)
+    yield "event: done\ndata: [DONE]\n\n"
+
+
+@app.middleware("http")
+async def simulate_latency(request, call_next):
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    return await call_next(request)
+
+
+@app.post("/v1/moderations")
+async def create_moderation(request: Request):
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    return {
+        "id": _new_id("modr"),
+        "model": "stub-moderation",
+        "results": [{"flagged": "STUB_FLAG" in text, "categories": {}, "category_scores": {}} for text in inputs]
+    }
+
+
+@app.get("/v1/assistants/{assistant_id}")
+async def retrieve_assistant(assistant_id: str):
+    return {"id": assistant_id, "object": "assistant", "created_at": 0, "model": "stub", "name": assistant_id,
+            "instructions": "", "tools": [], "metadata": {}}
+
+
+@app.post("/v1/threads")
+async def create_thread(request: Request):
+    body = await request.json() if await request.body() else {}
+    return _create_thread(body)
+
+
+@app.get("/v1/threads/{thread_id}")
+async def retrieve_thread(thread_id: str):
+    thread = _get_thread(thread_id)
+    return {key: value for key, value in thread.items() if key != "messages"}
+
+
+@app.delete("/v1/threads/{thread_id}")
+async def delete_thread(thread_id: str):
+    _get_thread(thread_id)
+    del _threads[thread_id]
+    return {"id": thread_id, "object": "thread.deleted", "deleted": True}
+
+
+@app.post("/v1/threads/{thread_id}/messages")
+async def create_message(thread_id: str, request: Request):
+    body = await request.json()
+    message = _text_message(thread_id, body["role"], body["content"])
+    _get_thread(thread_id)["messages"].append(message)
+    return message
+
+
+@app.get("/v1/threads/{thread_id}/messages")
+async def list_messages(thread_id: str, order: str = "desc", limit: int = 20, after: str = None,
+                        before: str = None, run_id: str = None):
+    messages = [m for m in _get_thread(thread_id)["messages"] if run_id is None or m["run_id"] == run_id]
+    if order == "desc":
+        messages = messages[::-1]
+    ids = [m["id"] for m in messages]
+    if after in ids:
+        messages = messages[ids.index(after) + 1:]
+    elif before in ids:
+        messages = messages[:ids.index(before)][::-1][:limit][::-1]
+    page = messages[:limit]
+    return {
+        "object": "list",
+        "data": page,
+        "first_id": page[0]["id"] if page else None,
+        "last_id": page[-1]["id"] if page else None,
+        "has_more": len(messages) > len(page)
+    }
+
+
+@app.delete("/v1/threads/{thread_id}/messages/{message_id}")
+async def delete_message(thread_id: str, message_id: str):
+    thread = _get_thread(thread_id)
+    thread["messages"] = [m for m in thread["messages"] if m["id"] != message_id]
+    return {"id": message_id, "object": "thread.message.deleted", "deleted": True}
+
+
+@app.post("/v1/threads/runs")
+async def create_thread_and_run(request: Request):
+    body = await request.json()
+    thread = _create_thread(body.get("thread") or {})
+    run = _create_run(thread["id"], body["assistant_id"])
+    reply = _plan_run(run, _last_user_text(_threads[thread["id"]]))
+    if reply is not None:
+        _complete_run(run, reply)
+    return dict(run, status="queued", required_action=None)
+
+
+@app.post("/v1/threads/{thread_id}/runs")
+async def create_run(thread_id: str, request: Request):
+    body = await request.json()
+    run = _create_run(thread_id, body["assistant_id"])
+    reply = _plan_run(run, _last_user_text(_get_thread(thread_id)))
+    if body.get("stream"):
+        return StreamingResponse(_stream_run(run, reply), media_type="text/event-stream")
+    if reply is not None:
+        _complete_run(run, reply)
+    # The run is reported as queued so clients exercise their polling path
+    return dict(run, status="queued", required_action=None)
+
+
+@app.get("/v1/threads/{thread_id}/runs/{run_id}")
+async def retrieve_run(thread_id: str, run_id: str):
+    return _get_run(thread_id, run_id)
+
+
+@app.post("/v1/threads/{thread_id}/runs/{run_id}/cancel")
+async def cancel_run(thread_id: str, run_id: str):
+    run = _get_run(thread_id, run_id)
+    if run["status"] not in ("completed", "failed", "expired"):
+        run["status"] = "cancelled"
+        run["required_action"] = None
+    return run
+
+
+@app.post("/v1/threads/{thread_id}/runs/{run_id}/submit_tool_outputs")
+async def submit_tool_outputs(thread_id: str, run_id: str, request: Request):
+    body = await request.json()
+    run = _get_run(thread_id, run_id)
+    if run["status"] != "requires_action":
+        raise HTTPException(status_code=400, detail={"error": {"message": "Run does not require tool outputs."}})
+    outputs = "; ".join(str(output.get("output")) for output in body.get("tool_outputs", []))
+    reply = f"Tool outputs: {outputs}"
+    if body.get("stream"):
+        run["status"] = "queued"
+        run["required_action"] = None
+        return StreamingResponse(_stream_run(run, reply, created=False), media_type="text/event-stream")
+    _complete_run(run, reply)
+    return dict(run, status="queued")
@@ -0,0 +1,130 @@
+"""
+Tests of the chat API against the stub OpenAI server, run with ``python -m unittest test_api``.
+
+Both OpenAI clients are pointed at stub_openai_server.app in-process, so no network or credentials are needed.
+"""
+
+import os
+import json
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+_tmp_dir = tempfile.mkdtemp(prefix="test_api_")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ["AIRCON_CLEANING_ASSISTANT_ID"] = "asst_aircon_cleaning"
+os.environ["BOOKING_JOURNAL_PATH"] = os.path.join(_tmp_dir, "booking_journal.db")
+os.environ["PRICE_SNAPSHOT_DIR"] = os.path.join(_tmp_dir, "price_snapshots")
+
+import httpx
+from fastapi.testclient import TestClient
+from openai import OpenAI, AsyncOpenAI
+
+import api
+import stub_openai_server
+from openai_transport import set_openai_client, set_async_openai_client
+from rate_limiter import rate_limiter, BUSY_REPLY, UpstreamBusyError
+
+
+def _use_stub_openai():
+    """Point the shared sync and async OpenAI clients at the in-process stub server."""
+    set_openai_client(OpenAI(
+        api_key="test",
+        base_url="http://stub/v1",
+        http_client=TestClient(stub_openai_server.app, base_url="http://stub"),
+        max_retries=0
+    ))
+    set_async_openai_client(AsyncOpenAI(
+        api_key="test",
+        base_url="http://stub/v1",
+        http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=stub_openai_server.app),
+                                      base_url="http://stub"),
+        max_retries=0
+    ))
+
+
+class ChatAPITest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        _use_stub_openai()
+        cls.client = TestClient(api.app)
+        # Entering the client runs the lifespan handler
+        cls.client.__enter__()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.__exit__(None, None, None)
+
+    def _create_session(self):
+        response = self.client.post("/sessions", json={"service_name": "Aircon Cleaning"})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["session_id"]
+
+    def _send(self, session_id, content):
+        response = self.client.post(f"/sessions/{session_id}/messages", json={"content": content})
+        self.assertEqual(response.status_code, 200)
+        return response.json()["reply"]
+
+    def test_unknown_service_is_rejected(self):
+        response = self.client.post("/sessions", json={"service_name": "Moving"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_session_is_not_found(self):
+        response = self.client.post("/sessions/thread_missing/messages", json={"content": "Hello"})
+        self.assertEqual(response.status_code, 404)
+
+    def test_reply(self):
+        session_id = self._create_session()
+        self.assertEqual(self._send(session_id, "Hello"), "Stub reply to: Hello")
+
+    def test_streamed_reply(self):
+        session_id = self._create_session()
+        response = self.client.post(f"/sessions/{session_id}/messages/stream",
+                                    json={"content": "When can you come?"})
+        self.assertEqual(response.status_code, 200)
+
+        events = [json.loads(line[len("data: "):]) for line in response.text.splitlines()
+                  if line.startswith("data: ")]
+        self.assertEqual(events[-1], {"type": "done"})
+        self.assertEqual("".join(event["text"] for event in events[:-1]), "Stub reply to: When can you come?")
+
+    def test_tool_call(self):
+        session_id = self._create_session()
+        reply = self._send(session_id, "/tool no_such_function {}")
+        self.assertEqual(reply, "Tool outputs: Error: no_such_function is not an available function.")
+
+    def test_flagged_prompt(self):
+        session_id = self._create_session()
+        self.assertEqual(self._send(session_id, "STUB_FLAG"), "Harmful content.")
+
+    def test_turn_rejected_when_stream_pool_is_full(self):
+        session_id = self._create_session()
+        full = threading.BoundedSemaphore(1)
+        full.acquire()
+        with mock.patch.object(api, "_turn_slots", full):
+            self.assertEqual(self._send(session_id, "Hello"), BUSY_REPLY)
+
+    def test_prompt_removed_when_run_is_not_admitted(self):
+        session_id = self._create_session()
+        acquire = rate_limiter.acquire
+
+        def runs_busy(endpoint, tokens=1, admission=False):
+            if endpoint == "openai.runs" and admission:
+                raise UpstreamBusyError(endpoint)
+            acquire(endpoint, tokens=tokens, admission=admission)
+
+        with mock.patch.object(rate_limiter, "acquire", runs_busy):
+            self.assertEqual(self._send(session_id, "Hello"), BUSY_REPLY)
+        self.assertEqual(stub_openai_server._threads[session_id]["messages"], [])
+
+    def test_session_resolved_from_thread_metadata(self):
+        session_id = self._create_session()
+        # Another worker has not seen the session and looks its service up from the thread
+        api._session_services.clear()
+        self.assertEqual(self._send(session_id, "Hi again"), "Stub reply to: Hi again")
+
+
+if __name__ == "__main__":
+    unittest.main()
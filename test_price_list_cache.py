@@ -0,0 +1,57 @@
+"""
+Tests of the price-list cache, run with ``python -m unittest test_price_list_cache``.
+"""
+
+import threading
+import unittest
+
+from price_list_cache import PriceListCache
+
+
+class PriceListCacheInvalidationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.version = "sheets-v1"
+        self.loads = []
+        self.cache = PriceListCache(self._load, ttl=300, seed=lambda sheet_name: "snapshot")
+
+    def _load(self, sheet_name):
+        self.loads.append(sheet_name)
+        return self.version
+
+    def test_first_lookup_is_seeded_from_the_snapshot(self):
+        self.assertEqual(self.cache.get("Laundry"), "snapshot")
+
+    def test_lookup_after_invalidation_reads_the_sheet(self):
+        self.cache.refresh("Laundry")
+        self.version = "sheets-v2"
+        self.cache.invalidate("Laundry")
+
+        self.assertEqual(self.cache.get("Laundry"), "sheets-v2")
+        self.assertEqual(self.loads, ["Laundry", "Laundry"])
+
+    def test_lookup_after_invalidating_all_sheets_skips_the_snapshot(self):
+        self.cache.invalidate()
+        self.assertEqual(self.cache.get("Laundry"), "sheets-v1")
+
+    def test_load_started_before_invalidation_is_not_cached(self):
+        loading, release = threading.Event(), threading.Event()
+
+        def slow_load(sheet_name):
+            loading.set()
+            release.wait(5)
+            return "before-invalidation"
+
+        cache = PriceListCache(slow_load, ttl=300)
+        refresh = threading.Thread(target=cache.refresh, args=("Laundry",))
+        refresh.start()
+        loading.wait(5)
+        cache.invalidate("Laundry")
+        release.set()
+        refresh.join(5)
+
+        self.assertNotIn("Laundry", cache.stats()["entries"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import threading
+import logging
+import weakref
+import time
+import os
+
+import metrics
+from openai_transport import get_openai_client
+from resilience import call_upstream
+
+
+class ThreadRegistry:
+    """
+    Tracks the conversation threads owned by live sessions and deletes the ones no longer needed.
+
+    A thread is released when its owner is garbage collected, e.g. when a Streamlit session ends, and is then
+    deleted by a background janitor. Threads of live owners are never deleted, however long they are idle. The
+    janitor also deletes threads idle for longer than ``idle_ttl`` seconds whose owner is gone without releasing
+    them, or that were registered without one. A session whose thread was deleted finds out from touch() and
+    starts a new one.
+    """
+
+    def __init__(self, delete_thread, idle_ttl=7200.0, interval=300.0):
+        self._delete_thread = delete_thread
+        self.idle_ttl = idle_ttl
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._threads = {}
+        self._released = []
+        self._wakeup = threading.Event()
+        self._janitor = None
+
+    def register(self, thread_id, owner=None, service_name=None):
+        """
+        Track a thread in use by a session, releasing it once ``owner`` is garbage collected.
+        """
+        with self._lock:
+            self._threads[thread_id] = {
+                "last_active": time.monotonic(),
+                "service_name": service_name,
+                "owner": weakref.ref(owner) if owner is not None else None
+            }
+            if self._janitor is None:
+                self._janitor = threading.Thread(target=self._run, name="thread-janitor", daemon=True)
+                self._janitor.start()
+            metrics.set_gauge("thread_lifecycle.active", len(self._threads))
+        if owner is not None:
+            weakref.finalize(owner, self.release, thread_id)
+
+    def touch(self, thread_id, service_name=None):
+        """
+        Mark a thread as active, e.g. at the start of a turn.
+
+        Returns:
+            bool: False if the thread is no longer tracked, because it was released or reaped.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                return False
+            entry["last_active"] = time.monotonic()
+            if service_name is not None:
+                entry["service_name"] = service_name
+            return True
+
+    def release(self, thread_id):
+        """
+        Stop tracking a thread and queue it for deletion.
+        """
+        with self._lock:
+            if self._threads.pop(thread_id, None) is None:
+                return
+            self._released.append(thread_id)
+            metrics.set_gauge("thread_lifecycle.active", len(self._threads))
+        self._wakeup.set()
+
+    def reap(self):
+        """
+        Delete released threads, and threads without a live owner idle for longer than the TTL.
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [thread_id for thread_id, entry in self._threads.items()
+                    if now - entry["last_active"] > self.idle_ttl and not _owner_alive(entry)]
+            for thread_id in idle:
+                del self._threads[thread_id]
+            doomed, self._released = self._released + idle, []
+            metrics.set_gauge("thread_lifecycle.active", len(self._threads))
+
+        deleted = 0
+        for thread_id in doomed:
+            try:
+                self._delete_thread(thread_id)
+                deleted += 1
+            except Exception as e:
+                logging.error("Failed to delete conversation thread %s: %s", thread_id, e)
+        if doomed:
+            metrics.increment("thread_lifecycle.deleted", deleted)
+            logging.info("Deleted %d of %d released or orphaned conversation thread(s), %d orphaned.", deleted,
+                         len(doomed), len(idle))
+        return deleted
+
+    def _run(self):
+        """
+        Background loop reaping threads, woken early when a thread is released.
+        """
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.reap()
+            except Exception as e:
+                logging.error("Thread janitor crashed: %s", e)
+
+
+def _owner_alive(entry):
+    """Return whether the owner a thread was registered with still exists."""
+    return entry["owner"] is not None and entry["owner"]() is not None
+
+
+def delete_thread(thread_id):
+    """Delete a conversation thread, also used for the warm threads never handed out."""
+    call_upstream("openai.threads", get_openai_client().beta.threads.delete, thread_id)
+
+
+# Registry of the conversation threads of every session in the process
+thread_registry = ThreadRegistry(
+    delete_thread,
+    idle_ttl=float(os.getenv("THREAD_IDLE_TTL_SECONDS", "7200")),
+    interval=float(os.getenv("THREAD_JANITOR_INTERVAL_SECONDS", "300"))
+)
@@ -0,0 +1,84 @@
+from collections import OrderedDict
+from datetime import date
+import threading
+import json
+import os
+
+import metrics
+from function_mapping import cacheable_tools
+
+
+def canonical_arguments(arguments):
+    """
+    Serialize tool arguments so equal arguments give the same string regardless of key order or spacing.
+    """
+    return json.dumps(arguments, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _price_list_version(sheet_name):
+    """
+    Return the snapshot version of the price list a tool reads, or None if it is not known.
+    """
+    # Imported here so importing the cache does not load the Google helpers
+    from service_utils import get_service_price_list
+
+    return get_service_price_list(sheet_name).attrs.get("snapshot_version")
+
+
+class ToolResultCache:
+    """
+    LRU cache of tool outputs for tools marked as cacheable in function_mapping.cacheable_tools.
+
+    Outputs are keyed by the tool name, its canonicalized arguments, today's date and, for tools that read a
+    price list, the price list's snapshot version. A new day or a new price-list version therefore never serves
+    a stale answer. Only successful calls are cached.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def is_cacheable(self, name):
+        return name in cacheable_tools
+
+    def get_or_call(self, name, arguments, call):
+        """
+        Return the cached output of a tool call, or call it and cache the output.
+
+        Args:
+            name (str): The tool name.
+            arguments (dict): The decoded tool arguments.
+            call (callable): Called without arguments to produce the output on a miss.
+        """
+        sheet_name = cacheable_tools[name]
+        version = _price_list_version(sheet_name) if sheet_name else None
+        if sheet_name and version is None:
+            # Without a snapshot version a changed price list could not be told apart, so skip the cache
+            metrics.increment("tool_cache.bypassed", tool=name)
+            return call()
+
+        key = (name, canonical_arguments(arguments), date.today().isoformat(), version)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                metrics.increment("tool_cache.hits", tool=name)
+                return self._entries[key]
+
+        metrics.increment("tool_cache.misses", tool=name)
+        output = call()
+        with self._lock:
+            self._entries[key] = output
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                metrics.increment("tool_cache.evictions")
+        return output
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Cache shared by every session in the process
+tool_result_cache = ToolResultCache(max_entries=int(os.getenv("TOOL_CACHE_MAX_ENTRIES", "2048")))
@@ -0,0 +1,216 @@
+from contextlib import contextmanager
+from contextvars import ContextVar, copy_context
+import threading
+import logging
+import atexit
+import random
+import queue
+import json
+import time
+import os
+
+import metrics
+
+# Span of the code currently running, inherited by spans opened inside it
+_current_span = ContextVar("current_span", default=None)
+
+
+class Span:
+    """
+    One timed phase of a chat turn, e.g. moderation, a run poll or a tool call.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error",
+                 "sampled")
+
+    def __init__(self, name, parent, attributes, sample_rate):
+        self.name = name
+        self.span_id = f"{random.getrandbits(64):016x}"
+        if parent is None:
+            self.trace_id = f"{random.getrandbits(128):032x}"
+            self.parent_id = None
+            self.sampled = random.random() < sample_rate
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.sampled = parent.sampled
+        self.attributes = attributes
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    @property
+    def duration(self):
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def to_dict(self):
+        """Flat JSON-lines record of the span."""
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+    def to_otlp(self):
+        """Span in the OTLP/JSON encoding."""
+        otlp_span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": 1,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns),
+            "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in self.attributes.items()],
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1}
+        }
+        if self.parent_id:
+            otlp_span["parentSpanId"] = self.parent_id
+        return otlp_span
+
+
+def _otlp_value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class SpanExporter:
+    """
+    Writes finished spans to a file from a background thread.
+
+    ``fmt`` is "jsonl" for one flat JSON object per span, or "otlp" for one OTLP/JSON ``resourceSpans`` export
+    request per batch, as written by the OpenTelemetry file exporter. Spans are dropped rather than blocking the
+    caller once ``max_queue`` spans are waiting.
+    """
+
+    def __init__(self, path, fmt="jsonl", flush_interval=1.0, max_queue=10000, service_name="home-services"):
+        self.path = path
+        self.fmt = fmt
+        self.flush_interval = flush_interval
+        self.service_name = service_name
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+
+    def export(self, span):
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            metrics.increment("tracing.dropped_spans")
+
+    def flush(self):
+        """
+        Write every queued span now.
+        """
+        spans = []
+        while True:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if spans:
+            self._write(spans)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logging.error("Failed to export spans: %s", e)
+
+    def _write(self, spans):
+        if self.fmt == "otlp":
+            lines = [json.dumps({"resourceSpans": [{
+                "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]},
+                "scopeSpans": [{"scope": {"name": "tracing"}, "spans": [span.to_otlp() for span in spans]}]
+            }]})]
+        else:
+            lines = [json.dumps(span.to_dict(), default=str) for span in spans]
+
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+class Tracer:
+    """
+    Creates spans and hands sampled ones to the exporter.
+
+    Every span's duration is also recorded in the ``trace.span_seconds`` histogram, whether or not it is sampled
+    or exported. Without an exporter, spans cost a few microseconds.
+    """
+
+    def __init__(self, exporter=None, sample_rate=1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """
+        Time the enclosed block as a child of the current span, or as the root of a new trace.
+
+        Yields:
+            Span: The span, so attributes known only inside the block can be added.
+        """
+        span = Span(name, _current_span.get(), attributes, self.sample_rate)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            try:
+                _current_span.reset(token)
+            except ValueError:
+                # Generators resumed in another context cannot restore the previous span
+                pass
+            metrics.observe("trace.span_seconds", span.duration, span=name)
+            if self.exporter is not None and span.sampled:
+                self.exporter.export(span)
+
+
+def current_span():
+    """Return the span of the code currently running, or None."""
+    return _current_span.get()
+
+
+def in_current_context(func):
+    """
+    Wrap a function to run in a copy of the caller's context, so spans it opens on an executor thread are
+    children of the caller's span.
+    """
+    context = copy_context()
+    return lambda *args, **kwargs: context.run(func, *args, **kwargs)
+
+
+def _create_tracer():
+    """
+    Create the tracer configured by TRACE_EXPORT_PATH, TRACE_EXPORT_FORMAT and TRACE_SAMPLE_RATE.
+    """
+    path = os.getenv("TRACE_EXPORT_PATH")
+    exporter = None
+    if path:
+        exporter = SpanExporter(path, fmt=os.getenv("TRACE_EXPORT_FORMAT", "jsonl"),
+                                flush_interval=float(os.getenv("TRACE_EXPORT_INTERVAL_SECONDS", "1")))
+        atexit.register(exporter.flush)
+    return Tracer(exporter, sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1")))
+
+
+# Tracer shared by the chat client, the tools and the Sheets helpers
+tracer = _create_tracer()
+span = tracer.span
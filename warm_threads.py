@@ -0,0 +1,168 @@
+from collections import deque
+import logging
+import threading
+import atexit
+import time
+import os
+
+import metrics
+from openai_transport import get_openai_client
+from resilience import call_upstream
+from thread_lifecycle import delete_thread
+
+
+class WarmThreadPool:
+    """
+    Pool of pre-created, empty conversation threads handed out to new sessions.
+
+    Threads are not bound to an assistant, so one pool serves every home service. Once the pool drops to
+    ``low_water`` threads, a background refill creates threads until ``target_size`` are ready. Threads older
+    than ``max_age`` seconds are not handed out and are deleted during the next refill. If the pool is empty,
+    a thread is created on the caller's thread as before. drain() deletes the threads still in the pool when
+    the process exits, so they are not left behind upstream.
+    """
+
+    def __init__(self, create_thread, delete_thread=None, target_size=8, low_water=2, max_age=3600):
+        self._create_thread = create_thread
+        self._delete_thread = delete_thread
+        self.target_size = target_size
+        self.low_water = low_water
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._ready = deque()
+        self._expired = []
+        self._refilling = False
+        self._closed = False
+
+    def acquire(self):
+        """
+        Return the ID of a ready thread, creating one synchronously if the pool is empty.
+        """
+        thread_id = self._pop_ready()
+        if thread_id is not None:
+            metrics.increment("warm_threads.hits")
+        else:
+            metrics.increment("warm_threads.misses")
+            start = time.monotonic()
+            thread_id = self._create_thread()
+            metrics.observe("warm_threads.create_seconds", time.monotonic() - start)
+
+        self._maybe_refill()
+        return thread_id
+
+    def prefill(self):
+        """
+        Start filling the pool in the background, e.g. when the app starts.
+        """
+        self._maybe_refill(force=True)
+
+    def drain(self):
+        """
+        Stop refilling and delete every thread that was never handed out.
+
+        Returns:
+            int: The number of threads deleted.
+        """
+        with self._lock:
+            self._closed = True
+            doomed = [thread_id for thread_id, _ in self._ready] + self._expired
+            self._ready.clear()
+            self._expired = []
+            metrics.set_gauge("warm_threads.size", 0)
+
+        deleted = 0
+        if self._delete_thread is not None:
+            for thread_id in doomed:
+                try:
+                    self._delete_thread(thread_id)
+                    deleted += 1
+                except Exception as e:
+                    logging.error("Failed to delete warm thread %s: %s", thread_id, e)
+        if doomed:
+            logging.info("Deleted %d of %d unused warm thread(s).", deleted, len(doomed))
+        return deleted
+
+    def size(self):
+        with self._lock:
+            return len(self._ready)
+
+    def _pop_ready(self):
+        """
+        Take the oldest thread that has not reached the maximum age.
+        """
+        now = time.monotonic()
+        with self._lock:
+            while self._ready:
+                thread_id, created_at = self._ready.popleft()
+                if now - created_at < self.max_age:
+                    metrics.set_gauge("warm_threads.size", len(self._ready))
+                    return thread_id
+                self._expired.append(thread_id)
+                metrics.increment("warm_threads.expired")
+            metrics.set_gauge("warm_threads.size", 0)
+        return None
+
+    def _maybe_refill(self, force=False):
+        """
+        Start a background refill if the pool is at or below the low-water mark and none is running.
+        """
+        if self.target_size <= 0:
+            return
+        with self._lock:
+            if self._closed or self._refilling or (not force and len(self._ready) > self.low_water):
+                return
+            self._refilling = True
+        threading.Thread(target=self._refill, name="warm-thread-refill", daemon=True).start()
+
+    def _refill(self):
+        """
+        Create threads until the pool reaches its target size, then delete expired ones.
+        """
+        start = time.monotonic()
+        created = 0
+        try:
+            while self.size() < self.target_size:
+                create_start = time.monotonic()
+                thread_id = self._create_thread()
+                metrics.observe("warm_threads.create_seconds", time.monotonic() - create_start)
+                with self._lock:
+                    if self._closed:
+                        # Drained while this thread was being created
+                        self._expired.append(thread_id)
+                        break
+                    self._ready.append((thread_id, time.monotonic()))
+                    metrics.set_gauge("warm_threads.size", len(self._ready))
+                created += 1
+        except Exception as e:
+            metrics.increment("warm_threads.refill_failures")
+            logging.error("Failed to refill the warm thread pool: %s", e)
+        finally:
+            with self._lock:
+                self._refilling = False
+                expired, self._expired = self._expired, []
+            metrics.observe("warm_threads.refill_seconds", time.monotonic() - start)
+            logging.info("Warm thread pool refilled with %d thread(s) in %.2fs.", created, time.monotonic() - start)
+
+        if self._delete_thread is not None:
+            for thread_id in expired:
+                try:
+                    self._delete_thread(thread_id)
+                except Exception as e:
+                    logging.error("Failed to delete expired warm thread %s: %s", thread_id, e)
+
+
+def _create_empty_thread():
+    # A retried create may leave an orphaned empty thread behind, which is harmless
+    return call_upstream("openai.threads", get_openai_client().beta.threads.create).id
+
+
+# Pool used by OpenAIClient for new conversations; a size of 0 disables it
+warm_thread_pool = WarmThreadPool(
+    _create_empty_thread,
+    delete_thread,
+    target_size=int(os.getenv("WARM_THREAD_POOL_SIZE", "8")),
+    low_water=int(os.getenv("WARM_THREAD_POOL_LOW_WATER", "2")),
+    max_age=float(os.getenv("WARM_THREAD_MAX_AGE_SECONDS", "3600"))
+)
+
+atexit.register(warm_thread_pool.drain)